@@ -5,11 +5,25 @@ A modular voice assistant that uses local AI models for intent classification
 and command execution without requiring API calls.
 """
 
-from core import Assistant
-from ai import IntentClassifier
-from commands import CommandRegistry
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "Ofir Ohana"
 
-__all__ = ["Assistant", "IntentClassifier", "CommandRegistry"]
\ No newline at end of file
+__all__ = ["Assistant", "IntentClassifier", "CommandRegistry"]
+
+# Public names and the modules they live in - imported on first access so that
+# importing the package does not load the model, TTS or GUI automation libraries
+_LAZY_EXPORTS = {
+    "Assistant": "core",
+    "IntentClassifier": "ai",
+    "CommandRegistry": "commands.command_registry",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
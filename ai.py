@@ -2,208 +2,25 @@
 AI components for intent classification and command template management with wake word system
 """
 
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from typing import Dict, Any, List, Optional
+import queue
+import random
 import re
+import threading
 import time
 from datetime import datetime, timedelta
 
-# Command templates with examples and thresholds
-COMMAND_TEMPLATES = {
-    # ========= STATIC COMMANDS (type 0) =========
-    "open_stremio": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "open stremio", "start stremio", "launch stremio", "play stremio",
-            "open streaming", "start streaming", "launch streaming app"
-        ],
-        "response": "Opening Stremio"
-    },
-    "play_pause": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "play", "pause", "play pause", "resume", "stop"
-        ],
-        "response": "Controlling media playback"
-    },
-    "youtube_music_play_pause": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "play music", "pause music", "play youtube music", "pause youtube music",
-            "resume music", "stop music", "music play", "music pause", "stop youtube music"
-        ],
-        "response": "Controlling YouTube Music"
-    },
-    "youtube_play_pause": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "play youtube", "pause youtube", "play video", "pause video",
-            "resume youtube", "stop youtube", "youtube play", "youtube pause"
-        ],
-        "response": "Controlling YouTube"
-    },
-    "stremio_play_pause": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "play stremio", "pause stremio", "resume stremio", "stop stremio",
-            "stremio play", "stremio pause"
-        ],
-        "response": "Controlling Stremio"
-    },
-    "music_play_pause": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "play spotify", "pause spotify", "spotify play", "spotify pause",
-            "play song", "pause song", "next song", "previous song"
-        ],
-        "response": "Controlling music player"
-    },
-    "stremio_fullscreen": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "stremio fullscreen", "fullscreen", "full screen", "make fullscreen",
-            "expand video", "maximize video", "big screen"
-        ],
-        "response": "Toggling Stremio fullscreen"
-    },
-    "volume_up": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "volume up", "turn up volume", "increase volume", "louder",
-            "make it louder", "turn it up", "raise volume", "boost volume"
-        ],
-        "response": "Turning up volume"
-    },
-    "volume_down": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "volume down", "turn down volume", "decrease volume", "quieter",
-            "make it quieter", "turn it down", "lower volume", "reduce volume"
-        ],
-        "response": "Turning down volume"
-    },
-    "open_notepad": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "open notepad", "open text editor", "launch notepad", "start notepad",
-            "open editor", "new document", "create document", "open notes"
-        ],
-        "response": "Opening Notepad"
-    },
-    "get_time": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "what time is it", "current time", "tell me the time", "time",
-            "what's the time", "check time", "show time", "time please"
-        ],
-        "response": "Getting current time"
-    },
-    "next_song": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "next song", "skip song", "next track", "skip track", "next",
-            "skip", "play next", "next music", "skip this song", "change song"
-        ],
-        "response": "Playing next song"
-    },
-    "previous_song": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "previous song", "last song", "previous track", "last track", "previous",
-            "go back", "back song", "previous music", "play previous", "last music"
-        ],
-        "response": "Playing previous song"
-    },
-    "mute": {
-        "type": 0,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "mute", "silence", "turn off sound", "mute volume", "no sound",
-            "quiet", "mute audio", "turn off audio"
-        ],
-        "response": "Muting audio"
-    },
-    "open_calculator": {
-        "type": 0,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "open calculator", "launch calculator", "start calculator", "calc",
-            "calculator", "open calc", "math calculator"
-        ],
-        "response": "Opening Calculator"
-    },
-    # ========= DANGEROUS COMMANDS - HIGH THRESHOLD =========
-    "shutdown": {
-        "type": 0,
-        "confidence_threshold": 0.85,
-        "examples": [
-            "shutdown", "shut down", "turn off computer", "power off",
-            "shutdown computer", "turn off", "power down", "close computer"
-        ],
-        "response": "Shutting down computer"
-    },
-    "restart": {
-        "type": 0,
-        "confidence_threshold": 0.85,
-        "examples": [
-            "restart", "reboot", "restart computer", "reboot computer",
-            "restart system", "reboot system", "refresh computer"
-        ],
-        "response": "Restarting computer"
-    },
-    "sleep": {
-        "type": 0,
-        "confidence_threshold": 0.85,
-        "examples": [
-            "sleep", "sleep computer", "put computer to sleep", "hibernate",
-            "sleep mode", "standby"
-        ],
-        "response": "Putting computer to sleep"
-    },
-    # ========= DYNAMIC COMMANDS (type 1) =========
-    "web_search": {
-        "type": 1,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "search for", "google", "look up", "find information about",
-            "search the web for", "find", "look for", "search"
-        ],
-        "response": "Searching the web"
-    },
-    "write_text": {
-        "type": 1,
-        "confidence_threshold": 0.7,
-        "examples": [
-            "write", "type", "write text", "type text", "write down",
-            "type this", "write this", "input text", "enter text"
-        ],
-        "response": "Writing text"
-    },
-    "press_button": {
-        "type": 1,
-        "confidence_threshold": 0.6,
-        "examples": [
-            "press", "hit", "push", "click", "press key", "hit key",
-            "push button", "click button", "press the", "hit the"
-        ],
-        "response": "Pressing button"
-    }
-}
+from flight_recorder import recorder
+from utils import lazy_import
+from commands.manifest import DEFAULT_MODEL_NAME, get_compiled_commands, load_template_bundle
+from ngram_classifier import NgramClassifier
+
+# Heavy dependencies are only imported when a classifier is actually created
+np = lazy_import("numpy")
+
+# Command templates with examples and thresholds, compiled from the command manifests
+# (commands/builtin_manifest.py and plugin entry points)
+COMMAND_TEMPLATES = get_compiled_commands().templates
 
 # Wake word configurations with examples like command templates
 WAKE_WORD_CONFIG = {
@@ -251,16 +68,55 @@ STOP_WORDS = {
 COMPOUND_SEPARATORS = ["and", "then", "also", "plus", "after that", "next", "followed by"]
 
 
+class ActivationState:
+    """Wake word activation window - one per listening session"""
+
+    def __init__(self, duration: float = WAKE_WORD_CONFIG["activation_duration"], on_activate=None):
+        self.is_active = False
+        self.activation_end_time = None
+        self.duration = duration
+        self.on_activate = on_activate  # Called on every activation, e.g. to prefetch execution state
+
+    def check(self) -> bool:
+        """Whether the window is open, closing it once it has expired"""
+        if not self.is_active or not self.activation_end_time:
+            return False
+
+        if datetime.now() >= self.activation_end_time:
+            self.is_active = False
+            self.activation_end_time = None
+            recorder.info("ai", "Activation expired")
+            return False
+
+        return True
+
+    def activate(self):
+        """Open the window for duration seconds"""
+        self.is_active = True
+        self.activation_end_time = datetime.now() + timedelta(seconds=self.duration)
+        if self.on_activate:
+            self.on_activate()
+        recorder.info("ai", "Assistant activated for %s seconds", self.duration)
+
+
 class IntentClassifier:
     """Simplified wake word system - just checks for 'Nico' or 'Hey Nico' at start"""
 
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, cascade: bool = True, audit_rate: float = 0.05):
         print("Loading local AI model...")
-        self.sentence_model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.sentence_model = None
+        self._encoder_lock = threading.Lock()
+        self.encoder_stats = {"loads": 0, "releases": 0, "last_load_time": 0.0}
+        self.load_encoder()
         self.command_templates = COMMAND_TEMPLATES
         self.command_embeddings = {}
         self.stop_words = STOP_WORDS
         self.compound_separators = COMPOUND_SEPARATORS
+        # Separators that are also part of command phrases ("next song") would split real commands
+        examples = [f" {ex} " for data in COMMAND_TEMPLATES.values() for ex in data["examples"]]
+        separators = [sep for sep in self.compound_separators if not any(f" {sep} " in ex for ex in examples)]
+        self._split_pattern = re.compile(r"(\s+(?:" + "|".join(re.escape(sep) for sep in separators) + r")\s+)")
 
         # Wake words - more variations for better recognition
         self.wake_words = [
@@ -268,20 +124,62 @@ class IntentClassifier:
             'nico', 'niko', 'nicole', 'nikko', 'neko', 'nika'
         ]
 
-        # Simple activation state
-        self.is_active = False
-        self.activation_end_time = None
-        self.activation_duration = 120  # 2 minutes instead of 10 seconds
+        # Activation state of the default session - the session hub gives each session its own
+        self.activation = ActivationState()
 
         self._compute_command_embeddings()
+        self._build_template_matrix()
+
+        # Fast tier - answers confident static commands without the encoder. It must also clear each
+        # command's own threshold, and never decides commands under the safety cooldown (shutdown,
+        # restart, ...) - a shared word like "restart song" is not worth a reboot.
+        self.fast_tier = NgramClassifier().fit(self.command_templates) if cascade else None
+        self.encoder_only = set(get_compiled_commands().non_repeatable)
+        self.audit_rate = audit_rate  # Share of fast answers re-checked by the encoder in the background
+        self.tier_stats = {"fast": 0, "encoder": 0, "fast_time": 0.0, "escalated_agree": 0,
+                           "audited": 0, "audit_agree": 0, "audit_dropped": 0}
+        self._stats_lock = threading.Lock()
+        self._audit_queue = queue.Queue(maxsize=32)
+        self._audit_thread = None
+        # N-best rescoring - how often a lower-ranked transcript made the better command
+        self.rescore_stats = {"utterances": 0, "alternatives": 0, "changed": 0, "time": 0.0}
+        if self.fast_tier:
+            recorder.info("ai", "Fast tier accepts similarity >= %.2f and margin >= %.2f (%.0f%% of examples)",
+                          self.fast_tier.confidence_bound, self.fast_tier.margin_bound,
+                          self.fast_tier.calibration.get("coverage", 0.0) * 100)
         print("Local AI model loaded.")
 
     def _compute_command_embeddings(self):
-        """Pre-compute embeddings for all command examples"""
+        """Pre-compute unit-length embeddings for all command examples"""
+        bundle = load_template_bundle(self.command_templates, self.model_name)
+        if bundle is not None:
+            print("Loaded precomputed command embeddings")
+            self.command_embeddings = bundle
+            return
+
         print("Computing command embeddings...")
         for command, data in self.command_templates.items():
-            embeddings = self.sentence_model.encode(data["examples"])
-            self.command_embeddings[command] = embeddings
+            embeddings = self._encode(data["examples"])
+            self.command_embeddings[command] = self._normalize(embeddings)
+
+    def _build_template_matrix(self):
+        """Stack the static command embeddings into one matrix, scored with a single product"""
+        self.template_intents = [command for command, data in self.command_templates.items()
+                                 if data.get("type", 0) == 0]
+        blocks = [self.command_embeddings[command] for command in self.template_intents]
+        self.template_matrix = np.vstack(blocks)
+        # Row where each intent's examples start, for a per-intent max with reduceat
+        self.template_offsets = np.cumsum([0] + [len(block) for block in blocks[:-1]])
+
+    @property
+    def is_active(self) -> bool:
+        return self.activation.is_active
+
+    @staticmethod
+    def _normalize(embeddings):
+        """Scale rows to unit length so a dot product is the cosine similarity"""
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
 
     def _has_wake_word(self, text: str) -> tuple[bool, str, bool, bool]:
         """Check if text starts with wake word and return remaining text + activation type"""
@@ -312,9 +210,255 @@ class IntentClassifier:
         filtered_words = [word for word in words if word not in self.stop_words]
         return " ".join(filtered_words)
 
-    def _classify_single_intent(self, text: str) -> Dict[str, Any]:
-        """Classify a single command"""
-        print(f"DEBUG: Classifying: '{text}'")
+    def _clean_text(self, text: str) -> str:
+        """Text that is embedded for a static command"""
+        return self._remove_stop_words(text) or text
+
+    @property
+    def encoder_loaded(self) -> bool:
+        return self.sentence_model is not None
+
+    def load_encoder(self):
+        """The sentence encoder, loading it if it was released"""
+        with self._encoder_lock:
+            if self.sentence_model is None:
+                from sentence_transformers import SentenceTransformer
+                started = time.perf_counter()
+                self.sentence_model = SentenceTransformer(self.model_name)
+                self.encoder_stats["loads"] += 1
+                self.encoder_stats["last_load_time"] = time.perf_counter() - started
+                recorder.info("ai", "Encoder loaded in %.0f ms", self.encoder_stats["last_load_time"] * 1000)
+            return self.sentence_model
+
+    def release_encoder(self) -> bool:
+        """Drop the sentence encoder to free its memory - the next encode loads it again.
+        The template embeddings and the fast tier stay, so many commands need no reload."""
+        with self._encoder_lock:
+            if self.sentence_model is None:
+                return False
+            self.sentence_model = None
+            self.encoder_stats["releases"] += 1
+        recorder.info("ai", "Encoder released")
+        return True
+
+    def _encode(self, texts: List[str]):
+        model = self.sentence_model or self.load_encoder()
+        return model.encode(texts)
+
+    def warm_up(self) -> bool:
+        """Run one small encode so the next real one does not pay for cold caches and thread pools"""
+        self._encode([self.wake_words[0]])
+        return True
+
+    def encode_texts(self, texts: List[str]) -> Dict[str, Any]:
+        """Embed many texts with one encoder call - text -> unit-length embedding"""
+        unique = list(dict.fromkeys(texts))
+        if not unique:
+            return {}
+        embeddings = self._normalize(self._encode(unique))
+        return dict(zip(unique, embeddings))
+
+    def match_command(self, text: str) -> Optional[tuple]:
+        """(intent, is_dictation) when a partial transcript already reads as a complete command, for endpointing.
+        Cheap - dictation commands match by trigger, static ones only through a confident fast tier."""
+        _, remaining, _, _ = self._has_wake_word(text)
+        remaining = remaining.strip().lower()
+        if not remaining or any(remaining.endswith(f" {sep}") for sep in self.compound_separators):
+            return None  # Only the wake word, or the next command of a sequence is still coming
+        dynamic = self._dynamic_command(remaining)
+        if dynamic:
+            return dynamic, True
+        intent, _, _ = self._fast_predict(remaining)
+        return (intent, False) if intent else None
+
+    def embedding_inputs(self, text: str, activation: Optional[ActivationState] = None,
+                         require_wake_word: bool = True) -> List[str]:
+        """Texts classifying this utterance would embed, so callers can encode many utterances at once"""
+        text = text.strip()
+        if require_wake_word:
+            has_wake, remaining, _, _ = self._has_wake_word(text)
+            if has_wake:
+                text = remaining
+            elif not (activation or self.activation).check():
+                return []  # Will be ignored
+
+        parts = self._split_compound(text) if text else []
+        if len(parts) > 1:
+            parts.append(text)  # Classified whole if any part is not a confident command
+        return [self._clean_text(part) for part in parts
+                if not self._dynamic_command(part) and self._fast_predict(part)[0] is None]
+
+    def classify_batch(self, texts: List[str], activations: Optional[List[ActivationState]] = None,
+                       require_wake_word: bool = True) -> List[Dict[str, Any]]:
+        """Classify several utterances with a single encoder call"""
+        activations = activations or [None] * len(texts)
+        inputs = []
+        for text, activation in zip(texts, activations):
+            inputs.extend(self.embedding_inputs(text, activation, require_wake_word))
+        encoded = self.encode_texts(inputs)
+
+        if require_wake_word:
+            return [self.process_audio_input(text, activation, encoded) for text, activation in zip(texts, activations)]
+        return [self.classify_intent(text, encoded) for text in texts]
+
+    def rescore_alternatives(self, alternatives: List[tuple], activation: Optional[ActivationState] = None,
+                             require_wake_word: bool = True, encoded: Optional[Dict[str, Any]] = None) -> tuple:
+        """Pick the N-best transcript with the best joint ASR x intent score - (text, encoded).
+        alternatives are (text, ASR score) pairs, best first. Embeddings missing from encoded are made
+        in one encoder call for all alternatives and returned, so classifying the pick needs no other.
+        Nothing is activated or counted as a classification; without a confident command the
+        recognizer's best transcript stays."""
+        started = time.perf_counter()
+        activation = activation or self.activation
+        encoded = dict(encoded or {})
+        commands = [self._rescoring_command(text.strip(), activation, require_wake_word) for text, _ in alternatives]
+        inputs = [cleaned for command in commands if isinstance(command, str)
+                  for cleaned in self.embedding_inputs(command, require_wake_word=False)]
+        encoded.update(self.encode_texts([cleaned for cleaned in inputs if cleaned not in encoded]))
+
+        best_text, best_score = alternatives[0][0], 0.0
+        for (text, asr_score), command in zip(alternatives, commands):
+            if command is True:
+                score = asr_score  # "Hey Nico" on its own
+            else:
+                score = asr_score * self._command_score(command, encoded) if command else 0.0
+            if score > best_score:
+                best_text, best_score = text, score
+
+        with self._stats_lock:
+            self.rescore_stats["utterances"] += 1
+            self.rescore_stats["alternatives"] += len(alternatives)
+            self.rescore_stats["changed"] += best_text != alternatives[0][0]
+            self.rescore_stats["time"] += time.perf_counter() - started
+        recorder.debug("ai", "Rescored %d alternatives: %r (joint %.3f)", len(alternatives), best_text, best_score)
+        return best_text, encoded
+
+    def _rescoring_command(self, text: str, activation: ActivationState, require_wake_word: bool):
+        """The command an alternative would be classified as - True for a bare "Hey Nico", None if ignored"""
+        if not require_wake_word:
+            return text or None
+        has_wake, remaining, _, needs_activation = self._has_wake_word(text)
+        if has_wake:
+            return remaining or (True if needs_activation else None)
+        return text if activation.check() else None
+
+    def _command_score(self, text: str, encoded: Dict[str, Any]) -> float:
+        """Confidence of text as a command, 0.0 unless it meets its threshold - like _classify_command
+        without the tier statistics and audits"""
+        parts = self._split_compound(text)
+        if len(parts) > 1:
+            scores = [self._single_command_score(part, encoded) for part in parts]
+            if all(scores):
+                return min(scores)
+        return self._single_command_score(text, encoded)
+
+    def _single_command_score(self, text: str, encoded: Dict[str, Any]) -> float:
+        dynamic = self._dynamic_command(text)
+        if dynamic:
+            return 0.9 if 0.9 >= self.command_templates[dynamic].get("confidence_threshold", 0.7) else 0.0
+        intent, _, score = self._fast_predict(text)
+        if intent is not None:
+            return score
+        embedding = encoded.get(self._clean_text(text))
+        if embedding is None:
+            embedding = self._normalize(self._encode([self._clean_text(text)]))[0]
+        intent, score = self._score_static(embedding)
+        threshold = self.command_templates.get(intent, {}).get("confidence_threshold", 0.5)
+        return score if intent != "unknown" and score >= threshold else 0.0
+
+    def get_rescore_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.rescore_stats)
+        count = stats["utterances"]
+        stats["avg_alternatives"] = stats["alternatives"] / count if count else 0.0
+        stats["change_rate"] = stats["changed"] / count if count else 0.0
+        stats["avg_time"] = stats.pop("time") / count if count else 0.0
+        return stats
+
+    def _score_static(self, embedding) -> tuple:
+        """Best static command and its similarity for a unit-length embedding"""
+        scores = np.maximum.reduceat(self.template_matrix @ embedding, self.template_offsets)
+        best = int(np.argmax(scores))
+        if scores[best] <= 0.0:
+            return "unknown", 0.0
+        return self.template_intents[best], float(scores[best])
+
+    def rank_static(self, embedding, k: int = 3) -> List[tuple]:
+        """Top k static commands and their similarities for a unit-length embedding"""
+        scores = np.maximum.reduceat(self.template_matrix @ embedding, self.template_offsets)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Stable sort keeps the first intent ahead on ties, as in _score_static
+        top = sorted(top, key=lambda index: (-scores[index], index))
+        return [(self.template_intents[index], float(scores[index])) for index in top]
+
+    def _fast_predict(self, text: str) -> tuple:
+        """(intent or None if not trusted, fast-tier top intent, similarity) - scores the text with
+        stop words kept, since the n-grams are matched against the examples as written"""
+        if self.fast_tier is None:
+            return None, None, 0.0
+        intent, confidence, margin = self.fast_tier.predict(text)
+        trusted = (intent not in self.encoder_only and self.fast_tier.accepts(confidence, margin)
+                   and confidence >= self._fast_threshold(intent))
+        return (intent if trusted else None), intent, confidence
+
+    def _fast_threshold(self, intent: str) -> float:
+        """Similarity a fast answer must reach - the calibrated bound or the command's threshold, if higher"""
+        threshold = self.command_templates.get(intent, {}).get("confidence_threshold", 0.7)
+        return max(self.fast_tier.confidence_bound, threshold)
+
+    def _record_tier(self, tier: str, fast_time: float, agree: bool = False):
+        with self._stats_lock:
+            self.tier_stats[tier] += 1
+            self.tier_stats["fast_time"] += fast_time
+            if agree:
+                self.tier_stats["escalated_agree"] += 1
+
+    def _audit(self, cleaned_text: str, intent: str):
+        """Queue a fast answer to be checked against the encoder - dropped when the auditor is behind"""
+        if self._audit_thread is None:
+            self._audit_thread = threading.Thread(target=self._audit_loop, name="tier-audit", daemon=True)
+            self._audit_thread.start()
+        try:
+            self._audit_queue.put_nowait((cleaned_text, intent))
+        except queue.Full:
+            with self._stats_lock:
+                self.tier_stats["audit_dropped"] += 1
+
+    def _audit_loop(self):
+        while True:
+            cleaned_text, intent = self._audit_queue.get()
+            try:
+                embedding = self._normalize(self._encode([cleaned_text]))[0]
+                agree = self._score_static(embedding)[0] == intent
+                with self._stats_lock:
+                    self.tier_stats["audited"] += 1
+                    if agree:
+                        self.tier_stats["audit_agree"] += 1
+                if not agree:
+                    recorder.debug("ai", "Fast tier disagreed with the encoder on %r (%s)", cleaned_text, intent)
+            except Exception as e:
+                recorder.error("ai", "Fast tier audit failed: %s", e)
+
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """How often the fast tier answered, and how often it agreed with the encoder"""
+        with self._stats_lock:
+            stats = dict(self.tier_stats)
+        total = stats["fast"] + stats["encoder"]
+        stats["enabled"] = self.fast_tier is not None
+        stats["fast_hit_rate"] = stats["fast"] / total if total else 0.0
+        stats["avg_fast_time"] = stats["fast_time"] / total if total else 0.0
+        stats["audit_accuracy"] = stats["audit_agree"] / stats["audited"] if stats["audited"] else None
+        # How often the fast top-1 was right anyway when it was not trusted - room to loosen the bounds
+        stats["escalated_agreement"] = stats["escalated_agree"] / stats["encoder"] if stats["encoder"] else None
+        if self.fast_tier:
+            stats["confidence_bound"] = self.fast_tier.confidence_bound
+            stats["margin_bound"] = self.fast_tier.margin_bound
+        return stats
+
+    def _classify_single_intent(self, text: str, encoded: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Classify a single command - encoded holds precomputed embeddings keyed by cleaned text"""
+        recorder.debug("ai", "Classifying: %r", text)
 
         if not text.strip():
             return {
@@ -325,9 +469,7 @@ class IntentClassifier:
                 "threshold": 0.5
             }
 
-        cleaned_text = self._remove_stop_words(text)
-        if not cleaned_text:
-            cleaned_text = text
+        cleaned_text = self._clean_text(text)
 
         # Check for dynamic commands (type 1)
         for command, data in self.command_templates.items():
@@ -347,68 +489,98 @@ class IntentClassifier:
                             "threshold": data.get("confidence_threshold", 0.7)
                         }
 
-        # Use embeddings for static commands (type 0)
-        input_embedding = self.sentence_model.encode([cleaned_text])
-
-        best_score = 0.0
-        best_command = "unknown"
+        # Fast tier first - trusted only above both its calibrated bound and the template threshold
+        started = time.perf_counter()
+        fast_command, fast_top, fast_score = self._fast_predict(text)
+        fast_time = time.perf_counter() - started
+        if fast_command is not None:
+            self._record_tier("fast", fast_time)
+            if self.audit_rate and random.random() < self.audit_rate:
+                self._audit(cleaned_text, fast_command)
+            return {
+                "intent": fast_command,
+                "confidence": fast_score,
+                "parameters": {},
+                "response": self.command_templates[fast_command]["response"],
+                "threshold": self._fast_threshold(fast_command),
+                "tier": "fast"
+            }
 
-        for command, data in self.command_templates.items():
-            if data.get("type", 0) == 0:
-                embeddings = self.command_embeddings[command]
-                similarities = cosine_similarity(input_embedding, embeddings)[0]
-                max_similarity = np.max(similarities)
+        # Use embeddings for static commands (type 0)
+        input_embedding = encoded.get(cleaned_text) if encoded else None
+        if input_embedding is None:
+            input_embedding = self._normalize(self._encode([cleaned_text]))[0]
 
-                if max_similarity > best_score:
-                    best_score = max_similarity
-                    best_command = command
+        best_command, best_score = self._score_static(input_embedding)
+        if self.fast_tier is not None:
+            self._record_tier("encoder", fast_time, agree=fast_top == best_command)
 
         return {
             "intent": best_command,
-            "confidence": float(best_score),
+            "confidence": best_score,
             "parameters": {},
             "response": self.command_templates.get(best_command, {}).get("response", "Command not recognized"),
-            "threshold": self.command_templates.get(best_command, {}).get("confidence_threshold", 0.5)
+            "threshold": self.command_templates.get(best_command, {}).get("confidence_threshold", 0.5),
+            "tier": "encoder"
         }
 
-    def _is_active(self) -> bool:
-        """Check if assistant is currently active"""
-        if not self.is_active or not self.activation_end_time:
-            return False
-
-        from datetime import datetime
-        if datetime.now() >= self.activation_end_time:
-            self.is_active = False
-            self.activation_end_time = None
-            print("DEBUG: Activation expired")
-            return False
-
-        return True
-
-    def _activate(self):
-        """Activate assistant for a short time"""
-        from datetime import datetime, timedelta
-        self.is_active = True
-        self.activation_end_time = datetime.now() + timedelta(seconds=self.activation_duration)
-        print(f"DEBUG: Assistant activated for {self.activation_duration} seconds")
+    def _split_compound(self, text: str) -> List[str]:
+        """Split "open calculator and open notepad" into its parts.
+        A dynamic command keeps everything after its trigger, so "write milk and eggs" stays whole."""
+        pieces = self._split_pattern.split(text.strip())
+        parts = [pieces[0]]
+        # pieces alternates part, separator, part, ...
+        for separator, part in zip(pieces[1::2], pieces[2::2]):
+            if self._dynamic_command(parts[-1]):
+                parts[-1] += separator + part  # The separator belongs to the dynamic content
+            else:
+                parts.append(part)
+        return [part for part in parts if part.strip()]
 
-    def process_audio_input(self, text: str) -> Dict[str, Any]:
-        """Main method - simplified wake word processing with activation"""
+    def _dynamic_command(self, text: str) -> Optional[str]:
+        """Name of the dynamic (type 1) command triggered by text, if any"""
+        text_lower = text.lower()
+        for command, data in self.command_templates.items():
+            if data.get("type") == 1 and any(trigger in text_lower for trigger in data["examples"]):
+                return command
+        return None
+
+    def _classify_command(self, text: str, encoded: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Classify text as a compound command when every part is a confident command,
+        otherwise as a single command"""
+        parts = self._split_compound(text)
+        if len(parts) > 1:
+            results = [self._classify_single_intent(part, encoded) for part in parts]
+            if all(r["intent"] != "unknown" and r["confidence"] >= r["threshold"] for r in results):
+                return {
+                    "intent": "compound_command",
+                    "confidence": min(r["confidence"] for r in results),
+                    "parameters": {"commands": results},
+                    "response": ", ".join(r["response"] for r in results),
+                    "threshold": min(r["threshold"] for r in results)
+                }
+        return self._classify_single_intent(text, encoded)
+
+    def process_audio_input(self, text: str, activation: Optional[ActivationState] = None,
+                            encoded: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Main method - simplified wake word processing with activation.
+        activation is the session's activation window (the default session's if None)."""
+        activation = activation or self.activation
         text = text.strip()
-        print(f"DEBUG: Processing: '{text}' (Active: {self._is_active()})")
+        recorder.debug("ai", "Processing: %r (Active: %s)", text, activation.is_active)
 
         # Check for wake word first
         has_wake, remaining_text, needs_voice_response, needs_activation = self._has_wake_word(text)
 
         if has_wake:
-            print(f"DEBUG: Wake word detected, command: '{remaining_text}'")
+            recorder.debug("ai", "Wake word detected, command: %r", remaining_text)
 
             if needs_activation:
-                self._activate()  # Only activate for "Hey Nico"
+                activation.activate()  # Only activate for "Hey Nico"
 
             if remaining_text:
                 # Process the command immediately
-                return self._classify_single_intent(remaining_text)
+                return self._classify_command(remaining_text, encoded)
             else:
                 # Just wake word, no command
                 if needs_activation:
@@ -432,9 +604,9 @@ class IntentClassifier:
                     }
 
         # If no wake word but assistant is active, process command anyway
-        elif self._is_active():
-            print("DEBUG: No wake word but assistant is active - processing command")
-            return self._classify_single_intent(text)
+        elif activation.check():
+            recorder.debug("ai", "No wake word but assistant is active - processing command")
+            return self._classify_command(text, encoded)
 
         else:
             # No wake word and not active - ignore
@@ -446,6 +618,6 @@ class IntentClassifier:
                 "threshold": 0.0
             }
 
-    def classify_intent(self, text: str) -> Dict[str, Any]:
+    def classify_intent(self, text: str, encoded: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Direct classification without wake word check"""
-        return self._classify_single_intent(text)
\ No newline at end of file
+        return self._classify_command(text, encoded)
\ No newline at end of file
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Batch classification - classify large transcript logs offline
+
+Input is streamed in chunks (JSONL with a text field, or plain text with one
+utterance per line). Each chunk goes to a worker process holding its own
+classifier. The worker sorts the chunk by token count and encodes it in
+batches of similar length, so little work is wasted on padding. Results are
+written in input order as JSONL - intent, confidence, threshold, margin and
+the top-k static commands - and a checkpoint is saved after every chunk, so
+an interrupted run continues where it stopped with --resume.
+
+    python batch_classify.py transcripts.jsonl -o results.jsonl --workers 4
+    python batch_classify.py transcripts.txt -o results.jsonl --resume
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 2048  # Lines per worker task - also the checkpoint interval
+DEFAULT_BATCH_SIZE = 64    # Texts per encoder call
+
+# Set in each worker process by _init_worker
+_classifier = None
+_options = {}
+
+
+def read_lines(path: str, input_format: str, text_field: str, skip: int = 0) -> Iterator[Tuple[int, Any, str]]:
+    """(line number, id, text) for every input line after the first skip lines.
+    Text is None for lines that cannot be read, so they still get an output record."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            if number <= skip:
+                continue
+            line = line.rstrip("\n")
+            if input_format == "text":
+                yield number, None, line
+                continue
+            try:
+                record = json.loads(line)
+                yield number, record.get("id"), record.get(text_field)
+            except (ValueError, AttributeError):
+                yield number, None, None
+
+
+def read_chunks(lines: Iterator, size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for item in lines:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(model_name: Optional[str], cascade: bool, top_k: int, batch_size: int, threads: int):
+    """Load one classifier per worker process"""
+    global _classifier, _options
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    from ai import IntentClassifier
+    kwargs = {"model_name": model_name} if model_name else {}
+    _classifier = IntentClassifier(cascade=cascade, audit_rate=0.0, **kwargs)
+    _options = {"top_k": top_k, "batch_size": batch_size}
+
+
+def classify_chunk(chunk: List[tuple]) -> List[Dict[str, Any]]:
+    """Classify one chunk in the worker - length-bucketed batched encoding, results in input order"""
+    classifier = _classifier
+    texts = [(number, record_id, text.strip()) for number, record_id, text in chunk if isinstance(text, str)]
+
+    # Everything the chunk needs embedded, shortest first so each batch has similar lengths
+    wanted = []
+    for _, _, text in texts:
+        if text:
+            wanted.extend(classifier.embedding_inputs(text, require_wake_word=False))
+            if not classifier._dynamic_command(text):
+                wanted.append(classifier._clean_text(text))  # For the top-k of the whole utterance
+    wanted = sorted(set(wanted), key=lambda t: (len(t.split()), len(t)))
+
+    encoded = {}
+    batch_size = _options["batch_size"]
+    for start in range(0, len(wanted), batch_size):
+        encoded.update(classifier.encode_texts(wanted[start:start + batch_size]))
+
+    results = {}
+    for number, record_id, text in texts:
+        record = {"line": number, "text": text}
+        if record_id is not None:
+            record["id"] = record_id
+        if not text:
+            record.update(intent="unknown", confidence=0.0, threshold=0.0, accepted=False, margin=0.0, top_k=[])
+            results[number] = record
+            continue
+
+        result = classifier.classify_intent(text, encoded)
+        embedding = encoded.get(classifier._clean_text(text))
+        ranked = classifier.rank_static(embedding, max(2, _options["top_k"])) if embedding is not None else []
+        record.update(
+            intent=result["intent"],
+            confidence=round(float(result["confidence"]), 4),
+            threshold=result["threshold"],
+            accepted=result["intent"] != "unknown" and result["confidence"] >= result["threshold"],
+            margin=round(ranked[0][1] - ranked[1][1], 4) if len(ranked) > 1 else 0.0,
+            top_k=[[intent, round(score, 4)] for intent, score in ranked[:_options["top_k"]]],
+        )
+        if result["intent"] == "compound_command":
+            record["commands"] = [part["intent"] for part in result["parameters"]["commands"]]
+        if result.get("tier"):
+            record["tier"] = result["tier"]
+        results[number] = record
+
+    return [results.get(number) or {"line": number, "error": "unreadable line"} for number, _, _ in chunk]
+
+
+class Checkpoint:
+    """Lines finished and output size, saved atomically next to the output file"""
+
+    def __init__(self, output_path: str):
+        self.path = f"{output_path}.checkpoint"
+
+    def load(self, input_path: str) -> Dict[str, Any]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {"lines": 0, "bytes": 0}
+        if state.get("input") != os.path.abspath(input_path):
+            raise SystemExit(f"Checkpoint {self.path} belongs to {state.get('input')}, not {input_path}")
+        return state
+
+    def save(self, input_path: str, lines: int, size: int):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"input": os.path.abspath(input_path), "lines": lines, "bytes": size}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def run(args) -> int:
+    """Classify the input - returns the number of lines written in this run"""
+    input_format = args.format or ("jsonl" if args.input.endswith((".jsonl", ".json")) else "text")
+    checkpoint = Checkpoint(args.output)
+    state = checkpoint.load(args.input) if args.resume else {"lines": 0, "bytes": 0}
+    if state["lines"]:
+        print(f"Resuming after line {state['lines']}", file=sys.stderr)
+
+    out = open(args.output, "r+b" if args.resume and os.path.exists(args.output) else "wb")
+    out.truncate(state["bytes"])  # Drop anything written after the last checkpoint
+    out.seek(state["bytes"])
+
+    chunks = read_chunks(read_lines(args.input, input_format, args.text_field, state["lines"]), args.chunk_size)
+    workers = max(1, args.workers)
+    # Split the cores between workers rather than letting each one use them all
+    threads = args.threads or (max(1, (os.cpu_count() or 1) // workers) if workers > 1 else 0)
+    init_args = (args.model, args.cascade, args.top_k, args.batch_size, threads)
+    pool = None
+    if workers == 1:
+        _init_worker(*init_args)
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=init_args)
+
+    lines_done = state["lines"]
+    written = 0
+    started = time.perf_counter()
+    pending = collections.deque()  # Chunks in flight, in input order
+    try:
+        while True:
+            # Keep every worker busy without reading the whole input ahead
+            while pool and len(pending) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(pool.apply_async(classify_chunk, (chunk,)))
+            if pool:
+                if not pending:
+                    break
+                records = pending.popleft().get()
+            else:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                records = classify_chunk(chunk)
+
+            out.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            lines_done = records[-1]["line"]
+            written += len(records)
+            checkpoint.save(args.input, lines_done, out.tell())
+
+            elapsed = time.perf_counter() - started
+            print(f"\r{lines_done} lines, {written / elapsed:.0f} lines/s", end="", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after line {lines_done} - continue with --resume", file=sys.stderr)
+        if pool:
+            pool.terminate()
+            pool = None
+        return written
+    finally:
+        out.close()
+        if pool:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - started
+    print(f"\nClassified {written} lines in {elapsed:.1f}s ({written / elapsed if elapsed else 0:.0f} lines/s) "
+          f"with {workers} worker(s) -> {args.output}", file=sys.stderr)
+    checkpoint.remove()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify transcript logs offline")
+    parser.add_argument("input", help="JSONL (one object per line) or plain text (one utterance per line)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results, one record per input line")
+    parser.add_argument("--format", choices=("jsonl", "text"), default=None,
+                        help="input format (default: from the extension)")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the utterance")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: torch's)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="lines per task and checkpoint")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="texts per encoder call")
+    parser.add_argument("--top-k", type=int, default=3, help="static commands to list per line")
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: the manifest's)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="let the n-gram fast tier answer confident lines, as the live assistant does")
+    parser.add_argument("--resume", action="store_true", help="continue from the output's checkpoint")
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,27 @@ Available command modules:
 - text_commands: Text input and keyboard control
 """
 
-from .media_commands import MediaCommands
-from .system_commands import SystemCommands
-from .app_commands import AppCommands
-from .text_commands import TextCommands
+import importlib
 
 __all__ = [
     "MediaCommands",
     "SystemCommands",
     "AppCommands",
     "TextCommands"
-]
\ No newline at end of file
+]
+
+# Handler classes are imported on first access
+_LAZY_EXPORTS = {
+    "MediaCommands": ".media_commands",
+    "SystemCommands": ".system_commands",
+    "AppCommands": ".app_commands",
+    "TextCommands": ".text_commands",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
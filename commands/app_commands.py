@@ -2,45 +2,43 @@
 Application Commands - Launch and control applications
 """
 
-import subprocess
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from urllib.parse import quote_plus
+
+from .app_launcher import AppLauncher
 
 
 class AppCommands:
     """Application launching commands"""
 
-    @staticmethod
-    def open_stremio(params: Dict[str, Any] = None) -> bool:
-        """Launch Stremio application"""
+    def __init__(self, launcher: Optional[AppLauncher] = None):
+        self.launcher = launcher or AppLauncher()
+
+    def open_stremio(self, params: Dict[str, Any] = None) -> bool:
+        """Launch Stremio, or focus it if it is already open"""
         try:
-            subprocess.run(["start", "stremio://"], shell=True)
-            return True
+            return self.launcher.launch("stremio")
         except Exception as e:
             print(f"Open Stremio error: {e}")
             return False
 
-    @staticmethod
-    def open_notepad(params: Dict[str, Any] = None) -> bool:
-        """Launch Notepad"""
+    def open_notepad(self, params: Dict[str, Any] = None) -> bool:
+        """Launch Notepad, or focus it if it is already open"""
         try:
-            subprocess.Popen(["notepad"])
-            return True
+            return self.launcher.launch("notepad")
         except Exception as e:
             print(f"Open Notepad error: {e}")
             return False
 
-    @staticmethod
-    def open_calculator(params: Dict[str, Any] = None) -> bool:
-        """Launch Calculator"""
+    def open_calculator(self, params: Dict[str, Any] = None) -> bool:
+        """Launch Calculator, or focus it if it is already open"""
         try:
-            subprocess.Popen(["calc"])
-            return True
+            return self.launcher.launch("calculator")
         except Exception as e:
             print(f"Open Calculator error: {e}")
             return False
 
-    @staticmethod
-    def web_search(params: Dict[str, Any] = None) -> bool:
+    def web_search(self, params: Dict[str, Any] = None) -> bool:
         """Search the web using default browser"""
         if not params or not params.get('content'):
             print("No search query provided")
@@ -48,11 +46,7 @@ class AppCommands:
 
         try:
             query = params['content']
-            subprocess.Popen(
-                f"start chrome https://www.google.com/search?q={query.replace(' ', '+')}",
-                shell=True
-            )
-            return True
+            return self.launcher.open_url(f"https://www.google.com/search?q={quote_plus(query)}")
         except Exception as e:
             print(f"Web search error: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+App Launcher - start applications without blocking, or focus them if already running
+
+Keeps a registry of the processes it launched, detects running apps from the
+window snapshot, never goes through a shell, and reaps children on a
+background thread. Cold-launch and focus latencies are recorded per app.
+
+Windows are matched by owning pid or by executable / WM_CLASS name, never by
+title, so a browser tab called "Calculator" is not mistaken for the app.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from flight_recorder import recorder
+from .window_system import WindowBackend, WindowIndex, create_window_backend
+
+
+class AppSpec:
+    """How to find and start one application"""
+
+    def __init__(self, name: str, commands: List[List[str]] = None, url: str = None,
+                 window_names: List[str] = None):
+        self.name = name
+        self.commands = commands or []  # Candidate command lines, first one found on PATH wins
+        self.url = url                  # Alternatively, a URL handed to the system opener
+        # Executable or WM_CLASS names of the app's windows - the name plus each candidate executable
+        self.window_names = window_names or [name] + [os.path.basename(command[0]) for command in self.commands]
+
+    def resolve_command(self) -> Optional[List[str]]:
+        for command in self.commands:
+            if shutil.which(command[0]):
+                return command
+        return None
+
+
+def _default_apps() -> Dict[str, AppSpec]:
+    if sys.platform == "win32":
+        return {
+            "stremio": AppSpec("stremio", url="stremio://"),
+            "notepad": AppSpec("notepad", [["notepad"]]),
+            "calculator": AppSpec("calculator", [["calc"]], window_names=["calc", "calculatorapp"]),
+        }
+    return {
+        "stremio": AppSpec("stremio", [["stremio"]], url="stremio://"),
+        "notepad": AppSpec("notepad", [["gnome-text-editor"], ["gedit"], ["kate"], ["mousepad"], ["xed"]]),
+        "calculator": AppSpec("calculator", [["gnome-calculator"], ["kcalc"], ["galculator"]]),
+    }
+
+
+def _has_exited(process: subprocess.Popen) -> bool:
+    """Whether the child has exited, reaping it if so - safe against a concurrent wait()"""
+    try:
+        process.wait(timeout=0)
+    except subprocess.TimeoutExpired:
+        return False
+    except ChildProcessError:
+        pass  # Already reaped elsewhere
+    return True
+
+
+class _LaunchRecord:
+    """A process started by the launcher"""
+
+    def __init__(self, name: str, process: Optional[subprocess.Popen], requested_at: float):
+        self.name = name
+        self.process = process
+        self.requested_at = requested_at
+        self.window_seen_at = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and not _has_exited(self.process)
+
+
+class AppLauncher:
+    """Launches or focuses applications and tracks their latency"""
+
+    def __init__(self, window_backend: Optional[WindowBackend] = None,
+                 apps: Optional[Dict[str, AppSpec]] = None, reap_interval: float = 1.0):
+        self.apps = apps or _default_apps()
+        self.window_index = WindowIndex(window_backend or create_window_backend())
+        self.reap_interval = reap_interval
+        self.launched = {}  # App name -> list of _LaunchRecord
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.stats = {}
+
+    # ---- Public API ----
+
+    def launch(self, name: str, focus_if_running: bool = True) -> bool:
+        """Focus the app if it is running, otherwise start it without waiting for it"""
+        app = self.apps.get(name)
+        if app is None:
+            print(f"Unknown application: {name}")
+            return False
+
+        started = time.perf_counter()
+        if focus_if_running:
+            window = self._find_window(app) if self.window_index.backend.available else None
+            if window and self.window_index.backend.activate_window(window.handle):
+                self.window_index.invalidate()
+                self._record(name, "focus", time.perf_counter() - started)
+                recorder.info("launcher", "Focused running %s (%s)", name, window.title)
+                return True
+
+            if self._is_running(name):
+                # Started by us and alive, but no window we can focus on this platform
+                self._record(name, "already_running", time.perf_counter() - started)
+                print(f"{name} is already running")
+                return True
+
+        return self._start(app, started)
+
+    def open_url(self, url: str) -> bool:
+        """Open a URL with the system default handler, without a shell"""
+        started = time.perf_counter()
+        try:
+            if sys.platform == "win32":
+                os.startfile(url)
+                process = None
+            else:
+                opener = "open" if sys.platform == "darwin" else "xdg-open"
+                process = self._spawn([opener, url])
+        except OSError as e:
+            print(f"Open URL error: {e}")
+            return False
+
+        self._track(_LaunchRecord("url", process, started))
+        self._record("url", "cold", time.perf_counter() - started)
+        return True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-app launch counts and mean cold-launch / focus / window-ready latency"""
+        with self._lock:
+            result = {}
+            for name, kinds in self.stats.items():
+                result[name] = {
+                    kind: {"count": count, "avg_time": total / count if count else 0.0}
+                    for kind, (count, total) in kinds.items()
+                }
+                result[name]["running"] = sum(1 for r in self.launched.get(name, []) if r.is_running)
+            return result
+
+    # ---- Internals ----
+
+    def _start(self, app: AppSpec, started: float) -> bool:
+        command = app.resolve_command()
+        try:
+            if command:
+                process = self._spawn(command)
+            elif app.url:
+                return self.open_url(app.url)
+            else:
+                print(f"No launcher found for {app.name}")
+                return False
+        except OSError as e:
+            print(f"Launch {app.name} error: {e}")
+            return False
+
+        self._track(_LaunchRecord(app.name, process, started))
+        self._record(app.name, "cold", time.perf_counter() - started)
+        recorder.info("launcher", "Started %s (pid %s)", app.name, process.pid)
+        return True
+
+    @staticmethod
+    def _spawn(command: List[str]) -> subprocess.Popen:
+        """Start a detached child - no shell, no inherited stdio"""
+        kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        return subprocess.Popen(command, **kwargs)
+
+    def _find_window(self, app: AppSpec, snapshot=None):
+        """Topmost window of a process we launched for app, else of any instance of it"""
+        snapshot = snapshot or self.window_index.refresh()
+        return snapshot.find_app(app.window_names, self._pids(app.name))
+
+    def _pids(self, name: str) -> List[int]:
+        with self._lock:
+            return [r.process.pid for r in self.launched.get(name, []) if r.process is not None]
+
+    def _is_running(self, name: str) -> bool:
+        with self._lock:
+            return any(record.is_running for record in self.launched.get(name, []))
+
+    def _track(self, record: _LaunchRecord):
+        with self._lock:
+            self.launched.setdefault(record.name, []).append(record)
+        self._ensure_reaper()
+
+    def _record(self, name: str, kind: str, elapsed: float):
+        with self._lock:
+            count, total = self.stats.setdefault(name, {}).get(kind, (0, 0.0))
+            self.stats[name][kind] = (count + 1, total + elapsed)
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="app-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        """Collect exited children and note when launched apps' windows appear"""
+        while True:
+            time.sleep(self.reap_interval)
+            with self._lock:
+                records = [r for records in self.launched.values() for r in records]
+            if not records:
+                return
+
+            waiting = [r for r in records if r.window_seen_at is None and r.name in self.apps]
+            if waiting and self.window_index.backend.available:
+                snapshot = self.window_index.refresh()
+                for record in waiting:
+                    if self._find_window(self.apps[record.name], snapshot):
+                        record.window_seen_at = time.perf_counter()
+                        self._record(record.name, "window_ready", record.window_seen_at - record.requested_at)
+
+            with self._lock:
+                for name in list(self.launched):
+                    alive = [r for r in self.launched[name]
+                             if r.process is not None and not _has_exited(r.process)]
+                    if alive:
+                        self.launched[name] = alive
+                    else:
+                        del self.launched[name]
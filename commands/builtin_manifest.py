@@ -0,0 +1,333 @@
+"""
+Built-in command manifest
+
+Each entry declares one command:
+    intent                - name the classifier returns
+    type                  - 0 static (matched by embeddings), 1 dynamic (trigger + content)
+    confidence_threshold  - minimum confidence to execute
+    examples              - example phrases (triggers for dynamic commands)
+    response              - spoken/printed response
+    handler               - "module:Class.method" or "module:function", imported on first dispatch
+    lane                  - execution lane: keyboard, process or system
+    repeatable            - False for commands that must not run again within the safety cooldown
+    timeout               - optional seconds before a hung handler is abandoned (default 15, 0 = no limit)
+
+Plugins add commands the same way by exposing a list like this one through the
+"voice_assistant.commands" entry point group.
+"""
+
+BUILTIN_COMMANDS = [
+    # ========= STATIC COMMANDS (type 0) =========
+    {
+        "intent": "open_stremio",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "open stremio", "start stremio", "launch stremio", "play stremio",
+            "open streaming", "start streaming", "launch streaming app"
+        ],
+        "response": "Opening Stremio",
+        "handler": "commands.app_commands:AppCommands.open_stremio",
+        "lane": "process",
+        "repeatable": True
+    },
+    {
+        "intent": "play_pause",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "play", "pause", "play pause", "resume", "stop"
+        ],
+        "response": "Controlling media playback",
+        "handler": "commands.media_commands:MediaCommands.play_pause",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "youtube_music_play_pause",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "play music", "pause music", "play youtube music", "pause youtube music",
+            "resume music", "stop music", "music play", "music pause", "stop youtube music"
+        ],
+        "response": "Controlling YouTube Music",
+        "handler": "commands.media_commands:MediaCommands.youtube_music_play_pause",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "youtube_play_pause",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "play youtube", "pause youtube", "play video", "pause video",
+            "resume youtube", "stop youtube", "youtube play", "youtube pause"
+        ],
+        "response": "Controlling YouTube",
+        "handler": "commands.media_commands:MediaCommands.youtube_play_pause",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "stremio_play_pause",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "play stremio", "pause stremio", "resume stremio", "stop stremio",
+            "stremio play", "stremio pause"
+        ],
+        "response": "Controlling Stremio",
+        "handler": "commands.media_commands:MediaCommands.stremio_play_pause",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "music_play_pause",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "play spotify", "pause spotify", "spotify play", "spotify pause",
+            "play song", "pause song", "next song", "previous song"
+        ],
+        "response": "Controlling music player",
+        "handler": "commands.media_commands:MediaCommands.music_play_pause",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "stremio_fullscreen",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "stremio fullscreen", "fullscreen", "full screen", "make fullscreen",
+            "expand video", "maximize video", "big screen"
+        ],
+        "response": "Toggling Stremio fullscreen",
+        "handler": "commands.media_commands:MediaCommands.stremio_fullscreen",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "volume_up",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "volume up", "turn up volume", "increase volume", "louder",
+            "make it louder", "turn it up", "raise volume", "boost volume"
+        ],
+        "response": "Turning up volume",
+        "handler": "commands.media_commands:MediaCommands.volume_up",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "volume_down",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "volume down", "turn down volume", "decrease volume", "quieter",
+            "make it quieter", "turn it down", "lower volume", "reduce volume"
+        ],
+        "response": "Turning down volume",
+        "handler": "commands.media_commands:MediaCommands.volume_down",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "open_notepad",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "open notepad", "open text editor", "launch notepad", "start notepad",
+            "open editor", "new document", "create document", "open notes"
+        ],
+        "response": "Opening Notepad",
+        "handler": "commands.app_commands:AppCommands.open_notepad",
+        "lane": "process",
+        "repeatable": True
+    },
+    {
+        "intent": "get_time",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "what time is it", "current time", "tell me the time", "time",
+            "what's the time", "check time", "show time", "time please"
+        ],
+        "response": "Getting current time",
+        "handler": "commands.system_commands:SystemCommands.get_time",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "next_song",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "next song", "skip song", "next track", "skip track", "next",
+            "skip", "play next", "next music", "skip this song", "change song"
+        ],
+        "response": "Playing next song",
+        "handler": "commands.media_commands:MediaCommands.next_song",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "previous_song",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "previous song", "last song", "previous track", "last track", "previous",
+            "go back", "back song", "previous music", "play previous", "last music"
+        ],
+        "response": "Playing previous song",
+        "handler": "commands.media_commands:MediaCommands.previous_song",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "mute",
+        "type": 0,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "mute", "silence", "turn off sound", "mute volume", "no sound",
+            "quiet", "mute audio", "turn off audio"
+        ],
+        "response": "Muting audio",
+        "handler": "commands.media_commands:MediaCommands.mute",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "open_calculator",
+        "type": 0,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "open calculator", "launch calculator", "start calculator", "calc",
+            "calculator", "open calc", "math calculator"
+        ],
+        "response": "Opening Calculator",
+        "handler": "commands.app_commands:AppCommands.open_calculator",
+        "lane": "process",
+        "repeatable": True
+    },
+    # ========= DANGEROUS COMMANDS - HIGH THRESHOLD =========
+    {
+        "intent": "shutdown",
+        "type": 0,
+        "confidence_threshold": 0.85,
+        "examples": [
+            "shutdown", "shut down", "turn off computer", "power off",
+            "shutdown computer", "turn off", "power down", "close computer"
+        ],
+        "response": "Shutting down computer",
+        "handler": "commands.system_commands:SystemCommands.shutdown",
+        "lane": "system",
+        "repeatable": False
+    },
+    {
+        "intent": "restart",
+        "type": 0,
+        "confidence_threshold": 0.85,
+        "examples": [
+            "restart", "reboot", "restart computer", "reboot computer",
+            "restart system", "reboot system", "refresh computer"
+        ],
+        "response": "Restarting computer",
+        "handler": "commands.system_commands:SystemCommands.restart",
+        "lane": "system",
+        "repeatable": False
+    },
+    {
+        "intent": "sleep",
+        "type": 0,
+        "confidence_threshold": 0.85,
+        "examples": [
+            "sleep", "sleep computer", "put computer to sleep", "hibernate",
+            "sleep mode", "standby"
+        ],
+        "response": "Putting computer to sleep",
+        "handler": "commands.system_commands:SystemCommands.sleep",
+        "lane": "system",
+        "repeatable": False
+    },
+    # ========= DYNAMIC COMMANDS (type 1) =========
+    {
+        "intent": "set_volume",
+        "type": 1,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "volume to", "volume at", "set volume", "volume level"
+        ],
+        "response": "Setting volume",
+        "handler": "commands.media_commands:MediaCommands.set_volume",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "volume_up_by",
+        "type": 1,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "volume up by", "turn up volume by", "turn the volume up by", "turn volume up by",
+            "increase volume by", "increase the volume by", "raise volume by", "raise the volume by"
+        ],
+        "response": "Turning up volume",
+        "handler": "commands.media_commands:MediaCommands.volume_up_by",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "volume_down_by",
+        "type": 1,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "volume down by", "turn down volume by", "turn the volume down by", "turn volume down by",
+            "decrease volume by", "decrease the volume by", "lower volume by", "lower the volume by"
+        ],
+        "response": "Turning down volume",
+        "handler": "commands.media_commands:MediaCommands.volume_down_by",
+        "lane": "system",
+        "repeatable": True
+    },
+    {
+        "intent": "web_search",
+        "type": 1,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "search for", "google", "look up", "find information about",
+            "search the web for", "find", "look for", "search"
+        ],
+        "response": "Searching the web",
+        "handler": "commands.app_commands:AppCommands.web_search",
+        "lane": "process",
+        "repeatable": True
+    },
+    {
+        "intent": "write_text",
+        "type": 1,
+        "confidence_threshold": 0.7,
+        "examples": [
+            "write", "type", "write text", "type text", "write down",
+            "type this", "write this", "input text", "enter text"
+        ],
+        "response": "Writing text",
+        "handler": "commands.text_commands:TextCommands.write_text",
+        "lane": "keyboard",
+        "repeatable": True
+    },
+    {
+        "intent": "press_button",
+        "type": 1,
+        "confidence_threshold": 0.6,
+        "examples": [
+            "press", "hit", "push", "click", "press key", "hit key",
+            "push button", "click button", "press the", "hit the"
+        ],
+        "response": "Pressing button",
+        "handler": "commands.text_commands:TextCommands.press_button",
+        "lane": "keyboard",
+        "repeatable": True
+    }
+]
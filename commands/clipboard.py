@@ -0,0 +1,135 @@
+"""
+Clipboard - system clipboard backends
+
+Used by text injection to paste long text in one go instead of typing it
+character by character.
+"""
+
+import ctypes
+import shutil
+import subprocess
+import sys
+import threading
+from typing import List, Optional
+
+# Windows clipboard constants
+CF_UNICODETEXT = 13
+GMEM_MOVEABLE = 0x0002
+
+
+class ClipboardBackend:
+    """Interface to a clipboard holding text"""
+
+    def get_text(self) -> Optional[str]:
+        """Current clipboard text, None if empty or not text"""
+        raise NotImplementedError
+
+    def set_text(self, text: str):
+        """Replace the clipboard contents with text"""
+        raise NotImplementedError
+
+
+class CommandClipboard(ClipboardBackend):
+    """Clipboard driven by command-line tools (wl-clipboard, xclip, xsel, pbcopy)"""
+
+    def __init__(self, copy_command: List[str], paste_command: List[str], timeout: float = 2.0):
+        self.copy_command = copy_command
+        self.paste_command = paste_command
+        self.timeout = timeout
+
+    def get_text(self) -> Optional[str]:
+        result = subprocess.run(self.paste_command, capture_output=True, timeout=self.timeout)
+        if result.returncode != 0:
+            return None  # Empty clipboard or non-text contents
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def set_text(self, text: str):
+        subprocess.run(self.copy_command, input=text.encode("utf-8"), timeout=self.timeout, check=True)
+
+
+class Win32Clipboard(ClipboardBackend):
+    """Windows clipboard through user32/kernel32"""
+
+    def __init__(self):
+        self._user32 = None
+        self._kernel32 = None
+
+    def _load(self):
+        if self._user32 is None:
+            from ctypes import wintypes
+            self._user32 = ctypes.windll.user32
+            self._kernel32 = ctypes.windll.kernel32
+            self._kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+            self._kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+            self._kernel32.GlobalLock.restype = wintypes.LPVOID
+            self._kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+            self._user32.GetClipboardData.restype = wintypes.HANDLE
+            self._user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+        return self._user32, self._kernel32
+
+    def get_text(self) -> Optional[str]:
+        user32, kernel32 = self._load()
+        if not user32.OpenClipboard(None):
+            raise OSError("Could not open clipboard")
+        try:
+            handle = user32.GetClipboardData(CF_UNICODETEXT)
+            if not handle:
+                return None
+            pointer = kernel32.GlobalLock(handle)
+            try:
+                return ctypes.wstring_at(pointer)
+            finally:
+                kernel32.GlobalUnlock(handle)
+        finally:
+            user32.CloseClipboard()
+
+    def set_text(self, text: str):
+        user32, kernel32 = self._load()
+        data = ctypes.create_unicode_buffer(text)
+        size = ctypes.sizeof(data)
+
+        if not user32.OpenClipboard(None):
+            raise OSError("Could not open clipboard")
+        try:
+            user32.EmptyClipboard()
+            handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, size)
+            pointer = kernel32.GlobalLock(handle)
+            ctypes.memmove(pointer, data, size)
+            kernel32.GlobalUnlock(handle)
+            # The clipboard owns the memory once SetClipboardData succeeds
+            if not user32.SetClipboardData(CF_UNICODETEXT, handle):
+                raise OSError("Could not set clipboard data")
+        finally:
+            user32.CloseClipboard()
+
+
+class MemoryClipboard(ClipboardBackend):
+    """In-memory clipboard for tests"""
+
+    def __init__(self, text: Optional[str] = None):
+        self.text = text
+        self.history = []  # Every value set, in order
+        self._lock = threading.Lock()
+
+    def get_text(self) -> Optional[str]:
+        return self.text
+
+    def set_text(self, text: str):
+        with self._lock:
+            self.text = text
+            self.history.append(text)
+
+
+def create_clipboard() -> Optional[ClipboardBackend]:
+    """Clipboard backend for this platform, None if no clipboard tool is available"""
+    if sys.platform == "win32":
+        return Win32Clipboard()
+    if sys.platform == "darwin":
+        return CommandClipboard(["pbcopy"], ["pbpaste"])
+    if shutil.which("wl-copy") and shutil.which("wl-paste"):
+        return CommandClipboard(["wl-copy"], ["wl-paste", "--no-newline"])
+    if shutil.which("xclip"):
+        return CommandClipboard(["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"])
+    if shutil.which("xsel"):
+        return CommandClipboard(["xsel", "--clipboard", "--input"], ["xsel", "--clipboard", "--output"])
+    return None
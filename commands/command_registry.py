@@ -2,13 +2,18 @@
 Command Registry - Central registry for all available commands
 """
 
+import inspect
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Callable, Optional
 
-from .media_commands import MediaCommands
-from .system_commands import SystemCommands
-from .app_commands import AppCommands
-from .text_commands import TextCommands
+from core.execution_lanes import KEYBOARD_LANE, PROCESS_LANE, SYSTEM_LANE
+from flight_recorder import recorder
+from utils import SafetyChecker
+from .compound_executor import CompoundExecutor
+from .handler_supervisor import HandlerSupervisor, DEFAULT_TIMEOUT
+from .keyboard import KeyboardBackend, create_keyboard
+from .manifest import CompiledCommands, get_compiled_commands, import_handler_target
 
 # Set up logging for debugging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,95 +23,196 @@ logger = logging.getLogger(__name__)
 class CommandRegistry:
     """Registry for all available commands"""
 
-    def __init__(self):
-        # Initialize command handlers
-        self.media = MediaCommands()
-        self.system = SystemCommands()
-        self.apps = AppCommands()
-        self.text = TextCommands()
-
-        # Map command names to their handlers
-        self.command_map = {
-            # Media commands
-            "play_pause": self.media.play_pause,
-            "youtube_music_play_pause": self.media.youtube_music_play_pause,
-            "youtube_play_pause": self.media.youtube_play_pause,
-            "music_play_pause": self.media.music_play_pause,
-            "stremio_fullscreen": self.media.stremio_fullscreen,
-            "next_song": self.media.next_song,
-            "previous_song": self.media.previous_song,
-            "volume_up": self.media.volume_up,
-            "volume_down": self.media.volume_down,
-            "mute": self.media.mute,
-
-            # System commands
-            "shutdown": self.system.shutdown,
-            "restart": self.system.restart,
-            "sleep": self.system.sleep,
-            "get_time": self.system.get_time,
-
-            # App commands
-            "open_stremio": self.apps.open_stremio,
-            "open_notepad": self.apps.open_notepad,
-            "open_calculator": self.apps.open_calculator,
-            "web_search": self.apps.web_search,
-
-            # Text commands
-            "write_text": self.text.write_text,
-            "press_button": self.text.press_button,
-        }
-
-    def execute_command(self, intent: str, params: Dict[str, Any] = None, log_intent: bool = True) -> bool:
+    def __init__(self, compiled: Optional[CompiledCommands] = None, handler_timeout: float = DEFAULT_TIMEOUT,
+                 keyboard: Optional[KeyboardBackend] = None):
+        # Dispatch table compiled from the command manifests
+        self.compiled = compiled or get_compiled_commands()
+        self.dispatch = self.compiled.dispatch
+
+        # Handlers are resolved (and their modules imported) on first dispatch
+        self.command_map = {}
+        self._handler_instances = {}  # Handler class -> shared instance
+        self._resolve_lock = threading.Lock()
+
+        # One key synthesis backend (device, lock) shared by every handler that types,
+        # so chords from different handlers never interleave. Created on first use.
+        self._keyboard = keyboard
+        self._keyboard_lock = threading.Lock()
+
+        # Commands declared non-repeatable share one safety cooldown
+        self.safety_checker = SafetyChecker(self.compiled.non_repeatable)
+
+        # Runs independent steps of compound commands concurrently
+        self.compound_executor = CompoundExecutor(self)
+
+        # Times every dispatch and abandons handlers that outlive their timeout.
+        # A manifest "timeout" field overrides the default per command (0 = no limit).
+        self.supervisor = HandlerSupervisor(handler_timeout)
+
+    def get_keyboard(self) -> KeyboardBackend:
+        """The keyboard backend shared by all handlers"""
+        with self._keyboard_lock:
+            if self._keyboard is None:
+                self._keyboard = create_keyboard()
+            return self._keyboard
+
+    def register_handler_instance(self, instance):
+        """Use instance for every intent handled by a method of its class (e.g. one built with fake backends).
+        Must be called before those intents are first dispatched."""
+        with self._resolve_lock:
+            self._handler_instances[type(instance)] = instance
+
+    def get_handler(self, intent: str) -> Callable[[Dict[str, Any]], bool]:
+        """Handler for an intent, importing its module the first time"""
+        handler = self.command_map.get(intent)
+        if handler is not None:
+            return handler
+
+        with self._resolve_lock:
+            if intent not in self.command_map:
+                module, attrs = import_handler_target(self.dispatch[intent].handler_path)
+                target = getattr(module, attrs[0])
+                if isinstance(target, type) and len(attrs) > 1:
+                    # "Class.method" - all of a class's intents share one instance
+                    if target not in self._handler_instances:
+                        self._handler_instances[target] = self._create_handler_instance(target)
+                    target = self._handler_instances[target]
+                for attr in attrs[1:]:
+                    target = getattr(target, attr)
+                self.command_map[intent] = target
+                recorder.info("registry", "Loaded handler for '%s'", intent)
+            return self.command_map[intent]
+
+    def _create_handler_instance(self, handler_class):
+        """Instantiate a handler class, handing the shared keyboard to those that take one"""
+        if "keyboard" in inspect.signature(handler_class).parameters:
+            return handler_class(keyboard=self.get_keyboard())
+        return handler_class()
+
+    def prefetch(self) -> int:
+        """Load every handler and let those with a prefetch() method prepare for the next command.
+        Returns how many handlers prepared something."""
+        for intent in self.dispatch:
+            if intent not in self.command_map:
+                try:
+                    self.get_handler(intent)
+                except Exception as e:
+                    recorder.warning("registry", "Could not load handler for '%s': %s", intent, e)
+
+        with self._resolve_lock:
+            instances = list(self._handler_instances.values())
+        prepared = 0
+        for instance in instances:
+            prefetch = getattr(instance, "prefetch", None)
+            if prefetch and prefetch():
+                prepared += 1
+        return prepared
+
+    def get_prefetch_stats(self) -> Dict[str, Any]:
+        """Hit counters of handlers that report them, by handler class"""
+        with self._resolve_lock:
+            instances = list(self._handler_instances.values())
+        return {type(instance).__name__: instance.get_prefetch_stats()
+                for instance in instances if hasattr(instance, "get_prefetch_stats")}
+
+    def execute_command(self, intent: str, params: Dict[str, Any] = None, log_intent: bool = True,
+                        trace=None) -> bool:
         """
         Execute a command or compound commands by name.
         Supports compound commands returned by the AI model.
         Cleans up dynamic parameters like 'content' before passing them to handlers.
         log_intent: If False, suppress logging the top-level intent to avoid duplicate logs.
+        trace: Optional latency trace - marks the end of lane wait and of the handler.
         """
+        if trace:
+            trace.mark("lane_wait")
+            try:
+                return self.execute_command(intent, params, log_intent)
+            finally:
+                trace.set("intent", intent)
+                trace.mark("handler")
+
         # 1. Handle compound commands
         if intent == "compound_command":
             if params and isinstance(params.get("commands"), list):
-                logger.info(f"Executing compound command sequence ({len(params['commands'])} commands)")
-                all_success = True
-                for sub_cmd in params["commands"]:
-                    sub_intent = sub_cmd.get("intent")
-                    sub_params = sub_cmd.get("parameters", {}) or {}
-                    sub_confidence = sub_cmd.get("confidence")
-                    sub_threshold = sub_cmd.get("threshold")
-
-                    if isinstance(sub_params, dict) and "content" in sub_params:
-                        sub_params["content"] = sub_params["content"].strip()
-
-                    logger.info(
-                        f"Executing sub-intent '{sub_intent}' (confidence={sub_confidence:.2f}, threshold={sub_threshold:.2f})"
-                    )
-                    success = self.execute_command(sub_intent, sub_params, log_intent=False)
-                    all_success = all_success and success
-                return all_success
+                recorder.info("registry", "Executing compound command sequence (%d commands)", len(params['commands']))
+                success = self._execute_steps(params)
+                self.supervisor.observe(intent, params["result"]["wall_time"], not success)
+                return success
             else:
                 logger.warning("Compound command intent received, but no subcommands found!")
                 return False
 
         # 2. Handle single commands
-        if intent not in self.command_map:
-            logger.error(f"Unknown command: {intent}")
-            return False
-
         try:
-            handler = self.command_map[intent]
-
-            if params and isinstance(params, dict) and "content" in params:
-                params["content"] = params["content"].strip()
-
-            # Log the top-level intent execution only if log_intent is True
-            if log_intent:
-                logger.info(f"Executing intent '{intent}' with params={params}")
-
-            return handler(params)
+            job = self.submit_command(intent, params, log_intent)
+            return job is not None and self.supervisor.wait(job)
         except Exception as e:
-            logger.exception(f"Command execution error for '{intent}': {e}")
+            logger.exception("Command execution error for '%s': %s", intent, e)
             return False
 
+    def submit_command(self, intent: str, params: Dict[str, Any] = None, log_intent: bool = True):
+        """Start a command's handler on the supervisor without waiting for it.
+        Returns the supervisor job (see HandlerSupervisor.wait), or None if the command must not run."""
+        if intent == "compound_command":
+            # Nested sequence - its own steps are supervised, so no limit on the whole
+            return self.supervisor.submit(intent, self._execute_steps, params, timeout=0)
+
+        if intent not in self.dispatch:
+            logger.error("Unknown command: %s", intent)
+            return None
+
+        if not self.dispatch[intent].repeatable and not self.safety_checker.check_dangerous_command_safety(intent):
+            return None
+
+        if self.dispatch[intent].lane == KEYBOARD_LANE:
+            # A timed-out keyboard handler may still be sending keys - new keys would interleave with its
+            stuck = [other for other in self.supervisor.stuck_intents() if self.get_command_lane(other) == KEYBOARD_LANE]
+            if stuck:
+                recorder.warning("registry", "Refusing '%s' - abandoned keyboard handler '%s' is still running",
+                                 intent, stuck[0])
+                return None
+
+        handler = self.get_handler(intent)
+
+        if params and isinstance(params, dict) and "content" in params:
+            params["content"] = params["content"].strip()
+
+        # Log the top-level intent execution only if log_intent is True
+        if log_intent:
+            # repr now - the recorder formats at dump time and handlers may change params meanwhile
+            recorder.info("registry", "Executing intent '%s' with params=%s", intent, repr(params))
+
+        return self.supervisor.submit(intent, handler, params, timeout=self.get_timeout(intent))
+
+    def _execute_steps(self, params: Dict[str, Any]) -> bool:
+        """Run a compound command's steps, leaving the per-step report in params["result"]"""
+        result = self.compound_executor.execute(params["commands"], policy=params.get("policy"))
+        params["result"] = result
+        return result["success"]
+
+    def get_timeout(self, intent: str) -> float:
+        """Seconds a command's handler may run before it is abandoned (0 = no limit)"""
+        entry = self.dispatch.get(intent)
+        timeout = entry.options.get("timeout") if entry else None
+        return self.supervisor.default_timeout if timeout is None else float(timeout)
+
+    def get_handler_stats(self) -> Dict[str, Any]:
+        """Per-intent dispatch times, failures and timeouts, plus recent slow handlers"""
+        return self.supervisor.get_stats()
+
+    def get_command_lane(self, intent: str, params: Dict[str, Any] = None) -> str:
+        """Get the execution lane a command should run on"""
+        if intent == "compound_command":
+            # A sequence that touches the keyboard must stay on the serialized lane
+            sub_commands = (params or {}).get("commands") or []
+            sub_lanes = {self.get_command_lane(sub.get("intent"), sub.get("parameters")) for sub in sub_commands}
+            if KEYBOARD_LANE in sub_lanes:
+                return KEYBOARD_LANE
+            return PROCESS_LANE if sub_lanes == {PROCESS_LANE} else SYSTEM_LANE
+        entry = self.dispatch.get(intent)
+        return entry.lane if entry else SYSTEM_LANE
+
     def get_available_commands(self) -> list:
         """Get list of all available commands"""
-        return list(self.command_map.keys())
\ No newline at end of file
+        return list(self.dispatch.keys())
\ No newline at end of file
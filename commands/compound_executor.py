@@ -0,0 +1,152 @@
+"""
+Compound Executor - run the steps of a compound command concurrently where safe
+
+Steps are ordered by a small dependency graph built from their execution lanes:
+    keyboard - needs focus: waits for every earlier step (a launch may move focus)
+    process  - launches an app: waits for earlier keyboard steps so it cannot
+               steal focus while they type
+    system   - independent: runs immediately
+Each step is submitted to the registry's handler supervisor, so it runs on a
+supervised worker under its command's own timeout; a step that overruns is
+abandoned instead of holding up the rest of the sequence.
+"""
+
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional
+
+from core.execution_lanes import KEYBOARD_LANE, PROCESS_LANE
+from flight_recorder import recorder
+
+STOP_ON_FAILURE = "stop_on_failure"
+BEST_EFFORT = "best_effort"
+POLICIES = (STOP_ON_FAILURE, BEST_EFFORT)
+
+
+class CompoundStep:
+    """One sub-command and the steps it has to wait for"""
+
+    def __init__(self, index: int, intent: str, params: Dict[str, Any], lane: str):
+        self.index = index
+        self.intent = intent
+        self.params = params
+        self.lane = lane
+        self.depends_on = []
+        self.status = "pending"  # pending, running, ok, failed, timeout, skipped
+        self.started = None
+        self.elapsed = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "lane": self.lane,
+            "status": self.status,
+            "time": self.elapsed,
+            "depends_on": list(self.depends_on),
+        }
+
+
+class CompoundExecutor:
+    """Executes compound commands through a registry, respecting ordering constraints"""
+
+    def __init__(self, registry, policy: str = STOP_ON_FAILURE):
+        self.registry = registry
+        self.policy = policy
+
+    def build_graph(self, commands: List[Dict[str, Any]]) -> List[CompoundStep]:
+        """Create steps and their dependencies from the sub-commands"""
+        steps = []
+        for index, command in enumerate(commands):
+            intent = command.get("intent")
+            params = command.get("parameters", {}) or {}
+            if isinstance(params, dict) and isinstance(params.get("content"), str):
+                params["content"] = params["content"].strip()
+
+            step = CompoundStep(index, intent, params, self.registry.get_command_lane(intent, params))
+            if step.lane == KEYBOARD_LANE:
+                step.depends_on = [s.index for s in steps]
+            elif step.lane == PROCESS_LANE:
+                step.depends_on = [s.index for s in steps if s.lane == KEYBOARD_LANE]
+            steps.append(step)
+        return steps
+
+    def execute(self, commands: List[Dict[str, Any]], policy: Optional[str] = None) -> Dict[str, Any]:
+        """Run the compound command - returns success, timings and per-step results"""
+        policy = policy if policy in POLICIES else self.policy
+        steps = self.build_graph(commands)
+
+        started = time.perf_counter()
+        pending = list(steps)
+        running = {}  # Supervisor job future -> (step, job)
+
+        while pending or running:
+            stop = policy == STOP_ON_FAILURE and any(s.status in ("failed", "timeout") for s in steps)
+            if not stop:
+                # Start every step whose dependencies have finished
+                for step in list(pending):
+                    dependencies = [steps[i] for i in step.depends_on]
+                    if any(d.status in ("pending", "running") for d in dependencies):
+                        continue
+                    pending.remove(step)
+                    if policy == STOP_ON_FAILURE and any(d.status != "ok" for d in dependencies):
+                        step.status = "skipped"
+                        continue
+                    job = self._start(step)
+                    if job is not None:
+                        running[job.future] = (step, job)
+            else:
+                for step in pending:
+                    step.status = "skipped"
+                pending = []
+
+            if not running:
+                continue
+
+            # Wait for the next step to finish or the earliest deadline
+            deadlines = [job.deadline for _, job in running.values() if job.deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            now = time.perf_counter()
+            for future, (step, job) in list(running.items()):
+                if future in done or (job.deadline is not None and now >= job.deadline):
+                    del running[future]
+                    self._finish(step, job)
+
+        wall_time = time.perf_counter() - started
+        step_time = sum(s.elapsed for s in steps)
+        success = all(s.status == "ok" for s in steps)
+        recorder.info("compound", "Compound command: %d steps, wall %.3fs vs %.3fs sequential (%s)",
+                      len(steps), wall_time, step_time, "ok" if success else "failed")
+        return {
+            "success": success,
+            "policy": policy,
+            "wall_time": wall_time,
+            "step_time_sum": step_time,
+            "steps": [s.to_dict() for s in steps],
+        }
+
+    def _start(self, step: CompoundStep):
+        """Submit one step to the supervisor - None (and the step failed) if it could not start"""
+        step.status = "running"
+        step.started = time.perf_counter()
+        recorder.info("compound", "Executing sub-intent '%s' on %s lane", step.intent, step.lane)
+        try:
+            job = self.registry.submit_command(step.intent, step.params, log_intent=False)
+        except Exception as e:
+            recorder.warning("compound", "Step '%s' could not start: %s", step.intent, e)
+            job = None
+        if job is None:
+            step.status = "failed"
+            step.elapsed = time.perf_counter() - step.started
+        return job
+
+    def _finish(self, step: CompoundStep, job):
+        """Collect a finished step, or abandon it once its deadline has passed"""
+        try:
+            ok = self.registry.supervisor.wait(job)
+        except Exception as e:
+            recorder.warning("compound", "Step '%s' failed: %s", step.intent, e)
+            ok = False
+        step.elapsed = time.perf_counter() - step.started
+        step.status = "timeout" if job.abandoned else ("ok" if ok else "failed")
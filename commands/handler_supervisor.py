@@ -0,0 +1,230 @@
+"""
+Handler supervisor - time every dispatch and stop waiting for hung handlers
+
+Handlers run on supervised worker threads. The caller waits up to the
+command's timeout; a handler that overruns is abandoned - its thread is
+written off and a fresh worker takes its place, so a hung subprocess or a
+stuck window call costs one thread instead of the whole assistant. An
+abandoned handler that eventually returns is logged and its thread exits.
+
+run() submits and waits in one call; submit() and wait() are separate for
+callers that keep several handlers in flight (compound commands).
+
+Every dispatch feeds running per-intent stats (count, failures, timeouts,
+p50/p99), and slow or abandoned handlers are kept as recent events.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, List, Optional
+
+from flight_recorder import recorder
+
+DEFAULT_TIMEOUT = 15.0  # Seconds before a handler is abandoned
+SLOW_AFTER = 2.0        # Seconds after which a finished handler is reported as slow
+WORKER_IDLE_EXIT = 60.0  # Spare workers exit after this long without work
+
+
+class IntentStats:
+    """Running dispatch statistics for one intent"""
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.recent = deque(maxlen=window)  # Durations for percentiles
+
+    def observe(self, elapsed: float, failed: bool, timed_out: bool):
+        self.count += 1
+        self.failures += failed
+        self.timeouts += timed_out
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.recent.append(elapsed)
+
+    def percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg": self.total_time / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max_time,
+        }
+
+
+class _Job:
+    """One handler call - abandoned once the caller has stopped waiting for it"""
+
+    __slots__ = ("intent", "func", "args", "timeout", "future", "submitted", "started", "abandoned")
+
+    def __init__(self, intent: str, func: Callable, args: tuple, timeout: float):
+        self.intent = intent
+        self.func = func
+        self.args = args
+        self.timeout = timeout  # Seconds from submission, 0 = no limit
+        self.future = Future()
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.abandoned = False
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """perf_counter time at which the job is abandoned, None without a limit"""
+        return self.submitted + self.timeout if self.timeout else None
+
+
+class HandlerSupervisor:
+    """Runs handlers on replaceable worker threads with a per-call timeout"""
+
+    def __init__(self, default_timeout: float = DEFAULT_TIMEOUT, slow_after: float = SLOW_AFTER,
+                 max_events: int = 50):
+        self.default_timeout = default_timeout
+        self.slow_after = slow_after
+        self.intent_stats = {}  # Intent -> IntentStats
+        self.events = deque(maxlen=max_events)  # Recent slow, abandoned and late handlers
+        self.counters = {"abandoned": 0, "late_finished": 0}
+        self._jobs = queue.Queue()
+        self._idle = 0      # Workers waiting for a job
+        self._workers = 0   # Live workers in the pool
+        self._running = {}  # Worker thread name -> job it is running
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def run(self, intent: str, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Run func(*args) on a worker and wait at most timeout seconds (0 = no limit).
+        Returns the handler's result, or False when it was abandoned."""
+        return self.wait(self.submit(intent, func, *args, timeout=timeout))
+
+    def submit(self, intent: str, func: Callable, *args, timeout: Optional[float] = None) -> _Job:
+        """Queue func(*args) on a worker without waiting - the timeout counts from now"""
+        job = _Job(intent, func, args, self.default_timeout if timeout is None else timeout)
+        with self._lock:
+            spawn = self._idle == 0
+            if spawn:
+                self._workers += 1
+            else:
+                self._idle -= 1  # Claimed - the next caller must not count on this worker
+        if spawn:
+            self._spawn()
+        self._jobs.put(job)
+        return job
+
+    def wait(self, job: _Job) -> Any:
+        """Wait for a submitted job until its deadline - the handler's result, or False once abandoned.
+        Called once per job; past the deadline it abandons the job without blocking."""
+        deadline = job.deadline
+        try:
+            try:
+                result = job.future.result(
+                    timeout=None if deadline is None else max(0.0, deadline - time.perf_counter()))
+            except FutureTimeout:
+                if self._abandon(job, time.perf_counter() - job.submitted):
+                    return False
+                result = job.future.result()  # Finished just as the wait ran out
+        except Exception:
+            self._observe(job.intent, time.perf_counter() - job.submitted, failed=True)
+            raise
+        self._observe(job.intent, time.perf_counter() - job.submitted, failed=result is False)
+        return result
+
+    def _spawn(self):
+        name = f"handler-{next(self._ids)}"
+        threading.Thread(target=self._worker, name=name, daemon=True).start()
+
+    def _worker(self):
+        """Run jobs until idle for too long or until a job is abandoned"""
+        while True:
+            try:
+                job = self._jobs.get(timeout=WORKER_IDLE_EXIT)
+            except queue.Empty:
+                with self._lock:
+                    if self._idle == 0:
+                        continue  # Claimed by a caller whose job is on its way
+                    self._idle -= 1
+                    self._workers -= 1
+                return
+
+            job.started = time.perf_counter()
+            with self._lock:
+                self._running[threading.current_thread().name] = job
+            try:
+                job.future.set_result(job.func(*job.args))
+            except BaseException as e:
+                job.future.set_exception(e)
+
+            with self._lock:
+                del self._running[threading.current_thread().name]
+                if not job.abandoned:
+                    self._idle += 1
+                    continue
+            # The caller gave up and a replacement took this worker's place
+            elapsed = time.perf_counter() - job.started
+            with self._lock:
+                self.counters["late_finished"] += 1
+            self._event(job.intent, "late", elapsed)
+            recorder.warning("supervisor", "Abandoned handler '%s' finished after %.1fs", job.intent, elapsed)
+            return
+
+    def _abandon(self, job: _Job, elapsed: float) -> bool:
+        """Give up on a job - False if it finished after all"""
+        with self._lock:
+            if job.future.done():
+                return False
+            job.abandoned = True
+            self.counters["abandoned"] += 1
+            self._workers -= 1  # The next dispatch starts a replacement
+        self._observe(job.intent, elapsed, failed=True, timed_out=True)
+        self._event(job.intent, "timeout", elapsed)
+        recorder.warning("supervisor", "Handler '%s' timed out after %.1fs - abandoned and replaced",
+                         job.intent, job.timeout)
+        return True
+
+    def _observe(self, intent: str, elapsed: float, failed: bool, timed_out: bool = False):
+        with self._lock:
+            stats = self.intent_stats.get(intent)
+            if stats is None:
+                stats = self.intent_stats[intent] = IntentStats()
+            stats.observe(elapsed, failed, timed_out)
+        if not timed_out and elapsed >= self.slow_after:
+            self._event(intent, "slow", elapsed)
+            recorder.warning("supervisor", "Handler '%s' was slow: %.1fs", intent, elapsed)
+
+    def _event(self, intent: str, kind: str, elapsed: float):
+        self.events.append({"time": time.time(), "intent": intent, "kind": kind, "elapsed": elapsed})
+
+    def stuck_intents(self) -> set:
+        """Intents of abandoned handlers whose threads are still running"""
+        with self._lock:
+            return {job.intent for job in self._running.values() if job.abandoned}
+
+    def observe(self, intent: str, elapsed: float, failed: bool):
+        """Record a dispatch that did not run on a worker (compound commands, unlimited handlers)"""
+        self._observe(intent, elapsed, failed)
+
+    def get_recent_events(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return list(self.events)[-limit:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            intents = {intent: stats.to_dict() for intent, stats in self.intent_stats.items()}
+            stuck = [{"intent": job.intent, "running_for": time.perf_counter() - job.started}
+                     for job in self._running.values() if job.abandoned]
+            stats = dict(self.counters)
+            stats.update(workers=self._workers, idle_workers=self._idle)
+        stats.update(default_timeout=self.default_timeout, slow_after=self.slow_after,
+                     intents=intents, stuck=stuck, events=self.get_recent_events())
+        return stats
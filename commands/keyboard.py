@@ -0,0 +1,428 @@
+"""
+Keyboard - batched key event synthesis
+
+Key output is described as a KeySequence (taps, repeats, chords, text and
+explicit pauses) and handed to a backend in one call. Consecutive key events
+between pauses are sent as a single batch - one write() for uinput, one
+XFlush for XTest - so a repeated key or a hotkey costs microseconds instead
+of pyautogui's default 100 ms pause per call.
+
+Key names follow the pyautogui convention used by normalize_key_name
+("ctrl", "enter", "playpause", "volumeup", ...).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from flight_recorder import recorder
+from utils import lazy_import
+
+pyautogui = lazy_import("pyautogui")
+
+# Action kinds in a KeySequence
+KEY_DOWN = "down"
+KEY_UP = "up"
+PAUSE = "pause"
+
+# Characters that need shift on a US layout, mapped to their unshifted key
+SHIFTED_CHARS = {
+    "!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8", "(": "9", ")": "0",
+    "_": "-", "+": "=", "{": "[", "}": "]", "|": "\\", ":": ";", '"': "'", "~": "`", "<": ",", ">": ".",
+    "?": "/",
+}
+CHAR_KEYS = {" ": "space", "\n": "enter", "\t": "tab"}
+
+
+class KeySequence:
+    """A batch of key actions, built with chained calls:
+
+        KeySequence().hotkey("ctrl", "v")
+        KeySequence().pause(0.2).press("space")
+        KeySequence().press("volumeup", repeat=5)
+    """
+
+    def __init__(self):
+        self.actions = []  # (kind, key or seconds)
+
+    def press(self, key: str, repeat: int = 1) -> "KeySequence":
+        """Tap a key, optionally several times"""
+        for _ in range(max(0, repeat)):
+            self.actions.append((KEY_DOWN, key))
+            self.actions.append((KEY_UP, key))
+        return self
+
+    def hotkey(self, *keys: str) -> "KeySequence":
+        """Hold keys down in order, release them in reverse"""
+        for key in keys:
+            self.actions.append((KEY_DOWN, key))
+        for key in reversed(keys):
+            self.actions.append((KEY_UP, key))
+        return self
+
+    def combo(self, combo: str) -> "KeySequence":
+        """A single key or a "ctrl+c" style chord"""
+        keys = [key for key in combo.split("+") if key]
+        return self.hotkey(*keys) if len(keys) > 1 else self.press(keys[0])
+
+    def write(self, text: str) -> "KeySequence":
+        """Type text character by character (US layout)"""
+        for char in text:
+            if char in CHAR_KEYS:
+                self.press(CHAR_KEYS[char])
+            elif char in SHIFTED_CHARS:
+                self.hotkey("shift", SHIFTED_CHARS[char])
+            elif char.isupper():
+                self.hotkey("shift", char.lower())
+            else:
+                self.press(char)
+        return self
+
+    def pause(self, seconds: float) -> "KeySequence":
+        """Wait before the following actions"""
+        if seconds > 0:
+            self.actions.append((PAUSE, seconds))
+        return self
+
+    def batches(self) -> List[Any]:
+        """Split into runs of key events and the pauses between them"""
+        result = []
+        events = []
+        for kind, value in self.actions:
+            if kind == PAUSE:
+                if events:
+                    result.append(events)
+                    events = []
+                result.append(value)
+            else:
+                events.append((kind == KEY_DOWN, value))
+        if events:
+            result.append(events)
+        return result
+
+    def __len__(self) -> int:
+        return sum(1 for kind, _ in self.actions if kind != PAUSE)
+
+
+class KeyboardBackend:
+    """Sends key sequences - subclasses implement _send_events for one batch"""
+
+    def __init__(self, key_delay: float = 0.0):
+        self.key_delay = key_delay  # Optional gap between events, for apps that drop fast input
+        self._lock = threading.Lock()
+        self.stats = {"sequences": 0, "events": 0, "batches": 0, "time": 0.0}
+
+    def send(self, sequence: KeySequence):
+        """Send a whole sequence - raises before sending anything if a key is unknown to the backend"""
+        started = time.perf_counter()
+        batches = sequence.batches()
+        with self._lock:
+            unknown = sorted({key for kind, key in sequence.actions if kind != PAUSE and not self.supports(key)})
+            if unknown:
+                raise ValueError(f"Unknown key: {', '.join(unknown)}")
+
+            held = []  # Keys pressed and not yet released - let go if sending fails partway
+            try:
+                for batch in batches:
+                    if not isinstance(batch, list):
+                        time.sleep(batch)
+                        continue
+                    for events in ([[event] for event in batch] if self.key_delay else [batch]):
+                        for is_down, key in events:
+                            if is_down:
+                                held.append(key)
+                            elif key in held:
+                                held.remove(key)
+                        self._send_events(events)
+                        if self.key_delay:
+                            time.sleep(self.key_delay)
+            finally:
+                if held:
+                    self._release(held)
+
+            elapsed = time.perf_counter() - started
+            self.stats["sequences"] += 1
+            self.stats["events"] += len(sequence)
+            self.stats["batches"] += sum(1 for batch in batches if isinstance(batch, list))
+            self.stats["time"] += elapsed
+        recorder.debug("keyboard", "Sent %d key events in %.2f ms", len(sequence), elapsed * 1000)
+
+    def _release(self, keys: List[str]):
+        """Key-ups for keys a failed sequence left down - a stuck Ctrl or Shift affects every app"""
+        try:
+            self._send_events([(False, key) for key in reversed(keys)])
+        except Exception as e:
+            recorder.error("keyboard", "Could not release %s: %s", ", ".join(keys), e)
+
+    def press(self, key: str, repeat: int = 1):
+        self.send(KeySequence().press(key, repeat))
+
+    def hotkey(self, *keys: str):
+        self.send(KeySequence().hotkey(*keys))
+
+    def write(self, text: str):
+        self.send(KeySequence().write(text))
+
+    def supports(self, key: str) -> bool:
+        """Whether the backend can produce this key"""
+        return True
+
+    def prime(self) -> bool:
+        """Open the device ahead of the first key - True if there was anything to open"""
+        return False
+
+    def _send_events(self, events: List[Tuple[bool, str]]):
+        """Send (is_down, key) events as one batch"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sequences and events sent, and mean time per sequence"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_sequence_time"] = stats["time"] / stats["sequences"] if stats["sequences"] else 0.0
+        return stats
+
+
+# ---- Linux uinput ----
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+SYN_REPORT = 0
+BUS_USB = 0x03
+
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_DEV_SETUP = 0x405C5503
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+
+INPUT_EVENT = struct.Struct("llHHi")
+
+# Linux input event codes (linux/input-event-codes.h)
+LINUX_KEY_CODES = {
+    "esc": 1, "1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 8, "8": 9, "9": 10, "0": 11,
+    "-": 12, "=": 13, "backspace": 14, "tab": 15,
+    "q": 16, "w": 17, "e": 18, "r": 19, "t": 20, "y": 21, "u": 22, "i": 23, "o": 24, "p": 25,
+    "[": 26, "]": 27, "enter": 28, "ctrl": 29, "ctrlleft": 29,
+    "a": 30, "s": 31, "d": 32, "f": 33, "g": 34, "h": 35, "j": 36, "k": 37, "l": 38,
+    ";": 39, "'": 40, "`": 41, "shift": 42, "shiftleft": 42, "\\": 43,
+    "z": 44, "x": 45, "c": 46, "v": 47, "b": 48, "n": 49, "m": 50, ",": 51, ".": 52, "/": 53,
+    "shiftright": 54, "alt": 56, "altleft": 56, "space": 57, "capslock": 58,
+    "f1": 59, "f2": 60, "f3": 61, "f4": 62, "f5": 63, "f6": 64, "f7": 65, "f8": 66, "f9": 67, "f10": 68,
+    "numlock": 69, "scrolllock": 70, "f11": 87, "f12": 88,
+    "ctrlright": 97, "printscreen": 99, "altright": 100, "home": 102, "up": 103, "pageup": 104,
+    "left": 105, "right": 106, "end": 107, "down": 108, "pagedown": 109, "insert": 110, "delete": 111,
+    "volumemute": 113, "volumedown": 114, "volumeup": 115, "pause": 119,
+    "win": 125, "winleft": 125, "command": 125, "winright": 126,
+    "nexttrack": 163, "playpause": 164, "prevtrack": 165, "stop": 166,
+}
+
+
+class UinputKeyboard(KeyboardBackend):
+    """Virtual keyboard through /dev/uinput - works under X11, Wayland and the console.
+    A batch is written with a single write() call."""
+
+    DEVICE_NAME = b"voice-assistant-keyboard"
+
+    def __init__(self, path: str = "/dev/uinput", key_delay: float = 0.0):
+        super().__init__(key_delay)
+        self.path = path
+        self._fd = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            import fcntl
+            fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            try:
+                fcntl.ioctl(fd, UI_SET_EVBIT, EV_KEY)
+                for code in set(LINUX_KEY_CODES.values()):
+                    fcntl.ioctl(fd, UI_SET_KEYBIT, code)
+                # struct uinput_setup: input_id, name[80], ff_effects_max
+                setup = struct.pack("HHHH80sI", BUS_USB, 0x1, 0x1, 1, self.DEVICE_NAME, 0)
+                fcntl.ioctl(fd, UI_DEV_SETUP, setup)
+                fcntl.ioctl(fd, UI_DEV_CREATE)
+            except OSError:
+                os.close(fd)
+                raise
+            self._fd = fd
+            # The desktop needs a moment to pick up a new input device
+            time.sleep(0.2)
+        return self._fd
+
+    def supports(self, key: str) -> bool:
+        return key.lower() in LINUX_KEY_CODES
+
+    def prime(self) -> bool:
+        with self._lock:
+            if self._fd is not None:
+                return False
+            self._open()  # Includes the settle delay the first key would otherwise wait for
+            return True
+
+    def _send_events(self, events: List[Tuple[bool, str]]):
+        fd = self._open()
+        payload = bytearray()
+        for is_down, key in events:
+            code = LINUX_KEY_CODES.get(key.lower())
+            if code is None:
+                raise ValueError(f"Unknown key: {key}")
+            payload += INPUT_EVENT.pack(0, 0, EV_KEY, code, 1 if is_down else 0)
+            payload += INPUT_EVENT.pack(0, 0, EV_SYN, SYN_REPORT, 0)
+        os.write(fd, bytes(payload))
+
+    def close(self):
+        if self._fd is not None:
+            import fcntl
+            try:
+                fcntl.ioctl(self._fd, UI_DEV_DESTROY)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+# ---- X11 XTest ----
+
+# Key names whose X keysym name differs
+X_KEYSYMS = {
+    "esc": "Escape", "enter": "Return", "backspace": "BackSpace", "tab": "Tab", "space": "space",
+    "ctrl": "Control_L", "ctrlleft": "Control_L", "ctrlright": "Control_R",
+    "shift": "Shift_L", "shiftleft": "Shift_L", "shiftright": "Shift_R",
+    "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R",
+    "win": "Super_L", "winleft": "Super_L", "winright": "Super_R", "command": "Super_L",
+    "capslock": "Caps_Lock", "numlock": "Num_Lock", "scrolllock": "Scroll_Lock",
+    "printscreen": "Print", "pause": "Pause", "insert": "Insert", "delete": "Delete",
+    "home": "Home", "end": "End", "pageup": "Prior", "pagedown": "Next",
+    "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+    "volumemute": "XF86AudioMute", "volumedown": "XF86AudioLowerVolume", "volumeup": "XF86AudioRaiseVolume",
+    "playpause": "XF86AudioPlay", "nexttrack": "XF86AudioNext", "prevtrack": "XF86AudioPrev",
+    "stop": "XF86AudioStop",
+    "-": "minus", "=": "equal", "[": "bracketleft", "]": "bracketright", ";": "semicolon",
+    "'": "apostrophe", "`": "grave", "\\": "backslash", ",": "comma", ".": "period", "/": "slash",
+}
+
+
+class XTestKeyboard(KeyboardBackend):
+    """Key events through the X11 XTest extension on one persistent display connection.
+    A batch is queued client-side and sent with a single XFlush."""
+
+    def __init__(self, display: Optional[str] = None, key_delay: float = 0.0):
+        super().__init__(key_delay)
+        self.display_name = display
+        self._xlib = None
+        self._xtst = None
+        self._display = None
+        self._keycodes = {}  # Key name -> keycode, resolved once
+
+    def _open(self):
+        if self._display is None:
+            xlib = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+            xtst = ctypes.CDLL(ctypes.util.find_library("Xtst") or "libXtst.so.6")
+            xlib.XOpenDisplay.restype = ctypes.c_void_p
+            xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+            xlib.XStringToKeysym.restype = ctypes.c_ulong
+            xlib.XStringToKeysym.argtypes = [ctypes.c_char_p]
+            xlib.XKeysymToKeycode.restype = ctypes.c_ubyte
+            xlib.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+            xlib.XFlush.argtypes = [ctypes.c_void_p]
+            xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+            name = self.display_name.encode() if self.display_name else None
+            display = xlib.XOpenDisplay(name)
+            if not display:
+                raise OSError(f"Cannot open X display {self.display_name or os.environ.get('DISPLAY')}")
+            self._xlib, self._xtst, self._display = xlib, xtst, display
+        return self._display
+
+    def prime(self) -> bool:
+        with self._lock:
+            if self._display is not None:
+                return False
+            self._open()
+            return True
+
+    def _keycode(self, key: str) -> int:
+        key = key.lower()
+        keycode = self._keycodes.get(key)
+        if keycode is None:
+            keysym = self._xlib.XStringToKeysym(X_KEYSYMS.get(key, key).encode())
+            keycode = self._xlib.XKeysymToKeycode(self._display, keysym) if keysym else 0
+            if not keycode:
+                raise ValueError(f"Unknown key: {key}")
+            self._keycodes[key] = keycode
+        return keycode
+
+    def supports(self, key: str) -> bool:
+        self._open()
+        try:
+            self._keycode(key)
+            return True
+        except ValueError:
+            return False
+
+    def _send_events(self, events: List[Tuple[bool, str]]):
+        display = self._open()
+        # Resolve every key first - events queued before a failure would go out with the next XFlush
+        keycodes = [(self._keycode(key), is_down) for is_down, key in events]
+        for keycode, is_down in keycodes:
+            self._xtst.XTestFakeKeyEvent(display, keycode, 1 if is_down else 0, 0)
+        self._xlib.XFlush(display)
+
+
+# ---- Fallback and fake ----
+
+class PyAutoGuiKeyboard(KeyboardBackend):
+    """Fallback for Windows and macOS - pyautogui key events with its global pause disabled"""
+
+    def supports(self, key: str) -> bool:
+        return pyautogui.isValidKey(key.lower())
+
+    def _send_events(self, events: List[Tuple[bool, str]]):
+        for is_down, key in events:
+            if is_down:
+                pyautogui.keyDown(key, _pause=False)
+            else:
+                pyautogui.keyUp(key, _pause=False)
+
+
+class RecordingKeyboard(KeyboardBackend):
+    """Records key events instead of sending them - for tests"""
+
+    def __init__(self, key_delay: float = 0.0):
+        super().__init__(key_delay)
+        self.events = []     # (is_down, key) in send order
+        self.sequences = []  # Each sequence's actions, as sent
+
+    def send(self, sequence: KeySequence):
+        self.sequences.append(list(sequence.actions))
+        super().send(sequence)
+
+    def _send_events(self, events: List[Tuple[bool, str]]):
+        self.events.extend(events)
+
+    @property
+    def taps(self) -> List[str]:
+        """Keys in the order they were released"""
+        return [key for is_down, key in self.events if not is_down]
+
+    def clear(self):
+        self.events.clear()
+        self.sequences.clear()
+
+
+def create_keyboard() -> KeyboardBackend:
+    """Best key synthesis backend for this system"""
+    if sys.platform.startswith("linux"):
+        uinput = os.access("/dev/uinput", os.W_OK)
+        # Under Wayland, XTest only reaches XWayland windows
+        if uinput and os.environ.get("WAYLAND_DISPLAY"):
+            return UinputKeyboard()
+        if os.environ.get("DISPLAY") and ctypes.util.find_library("Xtst"):
+            return XTestKeyboard()
+        if uinput:
+            return UinputKeyboard()
+    return PyAutoGuiKeyboard()
@@ -0,0 +1,234 @@
+"""
+Command Manifest - compile declarative command manifests into a dispatch table
+
+Commands are declared as plain dicts (see builtin_manifest.py) and plugins can
+contribute more through the "voice_assistant.commands" entry point group. The
+manifests are compiled once into:
+    - a dispatch table: intent -> handler path, lane, repeatable flag
+    - the template dict the classifier uses (examples, thresholds, responses)
+Handlers are imported the first time their intent is dispatched.
+
+The template bundle build step encodes every example once and stores the
+normalized embeddings next to a fingerprint of the model and examples, so the
+classifier can start without encoding the templates:
+
+    python -m commands.manifest build [--out template_bundle.npz] [--model all-MiniLM-L6-v2]
+    python -m commands.manifest list
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+from core.execution_lanes import KEYBOARD_LANE, PROCESS_LANE, SYSTEM_LANE
+from flight_recorder import recorder
+from utils import lazy_import
+
+np = lazy_import("numpy")
+
+ENTRY_POINT_GROUP = "voice_assistant.commands"
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BUNDLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "template_bundle.npz")
+
+REQUIRED_FIELDS = ("intent", "examples", "handler")
+LANES = (KEYBOARD_LANE, PROCESS_LANE, SYSTEM_LANE)
+
+# Fields copied into the classifier templates
+TEMPLATE_FIELDS = ("type", "confidence_threshold", "examples", "response")
+
+
+class DispatchEntry:
+    """Compiled dispatch information for one intent"""
+
+    __slots__ = ("intent", "handler_path", "lane", "repeatable", "options")
+
+    def __init__(self, intent: str, handler_path: str, lane: str, repeatable: bool, options: Dict[str, Any]):
+        self.intent = intent
+        self.handler_path = handler_path
+        self.lane = lane
+        self.repeatable = repeatable
+        self.options = options  # Any other manifest fields, for extensions
+
+
+class CompiledCommands:
+    """Dispatch table plus classifier templates built from all manifests"""
+
+    def __init__(self, dispatch: Dict[str, DispatchEntry], templates: Dict[str, Dict[str, Any]]):
+        self.dispatch = dispatch
+        self.templates = templates
+
+    @property
+    def non_repeatable(self) -> set:
+        """Intents that are subject to the safety cooldown"""
+        return {intent for intent, entry in self.dispatch.items() if not entry.repeatable}
+
+
+def validate_manifest(manifest: Dict[str, Any], source: str = "builtin"):
+    """Raise ValueError if a manifest entry is malformed"""
+    for field in REQUIRED_FIELDS:
+        if not manifest.get(field):
+            raise ValueError(f"Command manifest from {source} is missing '{field}': {manifest}")
+    if ":" not in manifest["handler"]:
+        raise ValueError(f"Handler for '{manifest['intent']}' must look like 'module:attribute'")
+    if manifest.get("lane", SYSTEM_LANE) not in LANES:
+        raise ValueError(f"Unknown lane '{manifest['lane']}' for '{manifest['intent']}'")
+    if manifest.get("type", 0) not in (0, 1):
+        raise ValueError(f"Unknown command type for '{manifest['intent']}'")
+    timeout = manifest.get("timeout")
+    if timeout is not None and (not isinstance(timeout, (int, float)) or timeout < 0):
+        raise ValueError(f"Timeout for '{manifest['intent']}' must be a number of seconds (0 = no limit)")
+
+
+def discover_manifests() -> List[Dict[str, Any]]:
+    """Built-in manifests followed by any contributed through plugin entry points"""
+    from .builtin_manifest import BUILTIN_COMMANDS
+
+    manifests = [(entry, "builtin") for entry in BUILTIN_COMMANDS]
+
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        plugins = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+    except Exception as e:
+        recorder.error("manifest", "Plugin discovery failed: %s", e)
+        plugins = []
+
+    for ep in plugins:
+        try:
+            loaded = ep.load()
+            entries = loaded() if callable(loaded) else loaded
+            manifests.extend((entry, ep.name) for entry in entries)
+        except Exception as e:
+            print(f"Could not load command plugin '{ep.name}': {e}")
+
+    return manifests
+
+
+def compile_manifests(manifests: Iterable) -> CompiledCommands:
+    """Compile (manifest, source) pairs - later declarations of an intent override earlier ones"""
+    dispatch = {}
+    templates = {}
+    for manifest, source in manifests:
+        validate_manifest(manifest, source)
+        intent = manifest["intent"]
+        if intent in dispatch:
+            recorder.warning("manifest", "Command '%s' from %s overrides an earlier declaration", intent, source)
+
+        options = {k: v for k, v in manifest.items()
+                   if k not in TEMPLATE_FIELDS and k not in ("intent", "handler", "lane", "repeatable")}
+        dispatch[intent] = DispatchEntry(
+            intent,
+            manifest["handler"],
+            manifest.get("lane", SYSTEM_LANE),
+            manifest.get("repeatable", True),
+            options
+        )
+        templates[intent] = {
+            "type": manifest.get("type", 0),
+            "confidence_threshold": manifest.get("confidence_threshold", 0.7),
+            "examples": list(manifest["examples"]),
+            "response": manifest.get("response", ""),
+        }
+    return CompiledCommands(dispatch, templates)
+
+
+_compiled = None
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_commands() -> CompiledCommands:
+    """Compiled commands for this process (discovered and compiled once)"""
+    global _compiled
+    if _compiled is None:
+        with _compiled_lock:
+            if _compiled is None:
+                _compiled = compile_manifests(discover_manifests())
+    return _compiled
+
+
+def import_handler_target(handler_path: str):
+    """Import 'module:attr[.attr]' and return the module plus the attribute chain"""
+    module_name, _, attr_path = handler_path.partition(":")
+    return importlib.import_module(module_name), attr_path.split(".")
+
+
+# ---- Template bundle ----
+
+def templates_fingerprint(templates: Dict[str, Dict[str, Any]], model_name: str) -> str:
+    """Hash of the model and every example, so a stale bundle is never used"""
+    payload = json.dumps(
+        {"model": model_name, "examples": [[intent, data["examples"]] for intent, data in templates.items()]},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_template_bundle(sentence_model, templates: Dict[str, Dict[str, Any]], model_name: str,
+                          path: str = DEFAULT_BUNDLE_PATH) -> str:
+    """Encode all examples in one batch and save normalized embeddings with a fingerprint"""
+    intents = []
+    examples = []
+    for intent, data in templates.items():
+        intents.extend([intent] * len(data["examples"]))
+        examples.extend(data["examples"])
+
+    embeddings = np.asarray(sentence_model.encode(examples), dtype=np.float32)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    np.savez(
+        path,
+        embeddings=embeddings,
+        intents=np.array(intents),
+        fingerprint=np.array(templates_fingerprint(templates, model_name))
+    )
+    return path
+
+
+def load_template_bundle(templates: Dict[str, Dict[str, Any]], model_name: str,
+                         path: str = DEFAULT_BUNDLE_PATH) -> Optional[Dict[str, Any]]:
+    """Per-intent normalized embeddings from the bundle, None if missing or stale"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as bundle:
+            if str(bundle["fingerprint"]) != templates_fingerprint(templates, model_name):
+                recorder.info("manifest", "Template bundle %s is stale - ignoring", path)
+                return None
+            embeddings = bundle["embeddings"]
+            intents = bundle["intents"]
+    except Exception as e:
+        print(f"Could not load template bundle {path}: {e}")
+        return None
+
+    return {intent: embeddings[intents == intent] for intent in templates}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile command manifests")
+    sub = parser.add_subparsers(dest="action", required=True)
+    build = sub.add_parser("build", help="precompute the template embedding bundle")
+    build.add_argument("--out", default=DEFAULT_BUNDLE_PATH)
+    build.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    sub.add_parser("list", help="show the compiled dispatch table")
+    args = parser.parse_args()
+
+    compiled = get_compiled_commands()
+    if args.action == "list":
+        for intent, entry in compiled.dispatch.items():
+            flags = "" if entry.repeatable else " (cooldown)"
+            print(f"{intent:<26} {entry.lane:<9} {entry.handler_path}{flags}")
+        return
+
+    from sentence_transformers import SentenceTransformer
+    print(f"Encoding templates with {args.model}...")
+    path = build_template_bundle(SentenceTransformer(args.model), compiled.templates, args.model, args.out)
+    print(f"Wrote {path} ({len(compiled.templates)} commands)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,35 @@
 Media Commands - High-level media control commands
 """
 
-import pyautogui
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from utils import parse_amount
+from .keyboard import KeyboardBackend, create_keyboard
+from .media_sessions import MediaSessionBackend
+from .mixer import MixerBackend, create_mixer
 from .smart_media_controller import SmartMediaController
+from .window_system import WindowBackend
+
+# Percent per plain "volume up" / "volume down"
+VOLUME_STEP = 10
 
 
 class MediaCommands:
     """Enhanced media commands with smart detection for specific apps"""
 
-    def __init__(self):
-        self.controller = SmartMediaController()
+    def __init__(self, mixer: Optional[MixerBackend] = None, keyboard: Optional[KeyboardBackend] = None,
+                 window_backend: Optional[WindowBackend] = None, media_sessions: Optional[MediaSessionBackend] = None):
+        self.keyboard = keyboard or create_keyboard()
+        self.controller = SmartMediaController(backend=window_backend, keyboard=self.keyboard,
+                                               media_sessions=media_sessions)
+        self.mixer = mixer or create_mixer(self.keyboard)
+
+    def prefetch(self) -> bool:
+        """Called on wake word activation - take a window snapshot and open the keyboard"""
+        return self.controller.prefetch()
+
+    def get_prefetch_stats(self) -> Dict[str, Any]:
+        stats = self.controller.window_index.get_stats()
+        return {key: stats[key] for key in ("prefetches", "prefetch_hits", "prefetch_saved")}
 
     def play_pause(self, params: Dict[str, Any] = None) -> bool:
         return self.controller.smart_play_pause(params)
@@ -28,57 +47,81 @@ class MediaCommands:
     def music_play_pause(self, params: Dict[str, Any] = None) -> bool:
         return self.controller.control_media_key()
 
-    @staticmethod
-    def stremio_fullscreen(params: Dict[str, Any] = None) -> bool:
+    def stremio_fullscreen(self, params: Dict[str, Any] = None) -> bool:
         try:
-            pyautogui.press('f')
+            self.keyboard.press('f')
             return True
         except Exception as e:
             print(f"Stremio fullscreen error: {e}")
             return False
 
-    @staticmethod
-    def next_song(params: Dict[str, Any] = None) -> bool:
+    def next_song(self, params: Dict[str, Any] = None) -> bool:
+        return self.controller.media_action("next", "nexttrack")
+
+    def previous_song(self, params: Dict[str, Any] = None) -> bool:
+        return self.controller.media_action("previous", "prevtrack")
+
+    def _report_volume(self, action: str, level) -> bool:
+        """Print the resulting level when the mixer knows it"""
+        if level is not None:
+            print(f"{action}: volume {level}%")
+        return True
+
+    def volume_up(self, params: Dict[str, Any] = None) -> bool:
         try:
-            pyautogui.press('nexttrack')
-            return True
+            return self._report_volume("Volume up", self.mixer.change_volume(VOLUME_STEP))
         except Exception as e:
-            print(f"Next song error: {e}")
+            print(f"Volume up error: {e}")
             return False
 
-    @staticmethod
-    def previous_song(params: Dict[str, Any] = None) -> bool:
+    def volume_down(self, params: Dict[str, Any] = None) -> bool:
         try:
-            pyautogui.press('prevtrack')
-            return True
+            return self._report_volume("Volume down", self.mixer.change_volume(-VOLUME_STEP))
         except Exception as e:
-            print(f"Previous song error: {e}")
+            print(f"Volume down error: {e}")
+            return False
+
+    def set_volume(self, params: Dict[str, Any] = None) -> bool:
+        """Set an absolute level - volume to 30 percent"""
+        level = parse_amount((params or {}).get('content', ''))
+        if level is None:
+            print("No volume level provided")
             return False
 
-    @staticmethod
-    def volume_up(params: Dict[str, Any] = None) -> bool:
         try:
-            for _ in range(5):
-                pyautogui.press('volumeup')
-            return True
+            return self._report_volume("Set volume", self.mixer.set_volume(level))
         except Exception as e:
-            print(f"Volume up error: {e}")
+            print(f"Set volume error: {e}")
             return False
 
-    @staticmethod
-    def volume_down(params: Dict[str, Any] = None) -> bool:
+    def volume_up_by(self, params: Dict[str, Any] = None) -> bool:
+        """Relative change - volume up by 20"""
+        return self._change_volume_by(params, 1)
+
+    def volume_down_by(self, params: Dict[str, Any] = None) -> bool:
+        """Relative change - volume down by 20"""
+        return self._change_volume_by(params, -1)
+
+    def _change_volume_by(self, params: Dict[str, Any], direction: int) -> bool:
+        content = (params or {}).get('content', '')
+        amount = parse_amount(content)
+        if amount is None:
+            if content.strip():
+                print(f"Could not understand the amount: {content}")
+                return False  # Better than guessing how far to move the volume
+            amount = VOLUME_STEP
+
         try:
-            for _ in range(5):
-                pyautogui.press('volumedown')
-            return True
+            return self._report_volume("Change volume", self.mixer.change_volume(direction * amount))
         except Exception as e:
-            print(f"Volume down error: {e}")
+            print(f"Change volume error: {e}")
             return False
 
-    @staticmethod
-    def mute(params: Dict[str, Any] = None) -> bool:
+    def mute(self, params: Dict[str, Any] = None) -> bool:
         try:
-            pyautogui.press('volumemute')
+            muted = self.mixer.toggle_mute()
+            if muted is not None:
+                print("Muted" if muted else "Unmuted")
             return True
         except Exception as e:
             print(f"Mute error: {e}")
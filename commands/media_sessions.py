@@ -0,0 +1,411 @@
+"""
+Media sessions - which player is playing, tracked from the players' own events
+
+On Linux, players announce themselves and their playback state over MPRIS
+(D-Bus). The registry subscribes to NameOwnerChanged and PropertiesChanged
+signals instead of polling, so picking the target of "play", "pause" or
+"next" is a lookup, and controlling it is one method call on the bus - no
+window enumeration, focus change or key press.
+
+Needs the optional jeepney package. Without it, or without a session bus
+(e.g. on Windows), create_media_sessions() returns None and callers fall back
+to window detection.
+
+    python -m commands.media_sessions list
+    python -m commands.media_sessions fake NAME [Playing|Paused]   # serve a fake player
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from flight_recorder import recorder
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+ROOT_INTERFACE = "org.mpris.MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+# Registry action -> MPRIS Player method
+ACTIONS = {
+    "play_pause": "PlayPause",
+    "play": "Play",
+    "pause": "Pause",
+    "stop": "Stop",
+    "next": "Next",
+    "previous": "Previous",
+}
+
+PLAYING = "Playing"
+PAUSED = "Paused"
+STOPPED = "Stopped"
+
+
+class MediaPlayer:
+    """One media session - its playback state and when it was last used"""
+
+    def __init__(self, name: str, status: str = STOPPED, title: str = "", last_active: float = 0.0):
+        self.name = name  # Bus name, e.g. "org.mpris.MediaPlayer2.spotify"
+        self.status = status
+        self.title = title
+        self.last_active = last_active  # Monotonic time of the last state change or command
+
+    @property
+    def identity(self) -> str:
+        """Short player name - "spotify", "chromium" (instance suffixes dropped)"""
+        return self.name[len(MPRIS_PREFIX):].split(".")[0] if self.name.startswith(MPRIS_PREFIX) else self.name
+
+    @property
+    def is_playing(self) -> bool:
+        return self.status == PLAYING
+
+    def __repr__(self):
+        return f"MediaPlayer({self.identity!r}, {self.status}, {self.title!r})"
+
+
+class MediaSessionBackend:
+    """Registry of media players - subclasses keep it current and implement _call"""
+
+    def __init__(self):
+        self.players = {}  # Bus name -> MediaPlayer
+        self._lock = threading.Lock()
+        self.stats = {"events": 0, "commands": 0, "failed": 0, "command_time": 0.0}
+
+    def start(self) -> bool:
+        """Discover players and start following their events - False if unavailable"""
+        return True
+
+    def stop(self):
+        pass
+
+    def get_players(self) -> List[MediaPlayer]:
+        with self._lock:
+            return list(self.players.values())
+
+    def active_player(self) -> Optional[MediaPlayer]:
+        """The player that is playing (the most recent one if several are),
+        otherwise the one that was used last"""
+        players = self.get_players()
+        if not players:
+            return None
+        playing = [player for player in players if player.is_playing]
+        return max(playing or players, key=lambda player: (player.last_active, player.status == PAUSED))
+
+    def send(self, action: str, player: Optional[MediaPlayer] = None) -> bool:
+        """Send an action (see ACTIONS) to a player, the active one by default"""
+        player = player or self.active_player()
+        if player is None:
+            return False
+
+        started = time.perf_counter()
+        try:
+            self._call(player.name, ACTIONS[action])
+            success = True
+        except Exception as e:
+            recorder.warning("media", "%s on %s failed: %s", action, player.identity, e)
+            success = False
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.stats["commands"] += 1
+            self.stats["command_time"] += elapsed
+            if success:
+                player.last_active = time.monotonic()
+            else:
+                self.stats["failed"] += 1
+        recorder.debug("media", "%s -> %s in %.2f ms", action, player.identity, elapsed * 1000)
+        return success
+
+    def _call(self, name: str, method: str):
+        """Call a Player method on the named player"""
+        raise NotImplementedError
+
+    def _update(self, name: str, status: Optional[str] = None, title: Optional[str] = None):
+        """Record a player's state - a change of playback status counts as use"""
+        with self._lock:
+            player = self.players.get(name)
+            if player is None:
+                player = self.players[name] = MediaPlayer(name)
+            if status and status != player.status:
+                player.status = status
+                player.last_active = time.monotonic()
+            if title is not None:
+                player.title = title
+
+    def _remove(self, name: str):
+        with self._lock:
+            self.players.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["players"] = {player.identity: player.status for player in self.players.values()}
+        stats["avg_command_time"] = stats["command_time"] / stats["commands"] if stats["commands"] else 0.0
+        return stats
+
+
+def _variant_value(variant):
+    """Value of a D-Bus variant as jeepney decodes it - a (signature, value) pair"""
+    return variant[1] if isinstance(variant, tuple) and len(variant) == 2 else variant
+
+
+def _metadata_title(metadata) -> str:
+    return str(_variant_value((metadata or {}).get("xesam:title", ("s", ""))))
+
+
+class MprisSessions(MediaSessionBackend):
+    """MPRIS players on a D-Bus session bus, followed through their signals"""
+
+    def __init__(self, bus: str = "SESSION", timeout: float = 1.0):
+        super().__init__()
+        self.bus = bus  # "SESSION" or a bus address
+        self.timeout = timeout  # Seconds to wait for a reply from a player
+        self.is_running = False
+        self._connection = None
+        self._router = None
+        self._bus_proxy = None
+        self._filters = []
+        self._events = queue.Queue(maxsize=256)
+        self._owners = {}  # Unique connection name (":1.42") -> player bus name
+        self._thread = None
+
+    def start(self) -> bool:
+        if self.is_running:
+            return True
+        from jeepney import MatchRule, message_bus
+        from jeepney.io.threading import DBusRouter, Proxy, open_dbus_connection
+
+        self._connection = open_dbus_connection(self.bus)
+        self._router = DBusRouter(self._connection)
+        self._bus_proxy = Proxy(message_bus, self._router, timeout=self.timeout)
+
+        owner_rule = MatchRule(type="signal", sender="org.freedesktop.DBus", interface="org.freedesktop.DBus",
+                               member="NameOwnerChanged")
+        owner_rule.add_arg_condition(0, ROOT_INTERFACE, kind="namespace")
+        properties_rule = MatchRule(type="signal", interface=PROPERTIES_INTERFACE, member="PropertiesChanged",
+                                    path=MPRIS_PATH)
+        for rule in (owner_rule, properties_rule):
+            self._filters.append(self._router.filter(rule, queue=self._events))
+            self._bus_proxy.AddMatch(rule)
+
+        self.is_running = True
+        for name in self._bus_proxy.ListNames()[0]:
+            if name.startswith(MPRIS_PREFIX):
+                self._add_player(name)
+        self._thread = threading.Thread(target=self._run, name="media-sessions", daemon=True)
+        self._thread.start()
+        recorder.info("media", "Following %d MPRIS players", len(self.players))
+        return True
+
+    def stop(self):
+        self.is_running = False
+        try:
+            self._events.put_nowait(None)  # Wake the event thread
+        except queue.Full:
+            pass  # It sees is_running on its next event
+        for handle in self._filters:
+            handle.close()
+        self._filters = []
+        if self._router:
+            self._router.close()
+            self._connection.close()
+            self._router = self._connection = None
+
+    def _add_player(self, name: str):
+        """Read a newly seen player's owner and state"""
+        try:
+            owner = self._bus_proxy.GetNameOwner(name)[0]
+            properties = self._get_properties(name)
+        except Exception as e:
+            recorder.warning("media", "Could not read MPRIS player %s: %s", name, e)
+            return
+        self._owners[owner] = name
+        self._update(name, _variant_value(properties.get("PlaybackStatus", ("s", STOPPED))),
+                     _metadata_title(_variant_value(properties.get("Metadata"))))
+
+    def _get_properties(self, name: str) -> Dict[str, Any]:
+        from jeepney import DBusAddress, Properties
+        from jeepney.wrappers import unwrap_msg
+        address = DBusAddress(MPRIS_PATH, bus_name=name, interface=PLAYER_INTERFACE)
+        reply = self._router.send_and_get_reply(Properties(address).get_all(), timeout=self.timeout)
+        return unwrap_msg(reply)[0]
+
+    def _call(self, name: str, method: str):
+        from jeepney import DBusAddress, new_method_call
+        from jeepney.wrappers import unwrap_msg
+        address = DBusAddress(MPRIS_PATH, bus_name=name, interface=PLAYER_INTERFACE)
+        unwrap_msg(self._router.send_and_get_reply(new_method_call(address, method), timeout=self.timeout))
+
+    def _run(self):
+        from jeepney import HeaderFields
+        while self.is_running:
+            message = self._events.get()
+            if message is None:
+                break
+            try:
+                member = message.header.fields.get(HeaderFields.member)
+                if member == "NameOwnerChanged":
+                    name, old_owner, new_owner = message.body
+                    self._owners.pop(old_owner, None)
+                    if new_owner:
+                        self._add_player(name)
+                    else:
+                        self._remove(name)
+                elif member == "PropertiesChanged":
+                    interface, changed, _ = message.body
+                    name = self._owners.get(message.header.fields.get(HeaderFields.sender))
+                    if interface != PLAYER_INTERFACE or name is None:
+                        continue
+                    metadata = changed.get("Metadata")
+                    self._update(name, _variant_value(changed.get("PlaybackStatus")),
+                                 _metadata_title(_variant_value(metadata)) if metadata else None)
+                with self._lock:
+                    self.stats["events"] += 1
+            except Exception as e:
+                recorder.error("media", "Bad MPRIS event: %s", e)
+
+
+class FakeMediaSessions(MediaSessionBackend):
+    """In-memory players for tests - commands are recorded and change state like a real player"""
+
+    def __init__(self, players: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.calls = []  # (player identity, method)
+        for identity, status in (players or {}).items():
+            self.add_player(identity, status)
+
+    def add_player(self, identity: str, status: str = PAUSED, title: str = ""):
+        self._update(MPRIS_PREFIX + identity, status, title)
+
+    def _call(self, name: str, method: str):
+        self.calls.append((name[len(MPRIS_PREFIX):], method))
+        player = self.players[name]
+        if method == "PlayPause":
+            self._update(name, PAUSED if player.is_playing else PLAYING)
+        elif method in ("Play", "Pause", "Stop"):
+            self._update(name, {"Play": PLAYING, "Pause": PAUSED, "Stop": STOPPED}[method])
+
+
+class FakeMprisPlayer:
+    """Minimal MPRIS player served on a real bus, to exercise MprisSessions end to end
+    (e.g. under dbus-run-session)"""
+
+    def __init__(self, identity: str, status: str = PAUSED, title: str = "", bus: str = "SESSION"):
+        self.name = MPRIS_PREFIX + identity
+        self.status = status
+        self.title = title
+        self.bus = bus
+        self.calls = []
+        self._router = None
+        self._connection = None
+        self._requests = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        from jeepney import MatchRule, message_bus
+        from jeepney.io.threading import DBusRouter, Proxy, open_dbus_connection
+
+        self._connection = open_dbus_connection(self.bus)
+        self._router = DBusRouter(self._connection)
+        self._filter = self._router.filter(MatchRule(type="method_call", path=MPRIS_PATH), queue=self._requests)
+        Proxy(message_bus, self._router, timeout=2.0).RequestName(self.name)
+        self._thread = threading.Thread(target=self._serve, name=f"fake-mpris-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._requests.put(None)
+        self._filter.close()
+        self._router.close()
+        self._connection.close()
+
+    def set_status(self, status: str):
+        """Change state as if the user clicked the player itself"""
+        self.status = status
+        self._emit_changed()
+
+    def _properties(self) -> Dict[str, Any]:
+        return {
+            "PlaybackStatus": ("s", self.status),
+            "Metadata": ("a{sv}", {"xesam:title": ("s", self.title)}),
+            "CanPlay": ("b", True), "CanPause": ("b", True),
+            "CanGoNext": ("b", True), "CanGoPrevious": ("b", True),
+        }
+
+    def _emit_changed(self):
+        from jeepney import DBusAddress, new_signal
+        emitter = DBusAddress(MPRIS_PATH, interface=PROPERTIES_INTERFACE)
+        self._router.send(new_signal(emitter, "PropertiesChanged", "sa{sv}as",
+                                     (PLAYER_INTERFACE, {"PlaybackStatus": ("s", self.status)}, [])))
+
+    def _serve(self):
+        from jeepney import HeaderFields, new_error, new_method_return
+        transitions = {"PlayPause": lambda s: PAUSED if s == PLAYING else PLAYING,
+                       "Play": lambda s: PLAYING, "Pause": lambda s: PAUSED, "Stop": lambda s: STOPPED,
+                       "Next": lambda s: s, "Previous": lambda s: s}
+        while True:
+            message = self._requests.get()
+            if message is None:
+                return
+            fields = message.header.fields
+            interface, member = fields.get(HeaderFields.interface), fields.get(HeaderFields.member)
+            if interface == PLAYER_INTERFACE and member in transitions:
+                self.calls.append(member)
+                self._router.send(new_method_return(message))
+                status = transitions[member](self.status)
+                if status != self.status:
+                    self.set_status(status)
+            elif interface == PROPERTIES_INTERFACE and member == "GetAll":
+                properties = self._properties() if message.body[0] == PLAYER_INTERFACE else {}
+                self._router.send(new_method_return(message, "a{sv}", (properties,)))
+            elif interface == PROPERTIES_INTERFACE and member == "Get" and message.body[1] in self._properties():
+                self._router.send(new_method_return(message, "v", (self._properties()[message.body[1]],)))
+            else:
+                self._router.send(new_error(message, "org.freedesktop.DBus.Error.UnknownMethod"))
+
+
+def create_media_sessions() -> Optional[MediaSessionBackend]:
+    """Started MPRIS registry, or None where there is no session bus or jeepney is not installed"""
+    if sys.platform == "win32" or not os.environ.get("DBUS_SESSION_BUS_ADDRESS"):
+        return None
+    sessions = MprisSessions()
+    try:
+        sessions.start()
+        return sessions
+    except ImportError:
+        recorder.info("media", "jeepney not installed - media sessions unavailable")
+    except Exception as e:
+        recorder.warning("media", "Media sessions unavailable: %s", e)
+        sessions.stop()
+    return None
+
+
+def main():
+    """List the players on the session bus, or serve a fake one for testing"""
+    if len(sys.argv) > 2 and sys.argv[1] == "fake":
+        status = sys.argv[3] if len(sys.argv) > 3 else PAUSED
+        player = FakeMprisPlayer(sys.argv[2], status, title=f"{sys.argv[2]} test track").start()
+        print(f"Serving {player.name} ({status}) - Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            player.stop()
+        return
+
+    sessions = create_media_sessions()
+    if sessions is None:
+        print("No media sessions available (needs a D-Bus session bus and jeepney)")
+        sys.exit(1)
+    active = sessions.active_player()
+    for player in sessions.get_players():
+        print(f"{'*' if player is active else ' '} {player.identity:<20} {player.status:<8} {player.title}")
+    sessions.stop()
+
+
+if __name__ == "__main__":
+    main()
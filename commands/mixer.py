@@ -0,0 +1,154 @@
+"""
+Mixer - system volume control backends
+
+A mixer sets absolute or relative volume in one call and reports the
+resulting level, instead of tapping the volume keys and hoping.
+"""
+
+import re
+import shutil
+import subprocess
+import threading
+from typing import List, Optional
+
+from .keyboard import KeyboardBackend, KeySequence, create_keyboard
+
+
+def clamp_percent(value: float) -> int:
+    """Clamp a volume level to 0-100"""
+    return int(max(0, min(100, round(value))))
+
+
+class MixerBackend:
+    """Interface to the system mixer - levels are percentages, None when unknown"""
+
+    def get_volume(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def set_volume(self, percent: int) -> Optional[int]:
+        """Set an absolute level, returns the resulting level"""
+        raise NotImplementedError
+
+    def change_volume(self, delta: int) -> Optional[int]:
+        """Raise or lower the level by delta percent, returns the resulting level"""
+        current = self.get_volume()
+        if current is None:
+            return None
+        return self.set_volume(clamp_percent(current + delta))
+
+    def toggle_mute(self) -> Optional[bool]:
+        """Toggle mute, returns whether audio is now muted"""
+        raise NotImplementedError
+
+
+class PulseAudioMixer(MixerBackend):
+    """PulseAudio / PipeWire (pipewire-pulse) default sink, driven by pactl"""
+
+    SINK = "@DEFAULT_SINK@"
+    _PERCENT = re.compile(r"(\d+)%")
+
+    def __init__(self, pactl: str = "pactl", timeout: float = 2.0):
+        self.pactl = pactl
+        self.timeout = timeout
+
+    def _run(self, *args) -> str:
+        result = subprocess.run(
+            [self.pactl, *args],
+            capture_output=True, text=True, timeout=self.timeout, check=True
+        )
+        return result.stdout
+
+    def _levels(self) -> List[int]:
+        # "Volume: front-left: 32768 /  50% / -18.06 dB,   front-right: ..."
+        return [int(p) for p in self._PERCENT.findall(self._run("get-sink-volume", self.SINK))]
+
+    def get_volume(self) -> Optional[int]:
+        levels = self._levels()
+        return clamp_percent(sum(levels) / len(levels)) if levels else None
+
+    def set_volume(self, percent: int) -> Optional[int]:
+        percent = clamp_percent(percent)
+        self._run("set-sink-volume", self.SINK, f"{percent}%")
+        return percent
+
+    def change_volume(self, delta: int) -> Optional[int]:
+        # pactl applies the change to the current level itself - no read-modify-write race with
+        # the volume keys. The level is read back to report it, and raises are capped at 100%.
+        self._run("set-sink-volume", self.SINK, f"{int(delta):+d}%")
+        levels = self._levels()
+        if delta > 0 and any(level > 100 for level in levels):
+            return self.set_volume(100)  # pactl lets relative raises amplify past 100%
+        return clamp_percent(sum(levels) / len(levels)) if levels else None
+
+    def toggle_mute(self) -> Optional[bool]:
+        self._run("set-sink-mute", self.SINK, "toggle")
+        return "yes" in self._run("get-sink-mute", self.SINK).lower()
+
+
+class KeyTapMixer(MixerBackend):
+    """Fallback for systems without a mixer API - sends volume keys in a single batch.
+    The resulting level is unknown, so levels are returned as None."""
+
+    STEP = 2  # Percent per volume key press on Windows
+
+    def __init__(self, keyboard: Optional[KeyboardBackend] = None):
+        self.keyboard = keyboard or create_keyboard()
+
+    def get_volume(self) -> Optional[int]:
+        return None
+
+    def set_volume(self, percent: int) -> Optional[int]:
+        # Bottom out, then climb to the requested level
+        self.keyboard.send(KeySequence()
+                           .press('volumedown', repeat=100 // self.STEP)
+                           .press('volumeup', repeat=clamp_percent(percent) // self.STEP))
+        return None
+
+    def change_volume(self, delta: int) -> Optional[int]:
+        key = 'volumeup' if delta > 0 else 'volumedown'
+        presses = max(1, abs(delta) // self.STEP)
+        self.keyboard.press(key, repeat=presses)
+        return None
+
+    def toggle_mute(self) -> Optional[bool]:
+        self.keyboard.press('volumemute')
+        return None
+
+
+class FakeMixer(MixerBackend):
+    """In-memory mixer for tests"""
+
+    def __init__(self, volume: int = 50, muted: bool = False):
+        self.volume = volume
+        self.muted = muted
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_volume(self) -> Optional[int]:
+        return self.volume
+
+    def set_volume(self, percent: int) -> Optional[int]:
+        with self._lock:
+            self.calls += 1
+            self.volume = clamp_percent(percent)
+            return self.volume
+
+    def change_volume(self, delta: int) -> Optional[int]:
+        with self._lock:
+            self.calls += 1
+            self.volume = clamp_percent(self.volume + delta)
+            return self.volume
+
+    def toggle_mute(self) -> Optional[bool]:
+        with self._lock:
+            self.calls += 1
+            self.muted = not self.muted
+            return self.muted
+
+
+def create_mixer(keyboard: Optional[KeyboardBackend] = None) -> MixerBackend:
+    """Best mixer available on this system"""
+    pactl = shutil.which("pactl")
+    if pactl:
+        return PulseAudioMixer(pactl)
+    return KeyTapMixer(keyboard)
@@ -2,121 +2,122 @@
 Smart Media Controller - Handles media detection and control
 """
 
-import time
-import ctypes
-import pyautogui
 import logging
 from typing import Dict, Any, Optional
 
+from flight_recorder import recorder
+from .keyboard import KeyboardBackend, KeySequence, create_keyboard
+from .media_sessions import MediaSessionBackend, create_media_sessions
+from .window_system import WindowBackend, WindowIndex, create_window_backend
+
 logger = logging.getLogger(__name__)
 
-# Windows API constants
-SW_RESTORE = 9
+# Media sources the controller looks for
+STREMIO_KEYWORD = "stremio"
+BROWSERS = ['chrome', 'firefox', 'edge', 'opera']
+MUSIC_SITES = ['youtube music', 'music.youtube', 'spotify', 'soundcloud']
+VIDEO_SITES = ['youtube', 'netflix', 'twitch', 'prime video']
+
+# Time a newly activated window gets before it receives keys
+FOCUS_SETTLE_DELAY = 0.3
+
+# How long a snapshot taken on activation stays usable for the command that follows
+PREFETCH_HOLD = 5.0
 
 
 class SmartMediaController:
     """Precise media control with browser tab detection"""
 
-    def __init__(self):
-        self.user32 = ctypes.windll.user32
+    def __init__(self, backend: Optional[WindowBackend] = None, snapshot_ttl: float = 0.5,
+                 keyboard: Optional[KeyboardBackend] = None, media_sessions: Optional[MediaSessionBackend] = None):
+        self.backend = backend or create_window_backend()
+        self.keyboard = keyboard or create_keyboard()
+        # Players that report their own state (MPRIS) - None where unavailable
+        self.media_sessions = media_sessions if media_sessions is not None else create_media_sessions()
+        self.window_index = WindowIndex(
+            self.backend,
+            keywords=[STREMIO_KEYWORD] + BROWSERS + MUSIC_SITES + VIDEO_SITES,
+            ttl=snapshot_ttl
+        )
+        self._focus_watch_started = False
+
+    def _get_snapshot(self):
+        """Current window snapshot - one enumeration shared by every lookup"""
+        if not self._focus_watch_started:
+            self._focus_watch_started = True
+            self.window_index.start_focus_watch()
+        return self.window_index.get_snapshot()
+
+    def prefetch(self) -> bool:
+        """Enumerate windows and open the keyboard ahead of the expected command"""
+        if not self._focus_watch_started:
+            self._focus_watch_started = True
+            self.window_index.start_focus_watch()
+        self.window_index.prefetch(PREFETCH_HOLD)
+        self.keyboard.prime()
+        return True
 
     def _find_window(self, app_name: str) -> Optional[int]:
         """Find application window handle"""
-        try:
-            window_hwnd = []
-
-            def enum_windows_proc(hwnd, lParam):
-                if self.user32.IsWindowVisible(hwnd):
-                    length = self.user32.GetWindowTextLengthW(hwnd)
-                    buff = ctypes.create_unicode_buffer(length + 1)
-                    self.user32.GetWindowTextW(hwnd, buff, length + 1)
-
-                    if app_name.lower() in buff.value.lower():
-                        window_hwnd.append(hwnd)
-                return True
-
-            callback = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.c_int)
-            self.user32.EnumWindows(callback(enum_windows_proc), 0)
-
-            return window_hwnd[0] if window_hwnd else None
-
-        except Exception as e:
-            logger.error(f"Window finding error: {e}")
-            return None
+        window = self._get_snapshot().find(app_name)
+        return window.handle if window else None
 
     def _activate_window(self, hwnd: int) -> bool:
-        """Activate and bring window to foreground"""
+        """Activate and bring window to foreground - False if the window system refused"""
         try:
-            if self.user32.IsIconic(hwnd):
-                self.user32.ShowWindow(hwnd, SW_RESTORE)
-            self.user32.SetForegroundWindow(hwnd)
-            time.sleep(0.1)
+            if not self.backend.activate_window(hwnd):
+                recorder.warning("media", "Could not focus window %s", hwnd)
+                return False  # Keys sent now would go to whatever has focus
+            self.window_index.invalidate()  # Focus and z-order changed
             return True
         except Exception as e:
-            logger.error(f"Window activation error: {e}")
+            logger.error("Window activation error: %s", e)
             return False
 
     def _get_last_used_media(self) -> Optional[Dict[str, Any]]:
         """Find the media source user was last using"""
+        snapshot = self._get_snapshot()
         media_sources = []
 
         # Check Stremio
-        stremio_hwnd = self._find_window("stremio")
-        if stremio_hwnd:
-            media_sources.append({'type': 'stremio', 'hwnd': stremio_hwnd, 'name': 'Stremio'})
+        stremio = snapshot.find(STREMIO_KEYWORD)
+        if stremio:
+            media_sources.append({'type': 'stremio', 'hwnd': stremio.handle, 'name': 'Stremio'})
 
         # Check browsers
-        browsers = ['chrome', 'firefox', 'edge', 'opera']
-        music_sites = ['youtube music', 'music.youtube', 'spotify', 'soundcloud']
-        video_sites = ['youtube', 'netflix', 'twitch', 'prime video']
-
-        for browser in browsers:
-            hwnd = self._find_window(browser)
-            if hwnd:
-                try:
-                    length = self.user32.GetWindowTextLengthW(hwnd)
-                    buff = ctypes.create_unicode_buffer(length + 1)
-                    self.user32.GetWindowTextW(hwnd, buff, length + 1)
-                    title = buff.value.lower()
-
-                    print(f"[DEBUG] Found {browser} window: '{title}'")
-
-                    # Check for media sites
-                    is_music = any(site in title for site in music_sites)
-                    is_video = any(site in title for site in video_sites) and not is_music
-
-                    if is_music or is_video:
-                        media_sources.append({
-                            'type': 'browser_music' if is_music else 'browser_video',
-                            'hwnd': hwnd,
-                            'name': title,
-                            'browser': browser
-                        })
-                        print(f"[DEBUG] Added media source: {title}")
-
-                except Exception as e:
-                    logger.error(f"Browser check error: {e}")
+        for browser in BROWSERS:
+            window = snapshot.find(browser)
+            if not window:
+                continue
+
+            title = window.title.lower()
+            recorder.debug("media", "Found %s window: %r", browser, title)
+
+            # Check for media sites
+            is_music = any(site in title for site in MUSIC_SITES)
+            is_video = any(site in title for site in VIDEO_SITES) and not is_music
+
+            if is_music or is_video:
+                media_sources.append({
+                    'type': 'browser_music' if is_music else 'browser_video',
+                    'hwnd': window.handle,
+                    'name': title,
+                    'browser': browser
+                })
+                recorder.debug("media", "Added media source: %s", title)
 
         if not media_sources:
             return None
 
-        # Get currently focused window
-        try:
-            focused_hwnd = self.user32.GetForegroundWindow()
-
-            # Check if user is currently on a media window
-            for source in media_sources:
-                if source['hwnd'] == focused_hwnd:
-                    print(f"[DEBUG] User is currently on: {source['name']}")
-                    return source
-
-            # Return first media source found
-            print(f"[DEBUG] Using first media source: {media_sources[0]['name']}")
-            return media_sources[0]
+        # Check if user is currently on a media window
+        for source in media_sources:
+            if source['hwnd'] == snapshot.foreground:
+                recorder.debug("media", "User is currently on: %s", source['name'])
+                return source
 
-        except Exception as e:
-            logger.error(f"Focus detection error: {e}")
-            return media_sources[0] if media_sources else None
+        # Return first media source found
+        recorder.debug("media", "Using first media source: %s", media_sources[0]['name'])
+        return media_sources[0]
 
     def control_stremio(self) -> bool:
         """Control Stremio"""
@@ -128,38 +129,60 @@ class SmartMediaController:
             return False
 
         try:
-            time.sleep(0.2)
-            pyautogui.press('space')
+            self.keyboard.send(KeySequence().pause(FOCUS_SETTLE_DELAY).press('space'))
+            return True
+        except Exception as e:
+            logger.error("Stremio control error: %s", e)
+            return False
+
+    def control_media_key(self) -> bool:
+        """Send the system play/pause media key"""
+        try:
+            self.keyboard.press('playpause')
             return True
         except Exception as e:
-            logger.error(f"Stremio control error: {e}")
+            logger.error("Media key error: %s", e)
             return False
 
     def control_browser_media(self, media_source: Dict[str, Any]) -> bool:
         """Control browser media"""
         try:
             if media_source['type'] == 'browser_music':
-                pyautogui.press('playpause')
-                print(f"[DEBUG] Used media key for: {media_source['name']}")
+                self.keyboard.press('playpause')
+                recorder.debug("media", "Used media key for: %s", media_source['name'])
                 return True
             elif media_source['type'] == 'browser_video':
                 if self._activate_window(media_source['hwnd']):
-                    time.sleep(0.2)
-                    pyautogui.press('space')
-                    print(f"[DEBUG] Used spacebar for: {media_source['name']}")
+                    self.keyboard.send(KeySequence().pause(FOCUS_SETTLE_DELAY).press('space'))
+                    recorder.debug("media", "Used spacebar for: %s", media_source['name'])
                     return True
         except Exception as e:
-            logger.error(f"Browser control error: {e}")
+            logger.error("Browser control error: %s", e)
         return False
 
+    def media_action(self, action: str, fallback_key: str) -> bool:
+        """Send a media action ("next", "previous", ...) to the active player, or press its media key"""
+        if self.media_sessions and self.media_sessions.send(action):
+            return True
+        try:
+            self.keyboard.press(fallback_key)
+            return True
+        except Exception as e:
+            logger.error("Media key error: %s", e)
+            return False
+
     def smart_play_pause(self, params: Dict[str, Any] = None) -> bool:
         """Play/pause the media source user was last using"""
 
+        # A player that reports its state knows best - one call, no window scan
+        if self.media_sessions and self.media_sessions.send("play_pause"):
+            return True
+
         # Find what user was last using
         user_media = self._get_last_used_media()
 
         if user_media:
-            print(f"[DEBUG] Targeting: {user_media['name']} (type: {user_media['type']})")
+            recorder.debug("media", "Targeting: %s (type: %s)", user_media['name'], user_media['type'])
 
             if user_media['type'] == 'stremio':
                 return self.control_stremio()
@@ -167,9 +190,5 @@ class SmartMediaController:
                 return self.control_browser_media(user_media)
 
         # Fallback
-        print("[DEBUG] No media detected, using media key fallback")
-        try:
-            pyautogui.press('playpause')
-            return True
-        except:
-            return False
\ No newline at end of file
+        recorder.debug("media", "No media detected, using media key fallback")
+        return self.control_media_key()
\ No newline at end of file
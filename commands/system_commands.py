@@ -5,20 +5,16 @@ System Commands - System control and utilities
 import time
 import subprocess
 from typing import Dict, Any
-from utils import SafetyChecker
 
 
 class SystemCommands:
-    """System control commands (shutdown, restart, sleep)"""
+    """System control commands (shutdown, restart, sleep)
 
-    def __init__(self):
-        self.safety_checker = SafetyChecker()
+    The safety cooldown for these is enforced by CommandRegistry for every
+    command declared non-repeatable in the manifest."""
 
     def shutdown(self, params: Dict[str, Any] = None) -> bool:
         """Shutdown the computer"""
-        if not self.safety_checker.check_dangerous_command_safety("shutdown"):
-            return False
-
         try:
             print("⚠️  Shutting down in 10 seconds...")
             subprocess.run(["shutdown", "/s", "/t", "10"])
@@ -29,9 +25,6 @@ class SystemCommands:
 
     def restart(self, params: Dict[str, Any] = None) -> bool:
         """Restart the computer"""
-        if not self.safety_checker.check_dangerous_command_safety("restart"):
-            return False
-
         try:
             print("⚠️  Restarting in 10 seconds...")
             subprocess.run(["shutdown", "/r", "/t", "10"])
@@ -2,16 +2,24 @@
 Text Commands - Text input and keyboard control
 """
 
-import pyautogui
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from utils import normalize_key_name
+from .keyboard import KeyboardBackend, KeySequence, create_keyboard
+from .text_injector import TextInjector
 
 
 class TextCommands:
     """Text input and keyboard commands"""
 
-    @staticmethod
-    def write_text(params: Dict[str, Any] = None) -> bool:
+    def __init__(self, injector: Optional[TextInjector] = None, keyboard: Optional[KeyboardBackend] = None):
+        self.keyboard = keyboard or (injector.keyboard if injector else create_keyboard())
+        self.injector = injector or TextInjector(keyboard=self.keyboard)
+
+    def prefetch(self) -> bool:
+        """Called on wake word activation - open the keyboard before the first key"""
+        return self.keyboard.prime()
+
+    def write_text(self, params: Dict[str, Any] = None) -> bool:
         """Type text at current cursor position"""
         if not params or not params.get('content'):
             print("No text provided to write")
@@ -19,15 +27,14 @@ class TextCommands:
 
         try:
             text_to_write = params['content'].strip()
-            pyautogui.write(text_to_write)
-            print(f"Wrote: {text_to_write}")
+            strategy = self.injector.inject(text_to_write)
+            print(f"Wrote ({strategy}): {text_to_write}")
             return True
         except Exception as e:
             print(f"Write text error: {e}")
             return False
 
-    @staticmethod
-    def press_button(params: Dict[str, Any] = None) -> bool:
+    def press_button(self, params: Dict[str, Any] = None) -> bool:
         """Press keyboard keys or key combinations"""
         if not params or not params.get('content'):
             print("No key specified to press")
@@ -38,13 +45,11 @@ class TextCommands:
             # Normalize the key name
             normalized_key = normalize_key_name(key_to_press)
 
-            # Handle key combinations (e.g., "ctrl+c", "alt+f4")
+            # Key combinations (e.g., "ctrl+c", "alt+f4") are sent as one chord
+            self.keyboard.send(KeySequence().combo(normalized_key))
             if "+" in normalized_key:
-                keys = normalized_key.split("+")
-                pyautogui.hotkey(*keys)
                 print(f"Pressed key combination: {normalized_key}")
             else:
-                pyautogui.press(normalized_key)
                 print(f"Pressed key: {normalized_key}")
             return True
         except Exception as e:
@@ -0,0 +1,102 @@
+"""
+Text Injector - choose between typing and clipboard paste for text output
+
+Short strings are typed key by key. Longer strings are put on the clipboard and
+pasted with one shortcut, which takes the same time whatever the length. The
+previous clipboard contents are restored afterwards.
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from flight_recorder import recorder
+from .clipboard import ClipboardBackend, create_clipboard
+from .keyboard import KeyboardBackend, create_keyboard
+
+TYPE_STRATEGY = "type"
+PASTE_STRATEGY = "paste"
+
+
+class TextInjector:
+    """Types or pastes text at the cursor, tracking throughput per strategy"""
+
+    def __init__(self, clipboard: Optional[ClipboardBackend] = None, paste_threshold: int = 40,
+                 restore_delay: float = 0.15, keyboard: Optional[KeyboardBackend] = None):
+        self.clipboard = clipboard or create_clipboard()
+        self.keyboard = keyboard or create_keyboard()
+        self.paste_threshold = paste_threshold  # Texts at least this long are pasted
+        self.restore_delay = restore_delay      # Time the target app gets to read the clipboard
+        self.paste_keys = ("command", "v") if sys.platform == "darwin" else ("ctrl", "v")
+        self._lock = threading.Lock()
+        self.stats = {
+            strategy: {"count": 0, "chars": 0, "time": 0.0}
+            for strategy in (TYPE_STRATEGY, PASTE_STRATEGY)
+        }
+
+    def choose_strategy(self, text: str) -> str:
+        """Paste long or non-ASCII text when a clipboard is available, type everything else"""
+        if self.clipboard is not None and (len(text) >= self.paste_threshold or not text.isascii()):
+            return PASTE_STRATEGY
+        return TYPE_STRATEGY
+
+    def inject(self, text: str) -> str:
+        """Output text at the cursor, returns the strategy used"""
+        strategy = self.choose_strategy(text)
+        started = time.perf_counter()
+
+        if strategy == PASTE_STRATEGY:
+            try:
+                self._paste(text)
+            except Exception as e:
+                # Clipboard tools can fail (no display, tool missing) - typing always works
+                recorder.warning("text", "Clipboard paste failed, typing instead: %s", e)
+                strategy = TYPE_STRATEGY
+                started = time.perf_counter()
+                self._type(text)
+        else:
+            self._type(text)
+
+        elapsed = time.perf_counter() - started
+        self._record(strategy, len(text), elapsed)
+        return strategy
+
+    def _type(self, text: str):
+        self.keyboard.write(text)
+
+    def _paste(self, text: str):
+        # Serialize so two pastes cannot interleave their save/restore
+        with self._lock:
+            try:
+                previous = self.clipboard.get_text()
+            except Exception:
+                previous = None
+
+            try:
+                self.clipboard.set_text(text)
+                self.keyboard.hotkey(*self.paste_keys)
+                time.sleep(self.restore_delay)
+            finally:
+                # Even when the paste failed - the dictated text must not replace what the user had copied
+                if previous is not None:
+                    self.clipboard.set_text(previous)
+
+    def _record(self, strategy: str, chars: int, elapsed: float):
+        stats = self.stats[strategy]
+        stats["count"] += 1
+        stats["chars"] += chars
+        stats["time"] += elapsed
+        recorder.info("text", "Injected %d chars via %s in %.1f ms (%.0f chars/s)",
+                      chars, strategy, elapsed * 1000, chars / elapsed if elapsed else 0.0)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Count, characters and characters per second for each strategy"""
+        return {
+            strategy: {
+                "count": stats["count"],
+                "chars": stats["chars"],
+                "chars_per_second": stats["chars"] / stats["time"] if stats["time"] else 0.0,
+            }
+            for strategy, stats in self.stats.items()
+        }
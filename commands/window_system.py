@@ -0,0 +1,426 @@
+"""
+Window System - window enumeration backends and a cached snapshot index
+
+A WindowSnapshot is built from a single enumeration of the visible top-level
+windows and indexed by app and site keywords, so finding "stremio" or
+"chrome" is a dictionary lookup instead of another walk over every window.
+WindowIndex caches the snapshot for a short TTL and drops it when focus
+changes.
+
+Backends: user32 on Windows, wmctrl + xprop on X11 (including XWayland
+windows), and a null backend that reports no windows where neither exists.
+"""
+
+import ctypes
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Windows API constants
+SW_RESTORE = 9
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+
+
+class WindowInfo:
+    """One visible top-level window"""
+
+    __slots__ = ("handle", "title", "process_name", "z_order", "pid", "window_class", "_search_text")
+
+    def __init__(self, handle: int, title: str, process_name: str = "", z_order: int = 0,
+                 pid: int = 0, window_class: str = ""):
+        self.handle = handle
+        self.title = title
+        self.process_name = process_name
+        self.z_order = z_order  # 0 is the topmost window
+        self.pid = pid                     # Owning process, 0 if unknown
+        self.window_class = window_class   # X11 WM_CLASS ("instance.Class"), empty elsewhere
+        self._search_text = f"{title}\n{process_name}\n{window_class}".lower()
+
+    def matches(self, keyword: str) -> bool:
+        """Whether keyword appears in the title, process name or window class"""
+        return keyword in self._search_text
+
+    def app_names(self) -> set:
+        """Names identifying the application rather than the document - executable and WM_CLASS parts"""
+        names = {part for part in self.window_class.lower().split(".") if part}
+        if self.process_name:
+            names.add(os.path.splitext(self.process_name.lower())[0])
+        return names
+
+    def __repr__(self):
+        return f"WindowInfo({self.handle}, {self.title!r}, {self.process_name!r}, z={self.z_order}, pid={self.pid})"
+
+
+class WindowBackend:
+    """Interface to the platform window system"""
+
+    available = True  # False when the platform has no backend and no windows are ever reported
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        """Visible top-level windows, topmost first"""
+        raise NotImplementedError
+
+    def get_foreground_window(self) -> Optional[int]:
+        """Handle of the window that has focus"""
+        raise NotImplementedError
+
+    def activate_window(self, handle: int) -> bool:
+        """Restore and focus a window"""
+        raise NotImplementedError
+
+    def watch_focus(self, callback: Callable[[], None]) -> bool:
+        """Call callback whenever the foreground window changes - returns False if unsupported"""
+        return False
+
+
+class Win32WindowBackend(WindowBackend):
+    """Windows backend using user32 through ctypes"""
+
+    def __init__(self):
+        self._user32 = None
+        self._kernel32 = None
+        self._focus_thread = None
+
+    @property
+    def user32(self):
+        """Windows user32 API - loaded on first use so construction stays cheap"""
+        if self._user32 is None:
+            self._user32 = ctypes.windll.user32
+        return self._user32
+
+    @property
+    def kernel32(self):
+        if self._kernel32 is None:
+            self._kernel32 = ctypes.windll.kernel32
+        return self._kernel32
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        user32 = self.user32
+        windows = []
+        process_names = {}
+        # One title buffer for the whole walk, grown only when a title does not fit
+        buffer = [ctypes.create_unicode_buffer(256)]
+
+        def enum_windows_proc(hwnd, lParam):
+            if user32.IsWindowVisible(hwnd):
+                length = user32.GetWindowTextLengthW(hwnd)
+                if length:
+                    if length + 1 > len(buffer[0]):
+                        buffer[0] = ctypes.create_unicode_buffer(length + 1)
+                    user32.GetWindowTextW(hwnd, buffer[0], length + 1)
+                    pid, process_name = self._get_process(hwnd, process_names)
+                    windows.append(WindowInfo(hwnd, buffer[0].value, process_name, len(windows), pid))
+            return True
+
+        callback = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.c_int)
+        user32.EnumWindows(callback(enum_windows_proc), 0)
+        return windows
+
+    def _get_process(self, hwnd: int, cache: Dict[int, str]) -> tuple:
+        """(pid, executable name) of the process owning hwnd - names cached per pid for one enumeration"""
+        pid = ctypes.c_ulong()
+        self.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value in cache:
+            return pid.value, cache[pid.value]
+
+        name = ""
+        process = self.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+        if process:
+            try:
+                size = ctypes.c_ulong(260)
+                path = ctypes.create_unicode_buffer(size.value)
+                if self.kernel32.QueryFullProcessImageNameW(process, 0, path, ctypes.byref(size)):
+                    name = os.path.basename(path.value).lower()
+            finally:
+                self.kernel32.CloseHandle(process)
+        cache[pid.value] = name
+        return pid.value, name
+
+    def get_foreground_window(self) -> Optional[int]:
+        return self.user32.GetForegroundWindow() or None
+
+    def activate_window(self, handle: int) -> bool:
+        if self.user32.IsIconic(handle):
+            self.user32.ShowWindow(handle, SW_RESTORE)
+        return bool(self.user32.SetForegroundWindow(handle))
+
+    def watch_focus(self, callback: Callable[[], None]) -> bool:
+        if self._focus_thread:
+            return True
+
+        def run():
+            from ctypes import wintypes
+            proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                           wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+            proc = proc_type(lambda *args: callback())
+            hook = self.user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                                               0, proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+            if not hook:
+                logger.error("Could not install focus-change hook")
+                return
+            msg = wintypes.MSG()
+            # WinEvent callbacks are delivered through this thread's message loop
+            while self.user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                self.user32.TranslateMessage(ctypes.byref(msg))
+                self.user32.DispatchMessageW(ctypes.byref(msg))
+            self.user32.UnhookWinEvent(hook)
+
+        self._focus_thread = threading.Thread(target=run, name="window-focus-watch", daemon=True)
+        self._focus_thread.start()
+        return True
+
+
+class X11WindowBackend(WindowBackend):
+    """X11 backend using wmctrl (window list, pid, WM_CLASS, activation) and xprop (stacking, focus)"""
+
+    def __init__(self, wmctrl: str = "wmctrl", xprop: str = "xprop", timeout: float = 2.0):
+        self.wmctrl = wmctrl
+        self.xprop = xprop
+        self.timeout = timeout
+
+    def _run(self, *args) -> str:
+        return subprocess.run(args, capture_output=True, text=True, timeout=self.timeout, check=True).stdout
+
+    def _root_property(self, name: str) -> List[int]:
+        # "_NET_CLIENT_LIST_STACKING(WINDOW): window id # 0x1e00003, 0x3a00007"
+        output = self._run(self.xprop, "-root", name)
+        _, _, values = output.partition("#")
+        return [int(value, 16) for value in values.replace(",", " ").split() if value.startswith("0x")]
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        stacking = self._root_property("_NET_CLIENT_LIST_STACKING")  # Bottom to top
+        z_order = {handle: len(stacking) - 1 - i for i, handle in enumerate(stacking)}
+        windows = []
+        # "0x03a00003  0 12345  gnome-calculator.Gnome-calculator  host Calculator"
+        for line in self._run(self.wmctrl, "-l", "-p", "-x").splitlines():
+            parts = line.split(None, 5)
+            if len(parts) < 5:
+                continue
+            handle, desktop, pid, window_class = int(parts[0], 16), parts[1], int(parts[2]), parts[3]
+            if desktop == "-1":
+                continue  # Sticky panels and docks, not application windows
+            title = parts[5] if len(parts) > 5 else ""
+            windows.append(WindowInfo(handle, title, self._process_name(pid), z_order.get(handle, len(z_order)),
+                                      pid, window_class))
+        windows.sort(key=lambda window: window.z_order)
+        return windows
+
+    @staticmethod
+    def _process_name(pid: int) -> str:
+        try:
+            with open(f"/proc/{pid}/comm", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+    def get_foreground_window(self) -> Optional[int]:
+        active = self._root_property("_NET_ACTIVE_WINDOW")
+        return active[0] if active and active[0] else None
+
+    def activate_window(self, handle: int) -> bool:
+        try:
+            self._run(self.wmctrl, "-i", "-a", hex(handle))
+            return True
+        except (OSError, subprocess.SubprocessError):
+            return False
+
+
+class NullWindowBackend(WindowBackend):
+    """No window system access on this platform - nothing to find, nothing to focus"""
+
+    available = False
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        return []
+
+    def get_foreground_window(self) -> Optional[int]:
+        return None
+
+    def activate_window(self, handle: int) -> bool:
+        return False
+
+
+class FakeWindowBackend(WindowBackend):
+    """In-memory window system for tests and platforms without a native backend"""
+
+    def __init__(self, windows: Iterable = ()):
+        self.windows = []
+        self.foreground = None
+        self.activated = []  # Handles passed to activate_window, in order
+        self.enumerations = 0
+        self._focus_callbacks = []
+        self.set_windows(windows)
+
+    def set_windows(self, windows: Iterable):
+        """Replace the window list - items are (title, process_name[, pid[, window_class]]) tuples,
+        topmost first"""
+        self.windows = [WindowInfo(i + 1, title, process_name, i, *rest)
+                        for i, (title, process_name, *rest) in enumerate(windows)]
+
+    def enumerate_windows(self) -> List[WindowInfo]:
+        self.enumerations += 1
+        return list(self.windows)
+
+    def get_foreground_window(self) -> Optional[int]:
+        return self.foreground
+
+    def set_foreground(self, handle: Optional[int]):
+        """Simulate the user focusing a window"""
+        self.foreground = handle
+        for callback in self._focus_callbacks:
+            callback()
+
+    def activate_window(self, handle: int) -> bool:
+        if not any(w.handle == handle for w in self.windows):
+            return False
+        self.activated.append(handle)
+        self.set_foreground(handle)
+        return True
+
+    def watch_focus(self, callback: Callable[[], None]) -> bool:
+        self._focus_callbacks.append(callback)
+        return True
+
+
+def create_window_backend() -> WindowBackend:
+    """Native backend for this platform (a null backend where none exists)"""
+    if sys.platform == "win32":
+        return Win32WindowBackend()
+    if os.environ.get("DISPLAY") and shutil.which("wmctrl") and shutil.which("xprop"):
+        return X11WindowBackend()
+    return NullWindowBackend()
+
+
+class WindowSnapshot:
+    """Windows from one enumeration, indexed by keyword"""
+
+    def __init__(self, windows: List[WindowInfo], foreground: Optional[int], keywords: Iterable[str] = ()):
+        self.windows = windows
+        self.foreground = foreground
+        self.taken_at = time.monotonic()
+        self._by_handle = {w.handle: w for w in windows}
+        self._by_keyword = {}
+        for keyword in keywords:
+            self.find_all(keyword)
+
+    def find_all(self, keyword: str) -> List[WindowInfo]:
+        """All windows matching keyword, topmost first"""
+        keyword = keyword.lower()
+        matches = self._by_keyword.get(keyword)
+        if matches is None:
+            matches = [w for w in self.windows if w.matches(keyword)]
+            self._by_keyword[keyword] = matches
+        return matches
+
+    def find(self, keyword: str) -> Optional[WindowInfo]:
+        """Topmost window matching keyword"""
+        matches = self.find_all(keyword)
+        return matches[0] if matches else None
+
+    def find_app(self, names: Iterable[str], pids: Iterable[int] = ()) -> Optional[WindowInfo]:
+        """Topmost window owned by one of pids, else topmost whose executable or WM_CLASS is in names.
+        Titles are never consulted - a browser tab named after an app is not that app."""
+        pids = set(pids)
+        names = {name.lower() for name in names}
+        by_pid = [w for w in self.windows if w.pid and w.pid in pids]
+        if by_pid:
+            return by_pid[0]
+        for window in self.windows:
+            if names & window.app_names():
+                return window
+        return None
+
+    def get(self, handle: int) -> Optional[WindowInfo]:
+        return self._by_handle.get(handle)
+
+    @property
+    def foreground_window(self) -> Optional[WindowInfo]:
+        return self._by_handle.get(self.foreground)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+
+class WindowIndex:
+    """Caches a WindowSnapshot for a short TTL, invalidated on focus changes"""
+
+    def __init__(self, backend: WindowBackend, keywords: Iterable[str] = (), ttl: float = 0.5):
+        self.backend = backend
+        self.keywords = list(keywords)
+        self.ttl = ttl
+        self._snapshot = None
+        self._prefetched_until = 0.0  # A prefetched snapshot is served until then
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+        self.build_time = 0.0
+        self.prefetches = 0
+        self.prefetch_hits = 0
+        self.prefetch_saved = 0.0  # Build time spared by prefetched snapshots
+
+    def start_focus_watch(self) -> bool:
+        """Invalidate the cache from the backend's focus-change events when supported"""
+        return self.backend.watch_focus(self.invalidate)
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> WindowSnapshot:
+        """Cached snapshot if it is fresh enough, otherwise a new one"""
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age <= max_age:
+                self.hits += 1
+                return snapshot
+            if snapshot is not None and time.monotonic() < self._prefetched_until:
+                self.hits += 1
+                self.prefetch_hits += 1
+                self.prefetch_saved += self.build_time
+                self._prefetched_until = 0.0  # Served once, later lookups follow the normal TTL
+                return snapshot
+            return self._build()
+
+    def refresh(self) -> WindowSnapshot:
+        """Force a new snapshot"""
+        with self._lock:
+            return self._build()
+
+    def prefetch(self, hold: float) -> WindowSnapshot:
+        """Build a snapshot ahead of use and serve it for up to hold seconds, unless focus changes first"""
+        with self._lock:
+            snapshot = self._build()
+            self._prefetched_until = time.monotonic() + hold
+            self.prefetches += 1
+            return snapshot
+
+    def invalidate(self):
+        """Drop the cached snapshot (focus changed or a window was activated)"""
+        self._snapshot = None
+        self._prefetched_until = 0.0
+
+    def _build(self) -> WindowSnapshot:
+        started = time.perf_counter()
+        try:
+            windows = self.backend.enumerate_windows()
+            foreground = self.backend.get_foreground_window()
+        except Exception as e:
+            logger.error("Window enumeration error: %s", e)
+            windows, foreground = [], None
+        snapshot = WindowSnapshot(windows, foreground, self.keywords)
+        self._snapshot = snapshot
+        self.builds += 1
+        self.build_time = time.perf_counter() - started
+        return snapshot
+
+    def get_stats(self) -> Dict[str, float]:
+        return {"builds": self.builds, "hits": self.hits, "last_build_time": self.build_time,
+                "prefetches": self.prefetches, "prefetch_hits": self.prefetch_hits,
+                "prefetch_saved": self.prefetch_saved}
@@ -2,7 +2,12 @@
 Core package for the Local Smart Voice Assistant
 """
 
-from .assistant import Assistant
-
 __all__ = ['Assistant']
 
+
+def __getattr__(name):
+    # Assistant pulls in speech recognition and the classifier - import it on first use
+    if name == 'Assistant':
+        from .assistant import Assistant
+        return Assistant
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,21 +2,59 @@
 Main assistant coordinator - orchestrates speech recognition and command processing
 """
 
-import queue
+import signal
 import time
+from typing import Dict, Any, Callable, Optional
 
 from .speech_recognizer import SpeechRecognizer
 from .command_processor import CommandProcessor
+from .idle_governor import IdleGovernor
+from .latency_tracer import LatencyTracer
+from .playback import EchoCanceller
+from .prefetch import ContextPrefetcher
+from .session_hub import SessionHub, DEFAULT_SESSION
 from ai import COMMAND_TEMPLATES
+from flight_recorder import recorder
+from profiler import SamplingProfiler, get_rss, model_weight_bytes, thread_summary, format_bytes
+
+DEFAULT_PROFILE_PATH = "profile.collapsed"
 
 
 class Assistant:
     """Main coordinator class for the voice assistant"""
 
-    def __init__(self):
-        self.speech_recognizer = SpeechRecognizer()
-        self.command_processor = CommandProcessor()
-        self.command_queue = queue.Queue()
+    def __init__(self, use_microphone: bool = True, command_processor: Optional[CommandProcessor] = None,
+                 idle_after: float = 300.0, started_at: Optional[float] = None, startup_mode: str = "cold",
+                 on_ready: Optional[Callable[[float], None]] = None, echo_cancel: bool = False,
+                 release_encoder: bool = True):
+        # Startup-to-ready is measured from started_at (a perf_counter value, e.g. process start or fork)
+        self.startup = {"mode": startup_mode, "ready_time": None}
+        self._started_at = time.perf_counter() if started_at is None else started_at
+        self._on_ready = on_ready
+        # A prebuilt processor (e.g. with a stub TTS engine) brings its own tracer
+        self.tracer = command_processor.tracer if command_processor else LatencyTracer()
+        # Echo cancellation renders each response to a waveform first and subtracts it from the microphone
+        self.echo_cancel = echo_cancel
+        # Without a microphone the assistant only handles text (console or control socket)
+        self.speech_recognizer = self._create_recognizer() if use_microphone else None
+        self.command_processor = command_processor or CommandProcessor(tracer=self.tracer)
+        if echo_cancel:
+            self.command_processor.tts_reference = True
+        # Activating any session prepares what the next command will need
+        self.prefetcher = self._create_prefetcher()
+        # Releases the encoder and tightens the microphone gate after idle_after quiet seconds (0 disables)
+        self.governor = IdleGovernor(idle_after)
+        # Every microphone or room is a session of the hub, sharing the processor's model
+        self.hub = SessionHub(self.command_processor, prefetcher=self.prefetcher, governor=self.governor)
+        classifier = self.command_processor.intent_classifier
+        if release_encoder:
+            # Off in zygote workers - the encoder is shared with the parent, releasing it frees nothing
+            self.governor.add_component("encoder", classifier.release_encoder, classifier.load_encoder)
+        self.governor.add_component("audio_gate", lambda: self._set_audio_idle(True),
+                                    lambda: self._set_audio_idle(False))
+        self.main_session = self.hub.add_session(DEFAULT_SESSION, recognizer=self.speech_recognizer)
+        self.command_queue = self.main_session.queue
+        self.profiler = SamplingProfiler()
         self.is_running = False
 
     def start(self):
@@ -25,11 +63,11 @@ class Assistant:
 
         self.is_running = True
 
-        # Start speech recognition
-        listen_thread = self.speech_recognizer.start_listening(self.command_queue)
+        # Dump recent pipeline history on SIGUSR1, toggle profiling on SIGUSR2 (where available)
+        recorder.install_signal_handler()
+        self.profiler.install_signal_handler(on_stop=self._write_profile)
 
-        # Start command processing
-        process_thread = self.command_processor.start_processing(self.command_queue)
+        self._start_pipeline()
 
         # Display available commands
         self._show_available_commands()
@@ -37,6 +75,11 @@ class Assistant:
         print("\nPress Enter to stop, or type commands:")
         print("  'status' - Show queue status")
         print("  'help' - Show all available commands")
+        print("  'export' - Write latency metrics (Prometheus) and spans (JSONL)")
+        print("  'dump [n]' - Show the last n pipeline events from the flight recorder")
+        print("  'debug on|off' - Echo pipeline events to the console as they happen")
+        print("  'profile start [hz]|stop [file]|report' - Sample all threads and write collapsed stacks")
+        print("  'mem' - Show the memory breakdown")
 
         try:
             while self.is_running:
@@ -48,6 +91,17 @@ class Assistant:
                     self._show_status()
                 elif command == "help":
                     self._show_available_commands()
+                elif command == "export":
+                    self._export_latency()
+                elif command.startswith("dump"):
+                    self._dump_events(command)
+                elif command in ("debug on", "debug off"):
+                    recorder.echo = command == "debug on"
+                    print(f"Debug echo {'enabled' if recorder.echo else 'disabled'}")
+                elif command.startswith("profile"):
+                    self._profile_command(command)
+                elif command == "mem":
+                    self._show_memory()
                 else:
                     print("Unknown command. Type 'help' for available commands.")
 
@@ -57,21 +111,285 @@ class Assistant:
         print("Stopping voice assistant...")
         self._stop()
 
+    def run_daemon(self, socket_path: str = None):
+        """Run headless - serve the control socket instead of the interactive console"""
+        from .control_server import ControlServer
+
+        print("=== Local AI Voice Assistant Starting (daemon) ===")
+        self.is_running = True
+        recorder.install_signal_handler()
+        self.profiler.install_signal_handler(on_stop=self._write_profile)
+
+        server = ControlServer(self, socket_path)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: server.shutdown())
+
+        self._start_pipeline()
+        try:
+            server.serve_forever()
+        finally:
+            print("Stopping voice assistant...")
+            self._stop()
+
+    def _create_prefetcher(self) -> ContextPrefetcher:
+        processor = self.command_processor
+        registry = processor.command_registry
+        prefetcher = ContextPrefetcher()
+        prefetcher.add_task("encoder", processor.intent_classifier.warm_up)
+        prefetcher.add_task("handlers", registry.prefetch, stats=registry.get_prefetch_stats)
+        prefetcher.add_task("tts", processor.start_tts_worker)
+        return prefetcher
+
+    def _set_audio_idle(self, idle: bool):
+        for session in list(self.hub.sessions.values()):
+            if session.recognizer and hasattr(session.recognizer, "set_idle"):
+                session.recognizer.set_idle(idle)
+
+    def _start_pipeline(self):
+        """Start command processing, then the session hub and its speech recognizers"""
+        self.command_processor.start_processing()
+        self.prefetcher.start()
+        self.hub.start()
+        self.governor.start()
+        self._mark_ready()
+
+    def _mark_ready(self):
+        ready_time = time.perf_counter() - self._started_at
+        self.startup["ready_time"] = ready_time
+        recorder.info("assistant", "Ready in %.0f ms (%s start)", ready_time * 1000, self.startup["mode"])
+        print(f"Ready in {ready_time * 1000:.0f} ms ({self.startup['mode']} start)")
+        if self._on_ready:
+            self._on_ready(ready_time)
+
     def _stop(self):
         """Stop all components of the assistant"""
         self.is_running = False
-        self.speech_recognizer.stop_listening()
+        self.profiler.stop()
+        self.governor.stop()
+        self.hub.stop()
+        self.prefetcher.stop()
         self.command_processor.stop_processing()
 
         # Wait a bit for threads to finish
         time.sleep(2)
         print("Voice assistant stopped.")
 
+    def add_session(self, session_id: str, use_microphone: bool = False, device_index: Optional[int] = None):
+        """Add a room at runtime - with its own microphone, or text-only"""
+        recognizer = self._create_recognizer(device_index) if use_microphone else None
+        return self.hub.add_session(session_id, recognizer=recognizer)
+
+    def _create_recognizer(self, device_index: Optional[int] = None) -> SpeechRecognizer:
+        recognizer = SpeechRecognizer(tracer=self.tracer, device_index=device_index)
+        if self.echo_cancel:
+            recognizer.echo_canceller = EchoCanceller()
+        return recognizer
+
+    def remove_session(self, session_id: str) -> bool:
+        if session_id == DEFAULT_SESSION:
+            return False
+        return self.hub.remove_session(session_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current status of the assistant as a dict"""
+        return {
+            "queue_size": self.command_queue.qsize(),
+            "listening": bool(self.speech_recognizer and self.speech_recognizer.is_listening),
+            "processing": self.command_processor.is_processing,
+            "active": self.main_session.activation.is_active,
+            "lanes": self.command_processor.get_lane_stats(),
+            "handlers": self.command_processor.command_registry.get_handler_stats(),
+            "sessions": self.hub.get_stats(),
+            "classifier": self.command_processor.intent_classifier.get_tier_stats(),
+            "rescoring": self.command_processor.intent_classifier.get_rescore_stats(),
+            "prefetch": self.prefetcher.get_stats(),
+            "idle": self.governor.get_stats(),
+            "latency": self.tracer.get_summary(),
+            "startup": dict(self.startup),
+            "endpointing": self.speech_recognizer.get_endpoint_stats() if self.speech_recognizer else None,
+            "self_speech": self.speech_recognizer.get_suppression_stats() if self.speech_recognizer else None,
+            "playback": self.command_processor.playback.get_stats(),
+        }
+
     def _show_status(self):
         """Show current status of the assistant"""
-        print(f"Queue size: {self.command_queue.qsize()}")
-        print(f"Listening: {self.speech_recognizer.is_listening}")
-        print(f"Processing: {self.command_processor.is_processing}")
+        status = self.get_status()
+        print(f"Queue size: {status['queue_size']}")
+        print(f"Listening: {status['listening']}")
+        print(f"Processing: {status['processing']}")
+        startup = status['startup']
+        if startup['ready_time'] is not None:
+            print(f"Startup: ready in {startup['ready_time'] * 1000:.0f} ms ({startup['mode']} start)")
+        hub = status['sessions']
+        print(f"Sessions: {len(hub['sessions'])} (avg batch {hub['avg_batch']:.1f}, max {hub['max_batch']})")
+        for session_id, stats in hub['sessions'].items():
+            print(f"  {session_id}: queued={stats['queue_size']} active={stats['active']} "
+                  f"listening={stats['listening']} utterances={stats['utterances']} "
+                  f"dispatched={stats['dispatched']}")
+        tiers = status['classifier']
+        if tiers['enabled']:
+            audit = f"{tiers['audit_accuracy'] * 100:.0f}%" if tiers['audit_accuracy'] is not None else "n/a"
+            print(f"Classifier: fast tier {tiers['fast']} ({tiers['fast_hit_rate'] * 100:.0f}%), "
+                  f"encoder {tiers['encoder']}, fast avg {tiers['avg_fast_time'] * 1e6:.0f}us, "
+                  f"audit agreement {audit} of {tiers['audited']}")
+        rescoring = status['rescoring']
+        if rescoring['utterances']:
+            print(f"N-best rescoring: {rescoring['utterances']} utterances, "
+                  f"avg {rescoring['avg_alternatives']:.1f} alternatives, {rescoring['changed']} changed "
+                  f"({rescoring['change_rate'] * 100:.0f}%), avg {rescoring['avg_time'] * 1000:.1f}ms")
+        prefetch = status['prefetch']
+        print(f"Prefetch: {prefetch['triggers']} activations, {prefetch['used']} followed by a command "
+              f"({prefetch['use_rate'] * 100:.0f}%), {prefetch['expired']} expired")
+        for name, stats in prefetch['tasks'].items():
+            print(f"  {name}: runs={stats['runs']} prepared={stats['prepared']} errors={stats['errors']} "
+                  f"avg={stats['avg_time'] * 1000:.1f}ms")
+            for key, value in stats.items():
+                if isinstance(value, dict):  # A handler's own hit counters
+                    print(f"    {key}: " + " ".join(f"{k}={v:.3g}" if isinstance(v, float) else f"{k}={v}"
+                                                    for k, v in value.items()))
+        endpointing = status['endpointing']
+        if endpointing and endpointing['endpoints']:
+            print(f"Endpointing: avg pause {endpointing['avg_silence'] * 1000:.0f}ms "
+                  f"(saves {endpointing['saved_per_utterance'] * 1000:.0f}ms vs {endpointing['base_pause'] * 1000:.0f}ms), "
+                  f"cut off early {endpointing['early']} ({endpointing['early_rate'] * 100:.1f}%), "
+                  f"transcripts reused {endpointing['reused']}")
+            for reason, stats in endpointing['reasons'].items():
+                if stats['count']:
+                    print(f"  {reason}: n={stats['count']} avg={stats['avg_silence'] * 1000:.0f}ms "
+                          f"early={stats['early']} ({stats['early_rate'] * 100:.1f}%)")
+        self_speech = status['self_speech']
+        if self_speech:
+            playback = status['playback']
+            line = (f"Self-speech: {self_speech['mode']} during {playback['playbacks']} responses "
+                    f"({playback['playing_time']:.1f}s), suppressed {self_speech['suppressed_audio']:.1f}s of audio, "
+                    f"{self_speech['segments']} phrases (~{self_speech['asr_time_saved']:.1f}s speech-to-text saved)")
+            canceller = self_speech.get('echo_canceller')
+            if canceller:
+                line += f", echo cancelled by {canceller['erle_db']:.1f} dB"
+            print(line)
+        idle = status['idle']
+        if idle['enabled']:
+            print(f"Power: {idle['state']} (quiet {idle['quiet_for']:.0f}s of {idle['idle_after']:.0f}s), "
+                  f"idle {idle['idle_entries']}x for {idle['idle_time']:.0f}s, "
+                  f"resume last={idle['last_resume'] * 1000:.0f}ms max={idle['max_resume'] * 1000:.0f}ms "
+                  f"budget={idle['resume_budget'] * 1000:.0f}ms over={idle['over_budget']}")
+        print("Execution lanes:")
+        for name, stats in status['lanes'].items():
+            print(f"  {name}: queued={stats['queue_depth']} active={stats['active']} "
+                  f"executed={stats['executed']} failed={stats['failed']} "
+                  f"avg={stats['avg_exec_time'] * 1000:.0f}ms max={stats['max_exec_time'] * 1000:.0f}ms "
+                  f"wait={stats['avg_wait_time'] * 1000:.0f}ms")
+        handlers = status['handlers']
+        print(f"Handlers: timeout {handlers['default_timeout']:.0f}s, {handlers['abandoned']} abandoned "
+              f"({len(handlers['stuck'])} still running), {handlers['late_finished']} finished late")
+        for intent, stats in sorted(handlers['intents'].items(), key=lambda item: -item[1]['p99']):
+            print(f"  {intent}: n={stats['count']} failed={stats['failures']} timeouts={stats['timeouts']} "
+                  f"p50={stats['p50'] * 1000:.0f}ms p99={stats['p99'] * 1000:.0f}ms max={stats['max'] * 1000:.0f}ms")
+        for event in handlers['events'][-5:]:
+            print(f"  ! {time.strftime('%H:%M:%S', time.localtime(event['time']))} {event['intent']} "
+                  f"{event['kind']} after {event['elapsed']:.1f}s")
+
+        summary = status['latency']
+        if summary:
+            print("Latency per stage (ms):")
+            for stage, stats in summary.items():
+                print(f"  {stage:<12} n={stats['count']:<5} mean={stats['mean'] * 1000:7.1f} "
+                      f"p50={stats['p50'] * 1000:7.1f} p95={stats['p95'] * 1000:7.1f} "
+                      f"p99={stats['p99'] * 1000:7.1f}")
+
+    def _export_latency(self, prometheus_path: str = "latency_metrics.prom",
+                        spans_path: str = "latency_spans.jsonl"):
+        """Export latency histograms and recent trace spans"""
+        try:
+            self.tracer.export_prometheus(prometheus_path)
+            count = self.tracer.export_spans(spans_path)
+            print(f"Wrote {prometheus_path} and {count} traces to {spans_path}")
+        except OSError as e:
+            print(f"Latency export error: {e}")
+
+    def _dump_events(self, command: str):
+        """Print the flight recorder contents - 'dump' or 'dump <n>'"""
+        parts = command.split()
+        limit = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+        recorder.dump(limit=limit)
+
+    def _profile_command(self, command: str):
+        """'profile start [hz]', 'profile stop [file]' or 'profile report'"""
+        parts = command.split()
+        action = parts[1] if len(parts) > 1 else "report"
+        argument = parts[2] if len(parts) > 2 else None
+
+        if action == "start":
+            rate = float(argument) if argument and argument.replace(".", "", 1).isdigit() else None
+            self.profiler.start(1.0 / rate if rate else None)
+            print(f"Profiling all threads at {1.0 / self.profiler.interval:.0f} Hz")
+        elif action == "stop":
+            self.profiler.stop()
+            self._write_profile(argument or DEFAULT_PROFILE_PATH)
+        elif action == "report":
+            self._show_profile()
+        else:
+            print("Usage: profile start [hz] | profile stop [file] | profile report")
+
+    def _write_profile(self, path: str = DEFAULT_PROFILE_PATH):
+        """Write the collapsed stacks and print the stage breakdown"""
+        try:
+            count = self.profiler.write_collapsed(path)
+            print(f"Wrote {count} stacks to {path} (flamegraph.pl or speedscope)")
+        except OSError as e:
+            print(f"Profile export error: {e}")
+        self._show_profile()
+
+    def _show_profile(self):
+        report = self.profiler.get_report()
+        if not report["samples"]:
+            print("No profile samples")
+            return
+        state = "running" if report["running"] else "stopped"
+        print(f"Profile ({state}): {report['samples']} samples over {report['duration']:.1f}s, "
+              f"sampling overhead {report['overhead'] * 1000:.0f}ms, idle thread samples {report['idle_samples']}")
+        print("Busy samples per stage:")
+        for stage, stats in report["stages"].items():
+            print(f"  {stage:<12} {stats['samples']:>7} {stats['share'] * 100:5.1f}%")
+        print("Top functions:")
+        for entry in report["top_functions"]:
+            print(f"  {entry['samples']:>7} {entry['function']}")
+
+    def get_memory_report(self) -> Dict[str, Any]:
+        """Process memory with the share of the large known consumers"""
+        classifier = self.command_processor.intent_classifier
+        template_bytes = sum(e.nbytes for e in classifier.command_embeddings.values())
+        template_matrix = getattr(classifier, "template_matrix", None)
+        if template_matrix is not None:
+            template_bytes += template_matrix.nbytes
+
+        audio = {"in_flight": 0, "last": 0, "peak": 0}
+        for session in self.hub.sessions.values():
+            if session.recognizer:
+                for key in audio:
+                    audio[key] += session.recognizer.audio_stats[key]
+
+        threads = thread_summary()
+        return {
+            "rss": get_rss(),
+            "model_weights": model_weight_bytes(classifier.sentence_model),
+            "template_embeddings": template_bytes,
+            "audio_buffers": audio,
+            "threads": sum(threads.values()),
+            "thread_groups": threads,
+        }
+
+    def _show_memory(self):
+        report = self.get_memory_report()
+        audio = report["audio_buffers"]
+        print(f"Resident memory:     {format_bytes(report['rss'])}")
+        print(f"Model weights:       {format_bytes(report['model_weights'])}")
+        print(f"Template embeddings: {format_bytes(report['template_embeddings'])}")
+        print(f"Audio buffers:       {format_bytes(audio['in_flight'])} in flight "
+              f"(last utterance {format_bytes(audio['last'])}, peak {format_bytes(audio['peak'])})")
+        print(f"Live threads:        {report['threads']}")
+        for name, count in sorted(report["thread_groups"].items()):
+            print(f"  {name}: {count}")
 
     def _show_available_commands(self):
         """Display all available voice commands"""
@@ -2,25 +2,76 @@
 FIXED CommandProcessor implementation with wake word and command execution
 """
 
+import os
+import tempfile
 import threading
 import queue
 import time
-import pyttsx3
-from typing import Dict, Any, Optional
-from ai import IntentClassifier
+import traceback
+import wave
+from typing import Dict, Any, List, Optional, Callable
+from ai import ActivationState, IntentClassifier
 from commands.command_registry import CommandRegistry
+from flight_recorder import recorder
+from utils import lazy_import
+from .execution_lanes import LaneManager
+from .latency_tracer import LatencyTracer
+from .playback import PlaybackLog
+
+np = lazy_import("numpy")
+
+
+class Utterance:
+    """Text waiting in the command queue, with where it came from and who wants the result"""
+
+    def __init__(self, text: str, trace=None, require_wake_word: bool = True,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None, source: str = "voice",
+                 alternatives: Optional[List[tuple]] = None):
+        self.text = text
+        self.trace = trace
+        self.require_wake_word = require_wake_word
+        self.on_result = on_result  # Called on the processing thread with the classification result
+        self.source = source
+        self.alternatives = alternatives  # N-best (text, ASR score) from speech-to-text, best first
+
+    @classmethod
+    def from_queue_item(cls, item) -> "Utterance":
+        """Accept plain text, (text, trace[, alternatives]) tuples from the speech recognizer, or an Utterance"""
+        if isinstance(item, Utterance):
+            return item
+        if isinstance(item, tuple):
+            text, trace, *alternatives = item
+            return cls(text, trace, alternatives=alternatives[0] if alternatives else None)
+        return cls(item)
 
 
 class CommandProcessor:
-    def __init__(self):
-        self.intent_classifier = IntentClassifier()
+    # Responses waiting to be spoken - older ones are dropped, only recent replies matter
+    TTS_QUEUE_SIZE = 4
+
+    def __init__(self, tracer: Optional[LatencyTracer] = None, intent_classifier: Optional[IntentClassifier] = None,
+                 tts_engine=None, tts_reference: bool = False):
+        # Pass a classifier to share one loaded model between processors
+        self.intent_classifier = intent_classifier or IntentClassifier()
         self.command_registry = CommandRegistry()
+        self.lane_manager = LaneManager()
+        self.tracer = tracer or LatencyTracer()
+        self.event_listeners = []
         self.is_processing = False
-        self._init_tts()
+        self._tts_queue = queue.Queue(maxsize=self.TTS_QUEUE_SIZE)
+        # When the assistant is talking - capture keeps its own voice out of speech-to-text.
+        # With tts_reference each response is synthesized to a waveform first, for echo cancellation.
+        self.playback = PlaybackLog()
+        self.tts_reference = tts_reference
+        self._tts_thread = None
+        self._init_tts(tts_engine)
 
-    def _init_tts(self):
+    def _init_tts(self, tts_engine=None):
         """Initialize text-to-speech engine"""
-        self.tts_engine = pyttsx3.init()
+        if tts_engine is None:
+            import pyttsx3
+            tts_engine = pyttsx3.init()
+        self.tts_engine = tts_engine
         self.tts_engine.setProperty('rate', 150)
         # Test TTS initialization
         try:
@@ -34,104 +85,243 @@ class CommandProcessor:
         """Handle voice responses - ONLY if text is provided"""
         if text and text.strip():  # Only speak if there's actual text
             print(f"ASSISTANT: {text}")
-            try:
-                # Stop any current speech first
+            self.start_tts_worker()
+            while True:
                 try:
-                    self.tts_engine.stop()
-                except:
-                    pass
-
-                # Run TTS in a separate thread to prevent blocking
-                import threading
-                def speak_async():
+                    self._tts_queue.put_nowait(text)
+                    break
+                except queue.Full:
                     try:
-                        self.tts_engine.say(text)
-                        self.tts_engine.runAndWait()
-                    except Exception as e:
-                        print(f"TTS Error: {e}")
+                        dropped = self._tts_queue.get_nowait()
+                        recorder.warning("processor", "TTS backlog - dropping response %r", dropped)
+                    except queue.Empty:
+                        pass
 
-                tts_thread = threading.Thread(target=speak_async, daemon=True)
-                tts_thread.start()
+    def start_tts_worker(self) -> bool:
+        """Start the TTS thread if it is not running - True if it had to be started"""
+        # One TTS thread owns the engine - pyttsx3 engines must not be driven from several threads
+        if self._tts_thread is not None and self._tts_thread.is_alive():
+            return False
+        self._tts_thread = threading.Thread(target=self._tts_loop, name="tts", daemon=True)
+        self._tts_thread.start()
+        return True
 
+    def _tts_loop(self):
+        """Speak queued responses one at a time"""
+        while True:
+            text = self._tts_queue.get()
+            if text is None:
+                return
+            reference, sample_rate = self._synthesize_reference(text) if self.tts_reference else (None, None)
+            playback = self.playback.begin(text, reference, sample_rate)
+            try:
+                self.tts_engine.say(text)
+                self.tts_engine.runAndWait()
             except Exception as e:
-                print(f"TTS Thread Error: {e}")
+                print(f"TTS Error: {e}")
+            finally:
+                self.playback.end(playback)
 
-    def _execute_command(self, result: Dict[str, Any]):
-        """Execute a validated command"""
-        print(f"EXECUTING COMMAND: {result['intent']}")
+    def _synthesize_reference(self, text: str) -> tuple:
+        """(float32 samples, sample rate) of a response, rendered to a file before it is spoken"""
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.tts_engine.save_to_file(text, path)
+            self.tts_engine.runAndWait()
+            with wave.open(path, "rb") as wav:
+                if wav.getsampwidth() != 2:
+                    return None, None
+                frames = wav.readframes(wav.getnframes())
+                channels, sample_rate = wav.getnchannels(), wav.getframerate()
+            samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+            return samples.reshape(-1, channels).mean(axis=1), sample_rate
+        except Exception as e:
+            recorder.warning("processor", "Could not synthesize an echo reference: %s", e)
+            return None, None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
-        # Execute through registry
-        success = self.command_registry.execute_command(
-            result['intent'],
-            result.get('parameters', {})
-        )
+    def _execute_command(self, result: Dict[str, Any], trace=None):
+        """Dispatch a validated command to its execution lane and return immediately"""
+        intent = result['intent']
+        params = result.get('parameters', {})
+        lane = self.command_registry.get_command_lane(intent, params)
+        recorder.info("processor", "Executing %s on the %s lane", intent, lane)
+
+        if trace:
+            trace.set("lane", lane)
+            trace.mark("dispatch")
+        self._emit("dispatched", trace_id=trace.trace_id if trace else None, intent=intent, lane=lane)
+
+        # Execute through registry on the command's lane
+        future = self.lane_manager.submit(lane, self.command_registry.execute_command, intent, params,
+                                          trace=trace)
+        future.add_done_callback(lambda f: self._on_command_done(intent, f, trace))
+        return future
 
-        if success:
-            print(f"Command '{result['intent']}' executed successfully")
+    def _on_command_done(self, intent: str, future, trace=None):
+        """Report the outcome of a command once its lane has run it"""
+        trace_id = trace.trace_id if trace else None
+        if future.cancelled():
+            recorder.warning("processor", "Command '%s' cancelled", intent)
+            if trace:
+                trace.finish("cancelled")
+            self._emit("completed", trace_id=trace_id, intent=intent, success=False, error="cancelled")
+            return
+
+        error = future.exception()
+        if error is None and future.result():
+            recorder.info("processor", "Command '%s' executed successfully", intent)
             # Don't speak responses for commands - only for wake word
         else:
-            print(f"Command '{result['intent']}' failed")
+            recorder.warning("processor", "Command '%s' failed: %s", intent, error or "handler returned False")
             # Don't speak error messages either to avoid interrupting media
 
+        success = error is None and bool(future.result())
+        if trace:
+            trace.finish("ok" if success else "failed")
+        self._emit("completed", trace_id=trace_id, intent=intent, success=success,
+                   error=str(error) if error else None)
+
+    def add_event_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback that receives every pipeline event as a dict"""
+        self.event_listeners.append(listener)
+
+    def remove_event_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Unregister a pipeline event callback"""
+        if listener in self.event_listeners:
+            self.event_listeners.remove(listener)
+
+    def _emit(self, event: str, **data):
+        """Send a pipeline event to all listeners"""
+        if not self.event_listeners:
+            return
+        data["event"] = event
+        data["time"] = time.time()
+        for listener in list(self.event_listeners):
+            try:
+                listener(data)
+            except Exception as e:
+                recorder.error("processor", "Event listener error: %s", e)
+
+    def _begin_utterance(self, utterance: "Utterance"):
+        """Start (or continue) the utterance's trace as it leaves the queue"""
+        trace = utterance.trace or self.tracer.start_trace()
+        utterance.trace = trace
+        trace.mark("queue_wait")
+        trace.set("text", utterance.text)
+        trace.set("source", utterance.source)
+        self._emit("heard", trace_id=trace.trace_id, text=utterance.text, source=utterance.source)
+        return trace
+
+    def _process_utterance(self, utterance: "Utterance", activation: Optional[ActivationState] = None,
+                           encoded: Optional[Dict[str, Any]] = None, trace=None) -> Dict[str, Any]:
+        """Classify one utterance and act on it - returns the classification with a status.
+        activation is the session's activation window, encoded any precomputed embeddings,
+        trace the trace from _begin_utterance if the caller already started it."""
+        trace = trace or self._begin_utterance(utterance)
+
+        recorder.info("processor", "Processing %r from %s", utterance.text, utterance.source)
+
+        try:
+            if utterance.alternatives:
+                # Pick the transcript that reads best as a command - all alternatives in one encoder call
+                text, encoded = self.intent_classifier.rescore_alternatives(
+                    utterance.alternatives, activation, utterance.require_wake_word, encoded
+                )
+                if text != utterance.text:
+                    recorder.info("processor", "Rescored %r -> %r", utterance.text, text)
+                    trace.set("asr_rank", [alt[0] for alt in utterance.alternatives].index(text))
+                    utterance.text = text
+
+            # Process through wake word system (typed/socket text can skip it)
+            if utterance.require_wake_word:
+                result = self.intent_classifier.process_audio_input(utterance.text, activation, encoded)
+            else:
+                result = self.intent_classifier.classify_intent(utterance.text, encoded)
+            trace.mark("classify")
+            trace.set("intent", result['intent'])
+            recorder.info("processor", "Intent: %s (confidence %.2f)", result['intent'], result['confidence'])
+            self._emit("classified", trace_id=trace.trace_id, intent=result['intent'],
+                       confidence=result['confidence'], threshold=result['threshold'])
+
+            # Handle different intent types
+            if result['intent'] == 'ignored':
+                # No wake word detected - do nothing
+                recorder.debug("processor", "No wake word - ignoring")
+                result['status'] = "ignored"
+                trace.finish("ignored")
+
+            elif result['intent'] == 'wake_word_only':
+                # Just wake word, no command
+                recorder.debug("processor", "Wake word only - responding")
+                # Only speak if it needs voice response (Hey Nico)
+                if result.get('needs_voice_response', False):
+                    self._speak(result['response'])
+                result['status'] = "wake_word"
+                trace.finish("wake_word")
+
+            elif result['confidence'] >= result['threshold']:
+                # Valid command with good confidence
+                recorder.debug("processor", "Command meets threshold - executing: %s (%.3f >= %s)",
+                               result['intent'], result['confidence'], result['threshold'])
+                result['status'] = "dispatched"
+                result['future'] = self._execute_command(result, trace)
+
+            else:
+                # Low confidence command - don't speak to avoid interrupting
+                recorder.debug("processor", "Low confidence - %.2f < %s", result['confidence'], result['threshold'])
+                result['status'] = "low_confidence"
+                trace.finish("low_confidence")
+
+        except Exception as e:
+            trace.finish("error")
+            recorder.error("processor", "Command processing failed: %s\n%s", e, traceback.format_exc())
+            result = {"intent": "unknown", "confidence": 0.0, "parameters": {}, "threshold": 0.0,
+                      "status": "error", "error": str(e)}
+
+        result['trace_id'] = trace.trace_id
+        recorder.debug("processor", "Command processing complete")
+        return result
+
     def process_commands(self, command_queue: queue.Queue):
         """Main processing loop - SIMPLIFIED"""
-        print("DEBUG: Command processor thread started")
+        recorder.info("processor", "Command processor thread started")
         while self.is_processing:
             try:
-                text = command_queue.get(timeout=1)
-                print(f"\n=== PROCESSING COMMAND ===")
-                print(f"Heard: {text}")
-
-                try:
-                    # Process through wake word system
-                    result = self.intent_classifier.process_audio_input(text)
-                    print(f"Intent: {result['intent']} (Confidence: {result['confidence']:.2f})")
-
-                    # Handle different intent types
-                    if result['intent'] == 'ignored':
-                        # No wake word detected - do nothing
-                        print("DEBUG: No wake word - ignoring")
-
-                    elif result['intent'] == 'wake_word_only':
-                        # Just wake word, no command
-                        print("DEBUG: Wake word only - responding")
-                        # Only speak if it needs voice response (Hey Nico)
-                        if result.get('needs_voice_response', False):
-                            self._speak(result['response'])
-
-                    elif result['confidence'] >= result['threshold']:
-                        # Valid command with good confidence
-                        print(f"DEBUG: Command meets threshold - executing: {result['intent']}")
-                        print(f"DEBUG: Confidence: {result['confidence']:.3f} >= Threshold: {result['threshold']}")
-                        self._execute_command(result)
-
-                    else:
-                        # Low confidence command - don't speak to avoid interrupting
-                        print(f"DEBUG: Low confidence - {result['confidence']:.2f} < {result['threshold']}")
-
-                except Exception as e:
-                    print(f"ERROR in command processing: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-                print("DEBUG: Command processing complete")
+                utterance = Utterance.from_queue_item(command_queue.get(timeout=1))
+                self._deliver(utterance, self._process_utterance(utterance))
                 command_queue.task_done()
 
             except queue.Empty:
                 # This is normal - just continue
                 continue
             except Exception as e:
-                print(f"CRITICAL ERROR in command loop: {e}")
-                import traceback
-                traceback.print_exc()
+                recorder.error("processor", "Command loop error: %s\n%s", e, traceback.format_exc())
                 try:
                     command_queue.task_done()
                 except:
                     pass
 
-    def start_processing(self, command_queue: queue.Queue):
-        """Start the processing thread"""
+    @staticmethod
+    def _deliver(utterance: "Utterance", result: Dict[str, Any]):
+        """Hand the result to whoever submitted the utterance"""
+        if utterance.on_result:
+            try:
+                utterance.on_result(result)
+            except Exception as e:
+                recorder.error("processor", "Result callback error: %s", e)
+
+    def start_processing(self, command_queue: Optional[queue.Queue] = None):
+        """Start the execution lanes and, given a queue, a thread processing it"""
         self.is_processing = True
+        self.lane_manager.start()
+        if command_queue is None:
+            return None  # Utterances are fed in by a session hub
         process_thread = threading.Thread(
             target=self.process_commands,
             args=(command_queue,),
@@ -143,6 +333,17 @@ class CommandProcessor:
     def stop_processing(self):
         """Stop command processing"""
         self.is_processing = False
+        self.lane_manager.stop()
+        if self._tts_thread is not None and self._tts_thread.is_alive():
+            try:
+                self._tts_queue.put_nowait(None)
+            except queue.Full:
+                pass  # Daemon thread - it ends with the process
+            self._tts_thread = None
+
+    def get_lane_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and execution time for each execution lane"""
+        return self.lane_manager.get_stats()
 
     def print_commands(self):
         """Debug: Show registered commands"""
@@ -0,0 +1,388 @@
+"""
+Control server - local Unix-domain socket API for running the assistant headless
+
+Clients send newline-delimited JSON requests and receive newline-delimited JSON
+responses. All connections are served from one selector loop, requests can be
+pipelined (responses carry the request id), and results produced on the
+processing or lane threads are handed back to the loop through a wakeup socket.
+
+Requests:
+    {"id": 1, "op": "utterance", "text": "open calculator"}
+        Optional "wake_word": true to apply the wake word rules like speech,
+        "wait": false to reply after classification without waiting for
+        the handler to finish, and "session": "kitchen" to route the text to
+        another session (room) than the main one.
+    {"id": 2, "op": "status"}
+    {"id": 3, "op": "subscribe"} / {"id": 4, "op": "unsubscribe"}
+        Stream pipeline events ({"event": "heard" | "classified" | ...}).
+    {"id": 5, "op": "ping"}
+    {"id": 6, "op": "add_session", "session": "kitchen"}
+        Optional "microphone": true and "device_index" to listen on a microphone.
+    {"id": 7, "op": "remove_session", "session": "kitchen"}
+
+The socket is created in $XDG_RUNTIME_DIR, or else in a private (0700)
+directory under the temp dir, and is only accessible to its owner. A socket
+that still answers belongs to another instance and is never replaced.
+"""
+
+import collections
+import json
+import os
+import queue
+import selectors
+import socket
+import stat
+import tempfile
+from typing import Dict, Any, Optional
+
+from flight_recorder import recorder
+from .command_processor import Utterance
+from .session_hub import DEFAULT_SESSION
+
+SOCKET_NAME = "voice-assistant.sock"
+
+
+def _private_temp_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), f"voice-assistant-{os.getuid()}")
+
+
+def default_socket_path() -> str:
+    """The control socket in the user's runtime directory, or in a private directory under the temp dir"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join(_private_temp_dir(), SOCKET_NAME)
+
+
+def _ensure_private_dir(path: str):
+    """Create the directory 0700 if needed - refuse one that someone else owns or others can open"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError(f"Socket directory {path} is not private to this user")
+
+
+class _Client:
+    """Per-connection buffers"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.subscribed = False
+        self.closed = False
+
+
+class ControlServer:
+    """Selector-based NDJSON server on a Unix-domain socket"""
+
+    def __init__(self, assistant, socket_path: Optional[str] = None, max_buffer: int = 1 << 20):
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("Unix-domain sockets are not supported on this platform")
+
+        self.assistant = assistant
+        self.socket_path = socket_path or default_socket_path()
+        # Limit on a client's unread input and unsent output - events are dropped past it,
+        # and a client that sends an endless line or never reads its replies is disconnected
+        self.max_buffer = max_buffer
+        self.selector = selectors.DefaultSelector()
+        self.clients = set()
+        self.is_serving = False
+
+        # Messages produced on other threads, delivered by the loop
+        self._outbox = collections.deque()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+
+        self._listener = None
+        self._socket_id = None  # (device, inode) of the socket file this server created
+
+    def serve_forever(self):
+        """Run the server loop until shutdown() is called"""
+        if os.path.dirname(os.path.abspath(self.socket_path)) == _private_temp_dir():
+            _ensure_private_dir(_private_temp_dir())  # Anyone can create entries in the temp dir itself
+        self._remove_stale_socket()
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created owner-only - there is no window in which others can connect
+        old_umask = os.umask(0o177)
+        try:
+            self._listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        info = os.stat(self.socket_path)
+        self._socket_id = (info.st_dev, info.st_ino)
+        self._listener.listen(64)
+        self._listener.setblocking(False)
+
+        self.selector.register(self._listener, selectors.EVENT_READ, "accept")
+        self.selector.register(self._wake_recv, selectors.EVENT_READ, "wake")
+        self.assistant.command_processor.add_event_listener(self._on_pipeline_event)
+
+        print(f"Control socket listening on {self.socket_path}")
+        self.is_serving = True
+        try:
+            while self.is_serving:
+                for key, mask in self.selector.select(timeout=None):
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_outbox()
+                    else:
+                        client = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._read(client)
+                        if mask & selectors.EVENT_WRITE and not client.closed:
+                            self._write(client)
+        finally:
+            self._close_all()
+
+    def shutdown(self):
+        """Stop the server loop - safe to call from any thread or a signal handler"""
+        self.is_serving = False
+        self._wakeup()
+
+    def _remove_stale_socket(self):
+        """Remove a socket left by a crashed run - refuse to touch one that is in use or is not a socket"""
+        try:
+            info = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(info.st_mode):
+            raise RuntimeError(f"{self.socket_path} exists and is not a socket")
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass  # Nobody is listening
+        else:
+            raise RuntimeError(f"Another instance is serving {self.socket_path}")
+        finally:
+            probe.close()
+        os.unlink(self.socket_path)
+        recorder.info("control", "Removed stale socket %s", self.socket_path)
+
+    def _owns_socket_file(self) -> bool:
+        try:
+            info = os.stat(self.socket_path)
+        except OSError:
+            return False
+        return (info.st_dev, info.st_ino) == self._socket_id
+
+    # ---- Loop internals ----
+
+    def _wakeup(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already a wakeup pending
+
+    def _post(self, client: Optional[_Client], message: Dict[str, Any]):
+        """Queue a message for delivery by the loop (client None broadcasts to subscribers)"""
+        self._outbox.append((client, message))
+        self._wakeup()
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self.clients.add(client)
+        self.selector.register(sock, selectors.EVENT_READ, client)
+        recorder.info("control", "Client connected (%d total)", len(self.clients))
+
+    def _close(self, client: _Client):
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.discard(client)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+        recorder.info("control", "Client disconnected (%d total)", len(self.clients))
+
+    def _close_all(self):
+        self.assistant.command_processor.remove_event_listener(self._on_pipeline_event)
+        for client in list(self.clients):
+            self._close(client)
+        for sock in (self._listener, self._wake_recv, self._wake_send):
+            if sock:
+                try:
+                    self.selector.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+                sock.close()
+        self.selector.close()
+        if self._owns_socket_file():
+            os.unlink(self.socket_path)  # Not if another instance has since replaced it
+
+    def _read(self, client: _Client):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(client)
+            return
+
+        client.inbuf += data
+        while b"\n" in client.inbuf:
+            line, _, rest = client.inbuf.partition(b"\n")
+            client.inbuf = bytearray(rest)
+            if line.strip():
+                self._handle_line(client, bytes(line))
+        if len(client.inbuf) > self.max_buffer:
+            recorder.warning("control", "Request longer than %d bytes - disconnecting client", self.max_buffer)
+            self._close(client)
+
+    def _write(self, client: _Client):
+        try:
+            sent = client.sock.send(client.outbuf)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._close(client)
+            return
+        del client.outbuf[:sent]
+        if not client.outbuf:
+            self.selector.modify(client.sock, selectors.EVENT_READ, client)
+
+    def _send(self, client: _Client, message: Dict[str, Any], droppable: bool = False):
+        """Append a message to the client's output buffer"""
+        if client.closed:
+            return
+        if len(client.outbuf) > self.max_buffer:
+            if droppable:
+                return  # Slow reader - drop streamed events rather than grow without bound
+            recorder.warning("control", "Client is not reading its replies - disconnecting")
+            self._close(client)
+            return
+        was_empty = not client.outbuf
+        client.outbuf += (json.dumps(message, default=str) + "\n").encode("utf-8")
+        if was_empty:
+            self.selector.modify(client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    def _drain_outbox(self):
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+        while self._outbox:
+            client, message = self._outbox.popleft()
+            if client is None:
+                for subscriber in [c for c in self.clients if c.subscribed]:
+                    self._send(subscriber, message, droppable=True)
+            else:
+                self._send(client, message)
+
+    # ---- Requests ----
+
+    def _handle_line(self, client: _Client, line: bytes):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self._send(client, {"ok": False, "error": f"invalid request: {e}"})
+            return
+
+        request_id = request.get("id")
+        op = request.get("op")
+
+        if op == "utterance":
+            self._handle_utterance(client, request)
+        elif op == "status":
+            self._send(client, {"id": request_id, "ok": True, "status": self.assistant.get_status()})
+        elif op in ("subscribe", "unsubscribe"):
+            client.subscribed = op == "subscribe"
+            self._send(client, {"id": request_id, "ok": True, "subscribed": client.subscribed})
+        elif op == "ping":
+            self._send(client, {"id": request_id, "ok": True})
+        elif op in ("add_session", "remove_session"):
+            self._handle_session_op(client, request)
+        else:
+            self._send(client, {"id": request_id, "ok": False, "error": f"unknown op: {op}"})
+
+    def _handle_utterance(self, client: _Client, request: Dict[str, Any]):
+        request_id = request.get("id")
+        text = request.get("text")
+        if not isinstance(text, str) or not text.strip():
+            self._send(client, {"id": request_id, "ok": False, "error": "missing text"})
+            return
+
+        session = self.assistant.hub.get_session(request.get("session") or DEFAULT_SESSION)
+        if session is None:
+            self._send(client, {"id": request_id, "ok": False, "error": f"unknown session: {request.get('session')}"})
+            return
+
+        wait = request.get("wait", True)
+
+        def on_result(result: Dict[str, Any]):
+            # Runs on the processing thread
+            future = result.pop("future", None)
+            response = {"id": request_id, "ok": True, "result": result}
+            if future is None or not wait:
+                self._post(client, response)
+                return
+
+            def on_done(f):
+                # Runs on the lane thread that executed the handler
+                if f.cancelled():
+                    response["success"] = False
+                    response["error"] = "cancelled"
+                elif f.exception() is not None:
+                    response["success"] = False
+                    response["error"] = str(f.exception())
+                else:
+                    response["success"] = bool(f.result())
+                self._post(client, response)
+
+            future.add_done_callback(on_done)
+
+        try:
+            session.queue.put_nowait(Utterance(
+                text.strip(),
+                require_wake_word=bool(request.get("wake_word", False)),
+                on_result=on_result,
+                source="socket"
+            ))
+        except queue.Full:
+            self._send(client, {"id": request_id, "ok": False, "error": "busy: command queue is full"})
+
+    def _handle_session_op(self, client: _Client, request: Dict[str, Any]):
+        request_id = request.get("id")
+        session_id = request.get("session")
+        if not isinstance(session_id, str) or not session_id:
+            self._send(client, {"id": request_id, "ok": False, "error": "missing session"})
+            return
+
+        try:
+            if request["op"] == "add_session":
+                # Opening a microphone takes a moment - acceptable for an administrative request
+                self.assistant.add_session(session_id, bool(request.get("microphone", False)),
+                                           request.get("device_index"))
+                ok = True
+            else:
+                ok = self.assistant.remove_session(session_id)
+        except Exception as e:
+            self._send(client, {"id": request_id, "ok": False, "error": str(e)})
+            return
+        self._send(client, {"id": request_id, "ok": ok, "session": session_id})
+
+    def _on_pipeline_event(self, event: Dict[str, Any]):
+        # Runs on pipeline threads - hand off to the loop
+        if any(c.subscribed for c in list(self.clients)):
+            self._post(None, event)
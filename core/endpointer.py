@@ -0,0 +1,136 @@
+"""
+Adaptive endpointing - decide how much trailing silence ends an utterance
+
+A fixed pause threshold makes "mute" wait as long for the end of speech as a
+dictated sentence. The endpointer shortens the pause when the phrase so far
+is short and clearly voiced, ends it as soon as a speculative transcript of
+the audio already reads as a complete command, and lengthens it when that
+transcript is a dictation command (write, search, ...) whose content may
+still be coming.
+
+Times are audio-stream seconds, so the policy behaves the same on a live
+microphone and on recorded audio. An endpoint counts as too early when
+speech resumes before the base pause would have ended the utterance.
+"""
+
+import threading
+from typing import Dict, Any, Optional
+
+# Why an utterance was ended
+BASE = "base"            # The normal pause threshold
+SHORT = "short"          # Short, clearly voiced phrase
+COMMAND = "command"      # Speculative transcript is a complete command
+DICTATION = "dictation"  # Speculative transcript is a dictation command - waited longer
+REASONS = (BASE, SHORT, COMMAND, DICTATION)
+
+
+class AdaptiveEndpointer:
+    """Per-phrase endpoint decisions plus endpointing latency and early cut-off counters"""
+
+    def __init__(self, base_pause: float = 0.8, short_pause: float = 0.35, command_pause: float = 0.2,
+                 dictation_pause: float = 1.4, short_phrase: float = 1.2, min_voiced_ratio: float = 0.6,
+                 speculate_after: float = 0.2):
+        self.base_pause = base_pause              # Silence that ends any utterance
+        self.short_pause = short_pause            # ... a short, clearly voiced one
+        self.command_pause = command_pause        # ... one already transcribed as a complete command
+        self.dictation_pause = dictation_pause    # ... one transcribed as a dictation command
+        self.short_phrase = short_phrase          # Longest speech still treated as a short command
+        self.min_voiced_ratio = min_voiced_ratio  # Share of the phrase above the energy threshold
+        self.speculate_after = speculate_after    # Silence before the audio so far is transcribed speculatively
+
+        self._lock = threading.Lock()
+        self.stats = {reason: {"count": 0, "silence": 0.0, "early": 0} for reason in REASONS}
+        self._last_endpoint = None  # (reason, audio time of the last voiced chunk) while an early cut-off is possible
+        self._reset_phrase(0.0)
+
+    def _reset_phrase(self, now: float):
+        self.onset = now
+        self.last_voiced = now
+        self.voiced = 0.0
+        self.length = 0.0
+        self.partial = None  # (voiced seconds it covers, intent, is_dictation)
+        self.dictation = False  # Sticks once a transcript showed a dictation command - its content keeps coming
+        self.pending = False    # A speculative transcript is on its way
+
+    def start_phrase(self, now: float):
+        """Speech started at audio time now"""
+        with self._lock:
+            if self._last_endpoint is not None:
+                reason, last_voiced = self._last_endpoint
+                if now - last_voiced < self.base_pause:
+                    self.stats[reason]["early"] += 1  # Still talking - a fixed pause would have waited
+                self._last_endpoint = None
+        self._reset_phrase(now)
+
+    def add_chunk(self, now: float, seconds: float, voiced: bool):
+        """One captured chunk ending at audio time now"""
+        self.length += seconds
+        if voiced:
+            self.voiced += seconds
+            self.last_voiced = now
+            self.partial = None  # The speech outgrew any speculative transcript
+
+    @property
+    def silence(self) -> float:
+        return self.onset + self.length - self.last_voiced
+
+    def should_speculate(self) -> bool:
+        """Whether the audio so far is worth transcribing before the utterance has ended"""
+        return (self.silence >= self.speculate_after and self.partial is None and not self.dictation
+                and self.voiced <= self.short_phrase * 2)
+
+    def speculation_started(self):
+        self.pending = True
+
+    def set_partial(self, covered_voiced: float, match: Optional[tuple]):
+        """Result of a speculative transcript of the first covered_voiced seconds of speech.
+        match is (intent, is_dictation) or None."""
+        self.pending = False
+        if match and match[1]:
+            self.dictation = True
+        if covered_voiced == self.voiced:
+            self.partial = (covered_voiced, match[0], match[1]) if match else (covered_voiced, None, False)
+
+    def pause_for(self) -> tuple:
+        """(reason, silence that ends this phrase) given what is known so far"""
+        if self.dictation:
+            return DICTATION, self.dictation_pause
+        if self.partial and self.partial[1]:
+            return COMMAND, self.command_pause
+        speech = self.last_voiced - self.onset
+        if speech <= self.short_phrase and speech > 0 and self.voiced / speech >= self.min_voiced_ratio:
+            # A transcript on its way may still show dictation - wait for it, up to the base pause
+            return SHORT, (self.base_pause if self.pending else self.short_pause)
+        return BASE, self.base_pause
+
+    def check(self) -> Optional[str]:
+        """Reason to end the phrase now, or None to keep listening"""
+        reason, pause = self.pause_for()
+        return reason if self.silence >= pause else None
+
+    def end_phrase(self, reason: str):
+        """Record an endpoint - silence is how long the end of speech waited"""
+        with self._lock:
+            stats = self.stats[reason]
+            stats["count"] += 1
+            stats["silence"] += self.silence
+            self._last_endpoint = (reason, self.last_voiced) if self.silence < self.base_pause else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reasons = {reason: dict(stats) for reason, stats in self.stats.items()}
+        total = sum(stats["count"] for stats in reasons.values())
+        early = sum(stats["early"] for stats in reasons.values())
+        silence = sum(stats["silence"] for stats in reasons.values())
+        for stats in reasons.values():
+            count = stats["count"]
+            stats["avg_silence"] = stats.pop("silence") / count if count else 0.0
+            stats["early_rate"] = stats["early"] / count if count else 0.0
+        return {
+            "endpoints": total,
+            "avg_silence": silence / total if total else 0.0,
+            "saved_per_utterance": self.base_pause - silence / total if total else 0.0,
+            "early": early,
+            "early_rate": early / total if total else 0.0,
+            "reasons": reasons,
+        }
@@ -0,0 +1,177 @@
+"""
+Execution lanes - run command handlers off the processing thread
+
+Each lane owns a small pool of worker threads dedicated to one kind of
+resource, so a slow handler only delays commands that compete for the same
+resource instead of the classifier loop.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Optional
+
+# Lane names used by command declarations
+KEYBOARD_LANE = "keyboard"  # Serialized - keyboard focus is a single shared resource
+PROCESS_LANE = "process"    # Parallel - launching processes never interfere with each other
+SYSTEM_LANE = "system"      # System queries and power operations
+
+# Number of worker threads per lane
+DEFAULT_LANE_WORKERS = {
+    KEYBOARD_LANE: 1,
+    PROCESS_LANE: 4,
+    SYSTEM_LANE: 1,
+}
+
+
+class ExecutionLane:
+    """Queue plus worker threads that execute handlers for one resource"""
+
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._sentinels = 0  # Stop markers queued for workers - not handlers
+        self.is_running = False
+
+        # Statistics
+        self.active = 0
+        self.executed = 0
+        self.failed = 0
+        self.total_wait_time = 0.0
+        self.total_exec_time = 0.0
+        self.max_exec_time = 0.0
+        self.last_exec_time = 0.0
+
+    def start(self):
+        """Start the lane worker threads"""
+        if self.is_running:
+            return
+        self.is_running = True
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"lane-{self.name}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop the lane - queued work that has not started is cancelled"""
+        with self._lock:
+            self.is_running = False  # From here on submit refuses work, so nothing queues behind the sentinels
+        while True:
+            try:
+                future, _, _, _, _ = self._queue.get_nowait()
+                future.cancel()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._sentinels += len(self._threads)
+        for _ in self._threads:
+            self._queue.put(None)
+        self._threads = []
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue a handler call and return a future for its result - already cancelled if the lane is stopped"""
+        future = Future()
+        with self._lock:
+            if self.is_running:
+                self._queue.put((future, func, args, kwargs, time.perf_counter()))
+                return future
+        future.cancel()
+        return future
+
+    def _worker(self):
+        """Worker loop - executes queued handlers one at a time"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                with self._lock:
+                    self._sentinels -= 1
+                break
+
+            future, func, args, kwargs, queued_at = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started = time.perf_counter()
+            with self._lock:
+                self.active += 1
+                self.total_wait_time += started - queued_at
+
+            failed = False
+            try:
+                result = func(*args, **kwargs)
+                failed = result is False
+                future.set_result(result)
+            except BaseException as e:
+                failed = True
+                future.set_exception(e)
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.active -= 1
+                self.executed += 1
+                if failed:
+                    self.failed += 1
+                self.total_exec_time += elapsed
+                self.last_exec_time = elapsed
+                self.max_exec_time = max(self.max_exec_time, elapsed)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of handlers waiting for a worker"""
+        return max(0, self._queue.qsize() - self._sentinels)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of lane statistics"""
+        with self._lock:
+            executed = self.executed
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "active": self.active,
+                "executed": executed,
+                "failed": self.failed,
+                "avg_wait_time": self.total_wait_time / executed if executed else 0.0,
+                "avg_exec_time": self.total_exec_time / executed if executed else 0.0,
+                "max_exec_time": self.max_exec_time,
+                "last_exec_time": self.last_exec_time,
+            }
+
+
+class LaneManager:
+    """Owns the execution lanes and routes handler calls to them"""
+
+    def __init__(self, lane_workers: Optional[Dict[str, int]] = None, default_lane: str = SYSTEM_LANE):
+        lane_workers = lane_workers or DEFAULT_LANE_WORKERS
+        self.lanes = {name: ExecutionLane(name, workers) for name, workers in lane_workers.items()}
+        self.default_lane = default_lane
+
+    def start(self):
+        """Start all lanes"""
+        for lane in self.lanes.values():
+            lane.start()
+
+    def stop(self):
+        """Stop all lanes"""
+        for lane in self.lanes.values():
+            lane.stop()
+
+    def get_lane(self, name: Optional[str]) -> ExecutionLane:
+        """Get a lane by name, falling back to the default lane"""
+        return self.lanes.get(name) or self.lanes[self.default_lane]
+
+    def submit(self, lane_name: Optional[str], func: Callable, *args, **kwargs) -> Future:
+        """Dispatch a handler call to the named lane"""
+        return self.get_lane(lane_name).submit(func, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics for every lane"""
+        return {name: lane.get_stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,160 @@
+"""
+Idle governor - give memory and CPU back while nobody is talking
+
+After a quiet period the governor puts its components to sleep: the encoder
+is released (the template embeddings and the fast n-gram tier stay) and the
+microphone gate is tightened so noise no longer reaches speech-to-text. The
+pipeline threads already block without polling, so an idle process makes no
+periodic wakeups apart from audio capture.
+
+The first activity wakes everything again on the governor thread, overlapping
+with speech-to-text. Each resume is timed against a budget and reported.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import sys
+import threading
+import time
+from typing import Dict, Any, Callable
+
+from flight_recorder import recorder
+from profiler import get_rss
+
+ACTIVE = "active"
+IDLE = "idle"
+
+
+def trim_heap() -> bool:
+    """Return freed heap pages to the OS (glibc only) - Python frees memory but malloc keeps it"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
+
+
+class IdleGovernor:
+    """Sends components to sleep after idle_after quiet seconds and wakes them on activity"""
+
+    def __init__(self, idle_after: float = 300.0, resume_budget: float = 1.5):
+        self.idle_after = idle_after        # Quiet seconds before going idle
+        self.resume_budget = resume_budget  # Seconds a resume may take before it is reported as slow
+        self.components = {}  # Name -> (on_idle, on_resume)
+        self.state = ACTIVE
+        self.is_running = False
+        self.stats = {"idle_entries": 0, "resumes": 0, "over_budget": 0, "last_resume": 0.0,
+                      "max_resume": 0.0, "idle_time": 0.0, "last_freed": 0, "resume_times": {}}
+        self._last_activity = time.monotonic()
+        self._idle_since = None
+        self._woken_at = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_component(self, name: str, on_idle: Callable[[], Any], on_resume: Callable[[], Any]):
+        """Register something to put to sleep - components resume in registration order"""
+        self.components[name] = (on_idle, on_resume)
+
+    def start(self):
+        if not self.idle_after:
+            return  # Disabled
+        self.is_running = True
+        self._last_activity = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="idle-governor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._event.set()
+
+    @property
+    def is_idle(self) -> bool:
+        return self.state == IDLE
+
+    def activity(self):
+        """Called on any sign of use - cheap, never blocks"""
+        now = time.monotonic()
+        self._last_activity = now
+        if self.state == IDLE and self._woken_at is None:
+            self._woken_at = now
+            self._event.set()
+
+    def _run(self):
+        while self.is_running:
+            if self.state == ACTIVE:
+                remaining = self._last_activity + self.idle_after - time.monotonic()
+                if remaining > 0:
+                    self._event.wait(remaining)  # One wakeup per quiet period, not a poll
+                    self._event.clear()
+                    continue
+                self._enter_idle()
+            else:
+                self._event.wait()
+                self._event.clear()
+                if self.is_running and self._woken_at is not None:
+                    self._resume()
+
+    def _enter_idle(self):
+        entered = time.monotonic()
+        rss_before = get_rss()
+        for name, (on_idle, _) in self.components.items():
+            try:
+                on_idle()
+            except Exception as e:
+                recorder.error("idle", "Could not idle '%s': %s", name, e)
+        gc.collect()
+        trim_heap()
+        rss_after = get_rss()
+
+        with self._lock:
+            self.state = IDLE
+            self._idle_since = time.monotonic()
+            self.stats["idle_entries"] += 1
+            self.stats["last_freed"] = (rss_before - rss_after) if rss_before and rss_after else 0
+            if self._last_activity > entered:
+                self._woken_at = self._last_activity  # Activity arrived while going idle
+                self._event.set()
+        recorder.info("idle", "Idle after %.0fs quiet - freed %d bytes", self.idle_after, self.stats["last_freed"])
+
+    def _resume(self):
+        times = {}
+        for name, (_, on_resume) in self.components.items():
+            started = time.perf_counter()
+            try:
+                on_resume()
+            except Exception as e:
+                recorder.error("idle", "Could not resume '%s': %s", name, e)
+            times[name] = time.perf_counter() - started
+
+        now = time.monotonic()
+        elapsed = now - self._woken_at  # From the first activity, as the user experiences it
+        with self._lock:
+            self.stats["idle_time"] += self._woken_at - self._idle_since
+            self.stats["resumes"] += 1
+            self.stats["last_resume"] = elapsed
+            self.stats["max_resume"] = max(self.stats["max_resume"], elapsed)
+            self.stats["resume_times"] = times
+            if elapsed > self.resume_budget:
+                self.stats["over_budget"] += 1
+            self.state = ACTIVE
+            self._woken_at = None
+            self._last_activity = now
+        log = recorder.warning if elapsed > self.resume_budget else recorder.info
+        log("idle", "Resumed in %.0f ms (budget %.0f ms)", elapsed * 1000, self.resume_budget * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["resume_times"] = dict(stats["resume_times"])
+            if self.state == IDLE and self._idle_since is not None:
+                stats["idle_time"] += time.monotonic() - self._idle_since
+        stats["state"] = self.state
+        stats["enabled"] = bool(self.idle_after)
+        stats["idle_after"] = self.idle_after
+        stats["resume_budget"] = self.resume_budget
+        stats["quiet_for"] = time.monotonic() - self._last_activity
+        return stats
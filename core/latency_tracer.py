@@ -0,0 +1,220 @@
+"""
+Latency tracing - per-utterance stage timestamps aggregated into histograms
+
+Every utterance gets a Trace when it is captured. Pipeline components mark the
+end of each stage on the trace, and the finished trace feeds per-stage latency
+histograms that can be exported in Prometheus text format or as JSONL spans.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+# Stage names, in pipeline order
+STAGES = [
+    "endpointing",  # Silence the recognizer waits for before ending the utterance
+    "asr",          # Speech-to-text
+    "queue_wait",   # Waiting in the command queue
+    "classify",     # Wake word check and intent classification
+    "dispatch",     # Threshold checks and handing off to an execution lane
+    "lane_wait",    # Waiting for a lane worker
+    "handler",      # Running the command handler
+]
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Trace:
+    """Timestamps for one utterance as it moves through the pipeline"""
+
+    def __init__(self, tracer: "LatencyTracer", started_at: Optional[float] = None):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.marks = [("start", started_at if started_at is not None else time.perf_counter())]
+        self.attributes = {}
+        self.finished = False
+
+    def mark(self, stage: str):
+        """Record that a stage has just finished"""
+        self.marks.append((stage, time.perf_counter()))
+
+    def set(self, key: str, value: Any):
+        """Attach an attribute (text, intent, ...) to the trace"""
+        self.attributes[key] = value
+
+    def finish(self, status: str = "ok"):
+        """Complete the trace and hand it to the tracer - only the first call counts"""
+        if self.finished:
+            return
+        self.finished = True
+        self.attributes["status"] = status
+        self.tracer.record(self)
+
+    def get_spans(self) -> List[Dict[str, Any]]:
+        """Stage spans, each running from the previous mark to the stage's mark"""
+        spans = []
+        for (_, start), (stage, end) in zip(self.marks, self.marks[1:]):
+            spans.append({"stage": stage, "start": start, "end": end, "duration": end - start})
+        return spans
+
+    @property
+    def duration(self) -> float:
+        """Time from the first mark to the last"""
+        return self.marks[-1][1] - self.marks[0][1]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram plus a window of recent samples for percentiles"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        """Add one sample"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, pct: float) -> float:
+        """Percentile over the recent sample window"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def cumulative_counts(self) -> List[int]:
+        """Counts per bucket in Prometheus (cumulative) form, ending with +Inf"""
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class LatencyTracer:
+    """Creates traces and aggregates finished ones into per-stage histograms"""
+
+    def __init__(self, spans_path: Optional[str] = None, keep_traces: int = 500):
+        self.spans_path = spans_path  # Optional JSONL file every finished trace is appended to
+        self.histograms = {}
+        self.recent_traces = deque(maxlen=keep_traces)
+        self._lock = threading.Lock()
+
+        # perf_counter is only meaningful relative to itself - keep an offset for wall-clock export
+        self._epoch_offset = time.time() - time.perf_counter()
+
+    def start_trace(self, started_at: Optional[float] = None) -> Trace:
+        """Start a trace for a new utterance"""
+        return Trace(self, started_at)
+
+    def record(self, trace: Trace):
+        """Aggregate a finished trace"""
+        spans = trace.get_spans()
+        with self._lock:
+            for span in spans:
+                self._get_histogram(span["stage"]).observe(span["duration"])
+            self._get_histogram("total").observe(trace.duration)
+            self.recent_traces.append(trace)
+
+            if self.spans_path:
+                try:
+                    with open(self.spans_path, "a", encoding="utf-8") as f:
+                        self._write_spans(f, trace)
+                except OSError as e:
+                    print(f"Span export error: {e}")
+
+    def _get_histogram(self, stage: str) -> LatencyHistogram:
+        if stage not in self.histograms:
+            self.histograms[stage] = LatencyHistogram()
+        return self.histograms[stage]
+
+    def _ordered_stages(self) -> List[str]:
+        """Known stages in pipeline order, then any others, then the total"""
+        names = [stage for stage in STAGES if stage in self.histograms]
+        names += sorted(stage for stage in self.histograms if stage not in STAGES and stage != "total")
+        if "total" in self.histograms:
+            names.append("total")
+        return names
+
+    def _write_spans(self, f, trace: Trace):
+        for span in trace.get_spans():
+            record = {
+                "trace_id": trace.trace_id,
+                "stage": span["stage"],
+                "start": span["start"] + self._epoch_offset,
+                "end": span["end"] + self._epoch_offset,
+                "duration_ms": span["duration"] * 1000,
+            }
+            record.update(trace.attributes)
+            f.write(json.dumps(record) + "\n")
+
+    def export_spans(self, path: str) -> int:
+        """Write the recent traces as JSONL spans, returns the number of traces written"""
+        with self._lock:
+            traces = list(self.recent_traces)
+        with open(path, "w", encoding="utf-8") as f:
+            for trace in traces:
+                self._write_spans(f, trace)
+        return len(traces)
+
+    def export_prometheus(self, path: str):
+        """Write the histograms in Prometheus text exposition format (atomically)"""
+        lines = [
+            "# HELP assistant_stage_latency_seconds Per-utterance pipeline stage latency",
+            "# TYPE assistant_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            for stage in self._ordered_stages():
+                histogram = self.histograms[stage]
+                bounds = [repr(b) for b in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f'assistant_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'assistant_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'assistant_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def get_durations_since(self, completed: int) -> tuple:
+        """Total durations of traces finished after the first `completed` ones (as far as
+        they are still kept) - returns the new completed count and the durations"""
+        with self._lock:
+            total = self.histograms.get("total")
+            count = total.count if total else 0
+            new = min(count - completed, len(self.recent_traces))
+            traces = list(self.recent_traces)[-new:] if new > 0 else []
+        return count, [trace.duration for trace in traces]
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean, p50, p95 and p99 per stage"""
+        summary = {}
+        with self._lock:
+            for stage in self._ordered_stages():
+                histogram = self.histograms[stage]
+                summary[stage] = {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "p99": histogram.percentile(99),
+                }
+        return summary
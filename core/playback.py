@@ -0,0 +1,134 @@
+"""
+Playback log - when the assistant is talking, and what it is saying
+
+The TTS thread records an interval for every response it plays, optionally
+with the synthesized waveform. Capture uses the log to keep the assistant's
+own voice out of speech-to-text: audio captured during playback (plus a short
+tail for device latency and room echo) is held to a stricter onset threshold
+or ignored, and with a reference waveform an NLMS echo canceller can subtract
+the echo before the energy check.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+from utils import lazy_import
+
+np = lazy_import("numpy")
+
+
+class Playback:
+    """One spoken response"""
+
+    __slots__ = ("text", "start", "end", "reference", "sample_rate", "_resampled")
+
+    def __init__(self, text: str, start: float, reference=None, sample_rate: Optional[int] = None):
+        self.text = text
+        self.start = start
+        self.end = None  # Still playing
+        self.reference = reference  # float32 mono samples of the response, if synthesized first
+        self.sample_rate = sample_rate
+        self._resampled = {}
+
+    def reference_at(self, sample_rate: int):
+        """The reference waveform at the capture rate - resampled once per rate"""
+        if self.reference is None:
+            return None
+        if sample_rate == self.sample_rate:
+            return self.reference
+        if sample_rate not in self._resampled:
+            count = int(len(self.reference) * sample_rate / self.sample_rate)
+            positions = np.arange(count) * (self.sample_rate / sample_rate)
+            self._resampled[sample_rate] = np.interp(positions, np.arange(len(self.reference)),
+                                                     self.reference).astype(np.float32)
+        return self._resampled[sample_rate]
+
+
+class PlaybackLog:
+    """Recent playback intervals - written by the TTS thread, read by capture threads"""
+
+    def __init__(self, tail: float = 0.3, keep: int = 16):
+        self.tail = tail  # Seconds after playback ends that still count - output latency and room echo
+        self._playbacks = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.stats = {"playbacks": 0, "playing_time": 0.0}
+
+    def begin(self, text: str, reference=None, sample_rate: Optional[int] = None) -> Playback:
+        playback = Playback(text, time.perf_counter(), reference, sample_rate)
+        with self._lock:
+            self._playbacks.append(playback)
+            self.stats["playbacks"] += 1
+        return playback
+
+    def end(self, playback: Playback):
+        playback.end = time.perf_counter()
+        with self._lock:
+            self.stats["playing_time"] += playback.end - playback.start
+
+    def active(self, start: float, end: float) -> Optional[Playback]:
+        """The playback overlapping [start, end] (perf_counter times), if any"""
+        with self._lock:
+            for playback in reversed(self._playbacks):
+                if playback.start <= end and (playback.end is None or playback.end + self.tail >= start):
+                    return playback
+                if playback.end is not None and playback.end + self.tail < start:
+                    break  # Older ones ended even earlier
+        return None
+
+    @property
+    def is_playing(self) -> bool:
+        now = time.perf_counter()
+        return self.active(now, now) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["tail"] = self.tail
+        return stats
+
+
+class EchoCanceller:
+    """Block NLMS adaptive filter - estimates the echo of a reference signal in the microphone and removes it"""
+
+    def __init__(self, taps: int = 1024, step: float = 0.2, block: int = 128):
+        self.taps = taps    # Filter length in samples - covers the echo path and leftover misalignment
+        self.step = step    # NLMS step size (0-1]
+        self.block = block  # Samples per weight update
+        self.weights = None
+        self.playback = None
+        self.stats = {"chunks": 0, "input_power": 0.0, "residual_power": 0.0}
+
+    def reset(self):
+        self.weights = np.zeros(self.taps, dtype=np.float32)
+
+    def process(self, playback: Playback, mic, reference) -> Any:
+        """Residual of float32 mic samples after removing the echo of reference.
+        reference holds taps - 1 samples of history followed by len(mic) samples aligned with mic."""
+        if playback is not self.playback or self.weights is None:
+            self.playback = playback
+            self.reset()  # A new response has a new echo path to learn
+        windows = np.lib.stride_tricks.sliding_window_view(reference, self.taps)[:, ::-1]
+        residual = np.empty_like(mic)
+        for start in range(0, len(mic), self.block):
+            x = windows[start:start + self.block]
+            d = mic[start:start + self.block]
+            e = d - x @ self.weights
+            residual[start:start + self.block] = e
+            # Summed per-sample NLMS updates, normalized by the mean window energy
+            self.weights += self.step * (x.T @ e) / (float(np.sum(x * x)) / len(x) + 1e-6)
+
+        self.stats["chunks"] += 1
+        self.stats["input_power"] += float(np.mean(mic * mic))
+        self.stats["residual_power"] += float(np.mean(residual * residual))
+        return residual
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        # Echo return loss enhancement - how much quieter the echo is after cancellation
+        if stats["residual_power"] > 0 and stats["input_power"] > 0:
+            stats["erle_db"] = 10.0 * float(np.log10(stats["input_power"] / stats["residual_power"]))
+        else:
+            stats["erle_db"] = 0.0
+        return stats
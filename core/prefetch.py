@@ -0,0 +1,126 @@
+"""
+Context prefetch - prepare execution state as soon as a session is activated
+
+After "hey nico" the command almost always follows within seconds, but the
+work needed to execute it (window enumeration, first encoder call, opening the
+virtual keyboard, importing handler modules) would only start once it has been
+classified. Activation triggers the registered tasks on a background thread
+instead; what they prepare simply expires if no command follows.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+from flight_recorder import recorder
+
+
+class ContextPrefetcher:
+    """Runs named prefetch tasks on activation and reports their cost and use"""
+
+    def __init__(self, expiry: float = 10.0):
+        self.expiry = expiry  # Seconds a prefetch counts as used if a command follows
+        self.tasks = {}  # Name -> (task, stats callable or None)
+        self.task_stats = {}  # Name -> runs, prepared, errors, time
+        self.stats = {"triggers": 0, "runs": 0, "coalesced": 0, "used": 0, "expired": 0}
+        self._pending = {}  # Session id -> time of the trigger not yet followed by a command
+        self._requested = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.is_running = False
+
+    def add_task(self, name: str, task: Callable[[], Any], stats: Optional[Callable[[], Dict[str, Any]]] = None):
+        """Register a task - it returns a truthy value when it actually prepared something.
+        stats, if given, returns the task's own hit counters for the report."""
+        self.tasks[name] = (task, stats)
+        self.task_stats[name] = {"runs": 0, "prepared": 0, "errors": 0, "time": 0.0}
+
+    def start(self):
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._requested.set()
+
+    def trigger(self, session_id: str):
+        """Called when a session is activated - never blocks"""
+        with self._lock:
+            self.stats["triggers"] += 1
+            self._expire()
+            self._pending[session_id] = time.monotonic()
+            if self._requested.is_set():
+                self.stats["coalesced"] += 1  # A run is already waiting
+        self._requested.set()
+
+    def command_arrived(self, session_id: str):
+        """Called when a session dispatches a command - counts the prefetch as used"""
+        with self._lock:
+            triggered = self._pending.pop(session_id, None)
+            if triggered is None:
+                return
+            if time.monotonic() - triggered <= self.expiry:
+                self.stats["used"] += 1
+            else:
+                self.stats["expired"] += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id, triggered in list(self._pending.items()):
+            if now - triggered > self.expiry:
+                del self._pending[session_id]
+                self.stats["expired"] += 1
+
+    def _run(self):
+        while self.is_running:
+            self._requested.wait()
+            self._requested.clear()
+            if not self.is_running:
+                break
+            self.run_tasks()
+
+    def run_tasks(self):
+        """Run every task once, in registration order"""
+        with self._lock:
+            self.stats["runs"] += 1
+        for name, (task, _) in list(self.tasks.items()):
+            started = time.perf_counter()
+            try:
+                prepared = task()
+                error = None
+            except Exception as e:
+                prepared, error = False, e
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                stats = self.task_stats[name]
+                stats["runs"] += 1
+                stats["time"] += elapsed
+                if prepared:
+                    stats["prepared"] += 1
+                if error:
+                    stats["errors"] += 1
+            if error:
+                recorder.warning("prefetch", "Prefetch task '%s' failed: %s", name, error)
+            else:
+                recorder.debug("prefetch", "Prefetch task '%s' took %.1f ms", name, elapsed * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Trigger counts, the share followed by a command, and per-task cost and hits"""
+        with self._lock:
+            self._expire()
+            stats = dict(self.stats)
+            tasks = {name: dict(task) for name, task in self.task_stats.items()}
+        finished = stats["used"] + stats["expired"]
+        stats["use_rate"] = stats["used"] / finished if finished else 0.0
+        for name, task in tasks.items():
+            task["avg_time"] = task["time"] / task["runs"] if task["runs"] else 0.0
+            extra = self.tasks[name][1]
+            if extra:
+                try:
+                    task.update(extra())
+                except Exception as e:
+                    recorder.warning("prefetch", "Prefetch stats for '%s' failed: %s", name, e)
+        stats["tasks"] = tasks
+        return stats
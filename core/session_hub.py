@@ -0,0 +1,244 @@
+"""
+Session hub - several microphones or rooms sharing one loaded model
+
+The hub owns the intent classifier (encoder and template matrix). Each session
+only holds what differs per room: its activation window, its queue, the
+processor its commands execute on, and optionally its speech recognizer.
+One hub thread drains every session queue and classifies whatever is waiting
+with a single encoder call, so sessions cost kilobytes rather than a model.
+"""
+
+import queue
+import threading
+import time
+import traceback
+from typing import Dict, Any, List, Optional
+
+from ai import ActivationState
+from flight_recorder import recorder
+from .command_processor import CommandProcessor, Utterance
+
+DEFAULT_SESSION = "main"
+
+
+class _SessionQueue(queue.Queue):
+    """Queue that wakes the hub whenever something is put on it"""
+
+    def __init__(self, wakeup: threading.Event, maxsize: int = 0):
+        super().__init__(maxsize)
+        self._wakeup_event = wakeup
+
+    def _put(self, item):
+        super()._put(item)
+        self._wakeup_event.set()
+
+
+class Session:
+    """Per-room state - activation window, queue and execution target"""
+
+    def __init__(self, session_id: str, processor: CommandProcessor, wakeup: threading.Event,
+                 recognizer=None, max_queue: int = 0, on_activate=None):
+        self.session_id = session_id
+        self.processor = processor  # Where this session's commands are dispatched
+        self.activation = ActivationState(on_activate=on_activate)
+        self.queue = _SessionQueue(wakeup, max_queue)
+        self.recognizer = recognizer
+        self.created_at = time.time()
+        self.utterances = 0
+        self.dispatched = 0
+
+    def submit(self, text: str, **kwargs) -> bool:
+        """Queue typed or remote text for this session - False if the queue is full"""
+        try:
+            self.queue.put_nowait(Utterance(text, **kwargs))
+            return True
+        except queue.Full:
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_size": self.queue.qsize(),
+            "active": self.activation.is_active,
+            "listening": bool(self.recognizer and self.recognizer.is_listening),
+            "utterances": self.utterances,
+            "dispatched": self.dispatched,
+            "dropped": getattr(self.recognizer, "dropped", 0),
+        }
+
+
+class SessionHub:
+    """Routes utterances from many sessions through one shared classifier"""
+
+    def __init__(self, processor: CommandProcessor, max_batch: int = 16, batch_window: float = 0.0,
+                 max_queue: int = 64, prefetcher=None, governor=None):
+        self.processor = processor  # Default execution target, owner of the shared classifier
+        self.classifier = processor.intent_classifier
+        self.prefetcher = prefetcher  # Prepares execution state when a session is activated
+        self.governor = governor  # Told about every utterance, to leave idle mode
+        self.max_batch = max_batch
+        self.max_queue = max_queue  # Per session - producers drop utterances rather than queue without bound
+        self.batch_window = batch_window  # Extra time to wait for more utterances once one arrives
+        self.sessions = {}  # Session id -> Session
+        self.is_running = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {"batches": 0, "utterances": 0, "max_batch": 0, "encode_time": 0.0}
+
+    # ---- Sessions ----
+
+    def add_session(self, session_id: str, processor: Optional[CommandProcessor] = None,
+                    recognizer=None) -> Session:
+        """Create a session - safe while the hub is running.
+        A processor other than the hub's must already be started."""
+        with self._lock:
+            if session_id in self.sessions:
+                raise ValueError(f"Session '{session_id}' already exists")
+            on_activate = (lambda: self.prefetcher.trigger(session_id)) if self.prefetcher else None
+            session = Session(session_id, processor or self.processor, self._wakeup, recognizer, self.max_queue,
+                              on_activate)
+            self.sessions[session_id] = session
+        if recognizer and self.governor and hasattr(recognizer, "on_audio"):
+            recognizer.on_audio = self.governor.activity  # Speech wakes the pipeline before it is recognized
+        if recognizer and hasattr(recognizer, "command_matcher"):
+            # Lets the endpointer stop waiting once the words so far are a complete command
+            recognizer.command_matcher = session.processor.intent_classifier.match_command
+        if recognizer and hasattr(recognizer, "playback"):
+            recognizer.playback = session.processor.playback  # Keeps the assistant's own voice out of recognition
+        if recognizer and self.is_running:
+            recognizer.start_listening(session.queue)
+        recorder.info("hub", "Added session '%s' (%d total)", session_id, len(self.sessions))
+        return session
+
+    def remove_session(self, session_id: str) -> bool:
+        """Stop and forget a session - queued utterances are dropped"""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        if session.recognizer:
+            session.recognizer.stop_listening()
+        recorder.info("hub", "Removed session '%s'", session_id)
+        return True
+
+    def get_session(self, session_id: str = DEFAULT_SESSION) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    # ---- Processing ----
+
+    def start(self):
+        """Start listening on every session and the hub thread"""
+        self.is_running = True
+        for session in list(self.sessions.values()):
+            if session.recognizer:
+                session.recognizer.start_listening(session.queue)
+        self._thread = threading.Thread(target=self._run, name="session-hub", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self.is_running = False
+        for session in list(self.sessions.values()):
+            if session.recognizer:
+                session.recognizer.stop_listening()
+        self._wakeup.set()
+
+    def _run(self):
+        recorder.info("hub", "Session hub thread started")
+        while self.is_running:
+            self._wakeup.wait()  # Queues and stop() set it - no polling while idle
+            self._wakeup.clear()
+            if not self.is_running:
+                break
+
+            batch = self._collect()
+            if self.batch_window and batch and len(batch) < self.max_batch:
+                time.sleep(self.batch_window)
+                batch.extend(self._collect(self.max_batch - len(batch)))
+            if not batch:
+                continue
+
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                recorder.error("hub", "Batch processing failed: %s\n%s", e, traceback.format_exc())
+
+            if any(not session.queue.empty() for session in list(self.sessions.values())):
+                self._wakeup.set()  # More than max_batch was waiting
+
+    def _collect(self, limit: Optional[int] = None) -> List[tuple]:
+        """Take waiting utterances round-robin across sessions, so no room starves the others"""
+        limit = limit or self.max_batch
+        with self._lock:
+            sessions = list(self.sessions.values())
+
+        batch = []
+        while len(batch) < limit:
+            taken = False
+            for session in sessions:
+                if len(batch) >= limit:
+                    break
+                try:
+                    item = session.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                batch.append((session, Utterance.from_queue_item(item)))
+                taken = True
+            if not taken:
+                break
+        return batch
+
+    def _process_batch(self, batch: List[tuple]):
+        """Classify a batch with one encoder call, then act on each utterance in its session"""
+        if self.governor:
+            self.governor.activity()
+        traces = [session.processor._begin_utterance(utterance) for session, utterance in batch]
+
+        encoded = None
+        started = time.perf_counter()
+        try:
+            inputs = []
+            for session, utterance in batch:
+                # Every N-best alternative joins the same encoder call, for rescoring
+                for text in ([alt[0] for alt in utterance.alternatives] if utterance.alternatives else [utterance.text]):
+                    inputs.extend(self.classifier.embedding_inputs(
+                        text, session.activation, utterance.require_wake_word
+                    ))
+            encoded = self.classifier.encode_texts(inputs)
+        except Exception as e:
+            # Each utterance is then encoded on its own
+            recorder.error("hub", "Batch encoding failed: %s", e)
+        encode_time = time.perf_counter() - started
+
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["utterances"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            self.stats["encode_time"] += encode_time
+        recorder.debug("hub", "Batch of %d utterances, %d texts encoded in %.1f ms",
+                       len(batch), len(encoded or ()), encode_time * 1000)
+
+        for (session, utterance), trace in zip(batch, traces):
+            try:
+                trace.set("session", session.session_id)
+                result = session.processor._process_utterance(utterance, session.activation, encoded, trace)
+                result['session'] = session.session_id
+                session.utterances += 1
+                if result.get('status') == "dispatched":
+                    session.dispatched += 1
+                    if self.prefetcher:
+                        self.prefetcher.command_arrived(session.session_id)
+                session.processor._deliver(utterance, result)
+            except Exception as e:
+                recorder.error("hub", "Session '%s' failed to process %r: %s", session.session_id, utterance.text, e)
+            finally:
+                session.queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching statistics and per-session state"""
+        with self._lock:
+            stats = dict(self.stats)
+            sessions = dict(self.sessions)
+        stats["avg_batch"] = stats["utterances"] / stats["batches"] if stats["batches"] else 0.0
+        stats["sessions"] = {session_id: session.get_stats() for session_id, session in sessions.items()}
+        return stats
@@ -2,46 +2,356 @@
 Speech recognition module - handles microphone input and speech-to-text
 """
 
-import speech_recognition as sr
+import collections
+import math
 import queue
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from flight_recorder import recorder
+from utils import lazy_import
+from .endpointer import AdaptiveEndpointer
+
+sr = lazy_import("speech_recognition")
+np = lazy_import("numpy")
 
 
 class SpeechRecognizer:
     """Handles microphone input and speech recognition"""
 
-    def __init__(self):
+    def __init__(self, tracer=None, device_index: Optional[int] = None):
+        self.tracer = tracer
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = sr.Microphone(device_index=device_index)
         self.stop_listening_func = None
+        # Size of captured audio, for the memory report
+        self.audio_stats = {"in_flight": 0, "last": 0, "peak": 0, "utterances": 0}
+        self.dropped = 0
+        # Idle mode - a stricter energy gate in front of speech-to-text
+        self.idle = False
+        self.idle_energy_factor = 2.0  # Idle onset threshold relative to the calibrated one
+        self.min_idle_phrase = 0.4     # Seconds - shorter bursts are noise, not a wake word
+        self.gate_stats = {"passed": 0, "gated": 0}
+        self.on_audio = None  # Called when captured audio passes the gate, e.g. to leave idle mode
+        self._energy_threshold = None
+        # Adaptive endpointing - the pause that ends a phrase depends on what has been said so far
+        self.endpointer = AdaptiveEndpointer(base_pause=0.8)
+        # (intent, is_dictation) when a speculative transcript is already a complete command, else None
+        self.command_matcher: Optional[Callable[[str], Optional[tuple]]] = None
+        self.endpoint_stats = {"reused": 0}  # Phrases whose speculative transcript was used as the final one
+        self._phrases = queue.Queue(maxsize=8)  # Captured phrases waiting for speech-to-text
+        self._listening = False
+        self._phrase_id = 0
+        self._speculating = False
+        self._speculative_alternatives = None  # Transcript of the current phrase so far
+        # N-best transcripts handed on with each utterance, so the classifier can rescore them
+        self.max_alternatives = 5
+        self.alternative_decay = 0.8  # ASR score of an unscored alternative relative to the one above it
+        # Self-speech suppression - set playback to the TTS playback log (the session hub does this)
+        self.playback = None
+        self.self_speech = "attenuate"      # During playback: "attenuate" (barge-in needs louder speech) or "drop"
+        self.playback_energy_factor = 3.0  # Onset threshold during playback relative to the normal one
+        self.echo_canceller = None         # EchoCanceller, used when the playback has a reference waveform
+        self.echo_delay = 0.05             # Seconds from playback start to the sound reaching the microphone
+        self.suppression_stats = {"suppressed_audio": 0.0, "segments": 0}
+        self.asr_stats = {"calls": 0, "time": 0.0}
+        self._suppressed_run = 0.0
 
         with self.microphone as source:
             print("Adjusting for ambient noise...")
             self.recognizer.adjust_for_ambient_noise(source, duration=1)
             self.recognizer.dynamic_energy_threshold = True
-            self.recognizer.pause_threshold = 0.8
+            self.recognizer.pause_threshold = self.endpointer.base_pause
             print("Microphone ready!")
 
+    def set_idle(self, idle: bool):
+        """In idle mode only louder sound starts a phrase, and short or quiet phrases never reach speech-to-text"""
+        if idle == self.idle:
+            return
+        if idle:
+            self._energy_threshold = self.recognizer.energy_threshold
+            self.recognizer.dynamic_energy_threshold = False
+            self.recognizer.energy_threshold = self._energy_threshold * self.idle_energy_factor
+        else:
+            self.recognizer.energy_threshold = self._energy_threshold
+            self.recognizer.dynamic_energy_threshold = True
+        self.idle = idle
+
+    @staticmethod
+    def _rms(frame_data: bytes, sample_width: int) -> float:
+        """Energy of a chunk, on the same scale as the recognizer's energy threshold"""
+        if sample_width == 1:
+            samples = np.frombuffer(frame_data, dtype=np.uint8).astype(np.float32) - 128.0  # Unsigned 8-bit
+        else:
+            samples = np.frombuffer(frame_data, dtype=np.int32 if sample_width == 4 else np.int16).astype(np.float64)
+        return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+    def _passes_gate(self, audio) -> bool:
+        """Cheap check of a captured phrase before it is sent for recognition"""
+        if not self.idle:
+            return True
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        if duration < self.min_idle_phrase or audio.sample_width != 2:
+            return duration >= self.min_idle_phrase
+        return self._rms(audio.frame_data, audio.sample_width) >= self.recognizer.energy_threshold
+
+    def _adjust_energy(self, energy: float, seconds: float):
+        """The recognizer's asymmetric moving average of the noise floor"""
+        recognizer = self.recognizer
+        if recognizer.dynamic_energy_threshold:
+            damping = recognizer.dynamic_energy_adjustment_damping ** seconds
+            target = energy * recognizer.dynamic_energy_ratio
+            recognizer.energy_threshold = recognizer.energy_threshold * damping + target * (1 - damping)
+
+    def _recognize(self, audio) -> List[tuple]:
+        """N-best transcripts as (text, ASR score), best first - empty if nothing was understood"""
+        try:
+            result = self.recognizer.recognize_google(audio, language='en-US', show_all=True)
+        except sr.UnknownValueError:
+            return []  # ignore if speech wasn't clear
+        except sr.RequestError as e:
+            print(f"Speech recognition error: {e}")
+            return []
+        return self._alternatives(result)
+
+    def _alternatives(self, result) -> List[tuple]:
+        """(text, ASR score) pairs from a show_all response - usually only the best one has a confidence"""
+        if not isinstance(result, dict):
+            return []  # Older versions return [] when nothing was understood
+        alternatives, seen = [], set()
+        score = None
+        for alternative in result.get("alternative", []):
+            text = (alternative.get("transcript") or "").strip()
+            if score is None:
+                score = alternative.get("confidence", 0.8)
+            else:
+                score = alternative.get("confidence", score * self.alternative_decay)
+            if text and text.lower() not in seen:
+                seen.add(text.lower())
+                alternatives.append((text, float(score)))
+            if len(alternatives) >= self.max_alternatives:
+                break
+        return alternatives
+
     def start_listening(self, command_queue: queue.Queue):
         """Start listening continuously in the background"""
+        self._listening = True
+        capture = threading.Thread(target=self._listen_loop, name="speech-capture", daemon=True)
+        recognize = threading.Thread(target=self._recognize_loop, args=(command_queue,), name="speech-asr",
+                                     daemon=True)
+        recognize.start()
+        capture.start()
+        self.stop_listening_func = self._stop_loops
+        print("Listening in background...")
+
+    def _stop_loops(self, wait_for_stop: bool = False):
+        self._listening = False
+        self._phrases.put(None)
+
+    def _listen_loop(self):
+        """Capture phrases and end each one with the adaptive endpointer instead of a fixed pause"""
+        recognizer = self.recognizer
+        endpointer = self.endpointer
+        with self.microphone as source:
+            seconds = float(source.CHUNK) / source.SAMPLE_RATE
+            keep = int(math.ceil(recognizer.non_speaking_duration / seconds))
+            preroll = collections.deque(maxlen=keep)  # Audio kept from just before the onset
+            clock = 0.0  # Seconds of audio read
+            frames = None
+            while self._listening:
+                buffer = source.stream.read(source.CHUNK)
+                if not buffer:
+                    break
+                clock += seconds
+                buffer, energy, threshold, playing = self._filter_chunk(buffer, source, seconds)
+                voiced = energy > threshold
+
+                if frames is None:
+                    if not voiced:
+                        preroll.append(buffer)
+                        if not playing:
+                            # The noise floor adapts only between phrases and never to the assistant's
+                            # voice - learning from speech would lift it above the speaker and cut them off
+                            self._adjust_energy(energy, seconds)
+                        continue
+                    frames = list(preroll)
+                    preroll.clear()
+                    self._phrase_id += 1
+                    endpointer.start_phrase(clock - seconds)
+                frames.append(buffer)
+                endpointer.add_chunk(clock, seconds, voiced)
+
+                if self.command_matcher and endpointer.should_speculate():
+                    self._speculate(frames, source)
+                reason = endpointer.check()
+                if reason is None:
+                    continue
+
+                silence = endpointer.silence
+                if endpointer.voiced >= recognizer.phrase_threshold:
+                    endpointer.end_phrase(reason)
+                    trailing = int(silence / seconds) - keep  # Silence kept after the phrase
+                    if trailing > 0:
+                        del frames[-trailing:]
+                    partial = endpointer.partial
+                    reuse = partial and partial[0] == endpointer.voiced
+                    alternatives = self._speculative_alternatives if reuse else None
+                    audio = sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    self._phrase_captured(audio, silence, alternatives)
+                frames = None
 
-        def callback(recognizer, audio):
-            """Called when speech is recognized"""
+    def _filter_chunk(self, buffer: bytes, source, seconds: float) -> tuple:
+        """(chunk, energy, onset threshold, whether the assistant is talking) for one captured chunk.
+        During playback the echo canceller cleans the chunk, and onset needs more energy (or is off)."""
+        threshold = self.recognizer.energy_threshold
+        read_at = time.perf_counter()
+        playback = self.playback.active(read_at - seconds, read_at) if self.playback else None
+        if playback is None:
+            self._close_suppressed_run()
+            return buffer, self._rms(buffer, source.SAMPLE_WIDTH), threshold, False
+
+        if self.echo_canceller and playback.reference is not None and source.SAMPLE_WIDTH == 2:
+            mic = np.frombuffer(buffer, dtype=np.int16).astype(np.float32)
+            offset = int(round((read_at - seconds - self.echo_delay - playback.start) * source.SAMPLE_RATE))
+            reference = self._reference_segment(playback.reference_at(source.SAMPLE_RATE), offset, len(mic),
+                                                self.echo_canceller.taps) * 32768.0
+            residual = self.echo_canceller.process(playback, mic, reference)
+            buffer = np.clip(residual, -32768, 32767).astype(np.int16).tobytes()
+        energy = self._rms(buffer, source.SAMPLE_WIDTH)
+
+        strict = float("inf") if self.self_speech == "drop" else threshold * self.playback_energy_factor
+        stats = self.suppression_stats
+        if threshold < energy <= strict:
+            # Would have started or continued a phrase - most likely the assistant's own voice
+            stats["suppressed_audio"] += seconds
+            self._suppressed_run += seconds
+        else:
+            self._close_suppressed_run()
+        return buffer, energy, strict, True
+
+    @staticmethod
+    def _reference_segment(reference, offset: int, count: int, taps: int):
+        """reference[offset - taps + 1 : offset + count], zero outside the response"""
+        start = offset - taps + 1
+        segment = np.zeros(count + taps - 1, dtype=np.float32)
+        lo, hi = max(start, 0), min(offset + count, len(reference))
+        if hi > lo:
+            segment[lo - start:hi - start] = reference[lo:hi]
+        return segment
+
+    def _close_suppressed_run(self):
+        """A run of suppressed audio long enough to be a phrase would have cost a recognition and a classify"""
+        if self._suppressed_run >= self.recognizer.phrase_threshold:
+            self.suppression_stats["segments"] += 1
+            recorder.debug("speech", "Suppressed %.1fs of the assistant's own voice", self._suppressed_run)
+        self._suppressed_run = 0.0
+
+    def get_suppression_stats(self) -> Dict[str, Any]:
+        """Self-speech suppressed during playback and the speech-to-text work that saved"""
+        stats = dict(self.suppression_stats)
+        calls, asr_time = self.asr_stats["calls"], self.asr_stats["time"]
+        stats["avg_asr_time"] = asr_time / calls if calls else 0.0
+        stats["asr_time_saved"] = stats["segments"] * stats["avg_asr_time"]  # Estimated from measured calls
+        stats["mode"] = self.self_speech
+        if self.echo_canceller:
+            stats["echo_canceller"] = self.echo_canceller.get_stats()
+        return stats
+
+    def _speculate(self, frames: list, source):
+        """Transcribe the phrase so far in the background and tell the endpointer what it is"""
+        if self._speculating:
+            return
+        self._speculating = True
+        self.endpointer.speculation_started()
+        phrase_id, voiced = self._phrase_id, self.endpointer.voiced
+        audio = sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+        def run():
+            alternatives, match = None, None
             try:
-                text = recognizer.recognize_google(audio, language='en-US')
-                if text:
-                    print(f"Heard: {text}")
-                    command_queue.put(text)
-            except sr.UnknownValueError:
-                pass  # ignore if speech wasn't clear
-            except sr.RequestError as e:
-                print(f"Speech recognition error: {e}")
-
-        # 🟡 CHANGED — background listener provided by SpeechRecognition
-        self.stop_listening_func = self.recognizer.listen_in_background(
-            self.microphone,
-            callback
-        )
-        print("Listening in background...")
+                alternatives = self._recognize(audio) or None
+                match = self.command_matcher(alternatives[0][0]) if alternatives else None
+            except Exception as e:
+                recorder.warning("speech", "Speculative recognition failed: %s", e)
+            finally:
+                if phrase_id == self._phrase_id:
+                    self._speculative_alternatives = alternatives
+                    self.endpointer.set_partial(voiced, match)
+                self._speculating = False
+
+        threading.Thread(target=run, name="speech-speculate", daemon=True).start()
+
+    def _phrase_captured(self, audio, silence: float, alternatives: Optional[List[tuple]]):
+        """Gate a finished phrase and hand it to speech-to-text without stopping capture.
+        alternatives is a speculative transcript of exactly this audio, if there is one."""
+        if not self._passes_gate(audio):
+            self.gate_stats["gated"] += 1
+            return
+        self.gate_stats["passed"] += 1
+        if self.on_audio:
+            self.on_audio()  # Leave idle mode while speech-to-text runs
+
+        trace = None
+        if self.tracer:
+            # The utterance ended silence seconds ago
+            trace = self.tracer.start_trace(time.perf_counter() - silence)
+            trace.mark("endpointing")
+        size = len(audio.frame_data)
+        self.audio_stats["in_flight"] += size
+        self.audio_stats["last"] = size
+        self.audio_stats["peak"] = max(self.audio_stats["peak"], size)
+        self.audio_stats["utterances"] += 1
+        try:
+            self._phrases.put_nowait((audio, trace, alternatives))
+        except queue.Full:
+            self.dropped += 1
+            self.audio_stats["in_flight"] -= size
+            recorder.warning("speech", "Speech-to-text is behind - dropped a %.1fs phrase",
+                             size / (audio.sample_rate * audio.sample_width))
+
+    def _recognize_loop(self, command_queue: queue.Queue):
+        """Speech-to-text for captured phrases - reuses a speculative transcript of the same audio"""
+        while True:
+            item = self._phrases.get()
+            if item is None:
+                break
+            audio, trace, alternatives = item
+            try:
+                if alternatives is None:
+                    started = time.perf_counter()
+                    alternatives = self._recognize(audio)
+                    self.asr_stats["calls"] += 1
+                    self.asr_stats["time"] += time.perf_counter() - started
+                else:
+                    self.endpoint_stats["reused"] += 1
+                if trace:
+                    trace.mark("asr")
+                if alternatives:
+                    text = alternatives[0][0]
+                    recorder.info("speech", "Heard: %r", text)
+                    try:
+                        # The other alternatives go along for rescoring against the commands
+                        command_queue.put_nowait((text, trace, alternatives) if len(alternatives) > 1
+                                                 else (text, trace) if trace else text)
+                    except queue.Full:
+                        # The pipeline is not keeping up - stale speech is worth less than a live microphone
+                        self.dropped += 1
+                        recorder.warning("speech", "Command queue full - dropped %r", text)
+            finally:
+                self.audio_stats["in_flight"] -= len(audio.frame_data)
+
+    def get_endpoint_stats(self) -> Dict[str, Any]:
+        """Endpointing latency, early cut-offs and reused speculative transcripts"""
+        stats = self.endpointer.get_stats()
+        stats.update(self.endpoint_stats)
+        stats["base_pause"] = self.endpointer.base_pause
+        return stats
+
+    @property
+    def is_listening(self) -> bool:
+        """Whether the background listener is running"""
+        return self.stop_listening_func is not None
 
     def stop_listening(self):
         """Stop the background listening process"""  # 🟡 CHANGED — stops background listener
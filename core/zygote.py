@@ -0,0 +1,222 @@
+"""
+Zygote - keep the heavy state loaded and fork fresh assistants from it
+
+A cold start imports torch, loads the sentence encoder, loads or computes the
+template embeddings and builds the fast tier before the assistant can listen.
+The zygote pays for that once: the parent preloads everything, freezes the
+garbage collector so the loaded objects stay shared, and forks an Assistant
+worker that reuses the model copy-on-write. Restarting the worker (SIGHUP,
+or a crash) only costs the fork and the pipeline start.
+
+The parent starts no threads. Build the template bundle first (python -m
+commands.manifest build) so it never runs the encoder either - thread pools
+started before a fork are not carried into the worker. Each worker reports
+how long it took from fork to ready, next to the cold preload time, so the
+two modes can be compared. POSIX only.
+
+Workers never release the encoder when idle: the parent's copy stays in
+memory whatever the worker does, so a release frees nothing and the reload
+after it would build a private copy in every worker.
+
+    python main.py --zygote         # then: kill -HUP <parent pid> to restart the worker
+"""
+
+import gc
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+from typing import Dict, Any, Optional
+
+from flight_recorder import recorder
+
+# Imported in the parent so workers never pay for them
+PRELOAD_MODULES = ("numpy", "torch", "sentence_transformers", "speech_recognition", "pyttsx3")
+
+CRASH_WINDOW = 10.0       # A worker that dies sooner than this after ready counts as crash-looping
+MAX_RESPAWN_DELAY = 30.0  # Upper bound on the back-off between crash-looping workers
+CRASH_DUMP_EVENTS = 100   # Recorder events a failing worker writes to stderr before it exits
+
+
+class Zygote:
+    """Long-lived parent that preloads the model and forks Assistant workers on demand"""
+
+    def __init__(self, use_microphone: bool = True, idle_after: float = 300.0,
+                 daemon: bool = False, socket_path: Optional[str] = None, echo_cancel: bool = False):
+        self.assistant_options = {"use_microphone": use_microphone, "idle_after": idle_after,
+                                  "echo_cancel": echo_cancel, "release_encoder": False}
+        self.daemon = daemon
+        self.socket_path = socket_path
+        self.classifier = None
+        self.worker_pid = None
+        self.is_running = False
+        self._restart_requested_at = None
+        self.stats = {"preload_time": 0.0, "workers": 0, "restarts": 0, "crashes": 0,
+                      "last_ready": 0.0, "last_restart": 0.0, "ready_times": []}
+
+    def preload(self):
+        """Import the heavy modules and build the classifier - the work every worker then shares"""
+        started = time.perf_counter()
+        for name in PRELOAD_MODULES:
+            try:
+                __import__(name)
+            except ImportError:
+                pass
+        from ai import IntentClassifier
+        from commands.manifest import get_compiled_commands, import_handler_target
+        from .assistant import Assistant  # noqa: F401 - imported for the workers
+
+        self.classifier = IntentClassifier()
+        for intent, entry in get_compiled_commands().dispatch.items():
+            try:
+                import_handler_target(entry.handler_path)
+            except Exception as e:
+                recorder.warning("zygote", "Could not preload handler for '%s': %s", intent, e)
+
+        # Move everything loaded so far out of the collector's reach - scanning it would write to
+        # every page and undo the copy-on-write sharing
+        gc.collect()
+        gc.freeze()
+        self.stats["preload_time"] = time.perf_counter() - started
+        recorder.info("zygote", "Preloaded in %.0f ms (%d objects frozen)",
+                      self.stats["preload_time"] * 1000, gc.get_freeze_count())
+        # The parent never dumps its recorder - these lines are the zygote's report
+        print(f"Zygote preloaded in {self.stats['preload_time'] * 1000:.0f} ms")
+
+    def serve(self) -> int:
+        """Fork workers until one exits on purpose or the zygote is stopped"""
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Zygote mode needs os.fork - start without --zygote on this platform")
+        if self.classifier is None:
+            self.preload()
+
+        self.is_running = True
+        signal.signal(signal.SIGHUP, lambda *_: self.restart())
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        # Ctrl+C reaches the worker directly - let it shut down cleanly, then stop
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "is_running", False))
+
+        delay = 1.0
+        restart_from = None
+        while self.is_running:
+            status, lived = self._run_worker(time.perf_counter(), restart_from)
+
+            restart_from, self._restart_requested_at = self._restart_requested_at, None
+            if restart_from is not None:
+                delay = 1.0
+                continue
+            if not self.is_running or status == 0:
+                break  # Stopped here, or the user stopped the assistant
+
+            self.stats["crashes"] += 1
+            delay = min(delay * 2, MAX_RESPAWN_DELAY) if lived < CRASH_WINDOW else 1.0
+            recorder.error("zygote", "Worker exited with status %d - restarting in %.0fs", status, delay)
+            print(f"Assistant worker exited with status {status} - restarting in {delay:.0f}s", file=sys.stderr)
+            time.sleep(delay)
+
+        summary = self.format_stats()
+        recorder.info("zygote", "%s", summary)
+        print(summary)
+        return 0
+
+    def restart(self):
+        """Replace the running worker with a fresh one"""
+        self._restart_requested_at = time.perf_counter()
+        self.stats["restarts"] += 1
+        self._signal_worker(signal.SIGTERM)
+
+    def stop(self):
+        self.is_running = False
+        self._signal_worker(signal.SIGTERM)
+
+    def _signal_worker(self, signum: int):
+        if self.worker_pid:
+            try:
+                os.kill(self.worker_pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _run_worker(self, forked_at: float, restart_from: Optional[float]):
+        """Fork one worker and wait for it - (exit status, seconds it ran after ready)"""
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            self._worker_main(write_fd, forked_at)  # Never returns
+
+        os.close(write_fd)
+        self.worker_pid = pid
+        self.stats["workers"] += 1
+
+        # The worker writes one line when it is ready - EOF means it died first
+        with os.fdopen(read_fd, "rb") as pipe:
+            line = pipe.readline()
+            ready_at = time.perf_counter()
+        if line:
+            self._record_ready(json.loads(line), restart_from)
+        _, status = os.waitpid(pid, 0)
+        self.worker_pid = None
+        return os.waitstatus_to_exitcode(status), (time.perf_counter() - ready_at) if line else 0.0
+
+    def _record_ready(self, report: Dict[str, Any], restart_from: Optional[float]):
+        ready_time = report["ready_time"]
+        self.stats["last_ready"] = ready_time
+        self.stats["ready_times"] = (self.stats["ready_times"] + [ready_time])[-20:]
+        if restart_from is not None:
+            # From the restart request, including the old worker's shutdown
+            self.stats["last_restart"] = report["ready_at"] - restart_from
+        recorder.info("zygote", "Worker %d ready in %.0f ms (cold preload %.0f ms)",
+                      report["pid"], ready_time * 1000, self.stats["preload_time"] * 1000)
+        print(f"Assistant worker {report['pid']} ready in {ready_time * 1000:.0f} ms "
+              f"(cold preload {self.stats['preload_time'] * 1000:.0f} ms)")
+
+    def _worker_main(self, write_fd: int, forked_at: float):
+        """Body of a forked worker - builds an Assistant around the shared classifier"""
+        status = 1
+        try:
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+            def on_ready(ready_time: float):
+                report = {"pid": os.getpid(), "ready_time": ready_time, "ready_at": time.perf_counter()}
+                os.write(write_fd, (json.dumps(report) + "\n").encode("utf-8"))
+                os.close(write_fd)
+
+            from .assistant import Assistant
+            from .command_processor import CommandProcessor
+
+            processor = CommandProcessor(intent_classifier=self.classifier)
+            assistant = Assistant(command_processor=processor, started_at=forked_at, startup_mode="zygote",
+                                  on_ready=on_ready, **self.assistant_options)
+            if self.daemon:
+                assistant.run_daemon(self.socket_path)
+            else:
+                assistant.start()
+            status = 0
+        except KeyboardInterrupt:
+            status = 0
+        except BaseException as e:
+            recorder.error("zygote", "Worker failed: %s\n%s", e, traceback.format_exc())
+            # The worker's recorder dies with it - leave its last events where the parent's stderr goes
+            recorder.dump(sys.stderr, CRASH_DUMP_EVENTS)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["ready_times"] = list(stats["ready_times"])
+        stats["worker_pid"] = self.worker_pid
+        return stats
+
+    def format_stats(self) -> str:
+        stats = self.get_stats()
+        ready = stats["ready_times"]
+        average = sum(ready) / len(ready) if ready else 0.0
+        return (f"Zygote: preload {stats['preload_time'] * 1000:.0f} ms once, {stats['workers']} worker(s) "
+                f"ready in avg {average * 1000:.0f} ms, {stats['restarts']} restart(s) "
+                f"(last {stats['last_restart'] * 1000:.0f} ms including shutdown), {stats['crashes']} crash(es)")
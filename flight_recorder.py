@@ -0,0 +1,143 @@
+"""
+Flight recorder - low-overhead in-memory event log for the hot path
+
+Events are stored unformatted in a preallocated ring buffer. Formatting only
+happens when the buffer is dumped (or when echo is switched on), so recording
+an event costs a level check, one tuple and a slot store, and a disabled
+recorder costs a single comparison.
+
+Because formatting is deferred, args must be immutable values (numbers,
+strings, None, tuples of those) - a mutable argument is formatted as it is at
+dump time, not as it was when recorded. Pass a copy or a str() instead.
+"""
+
+import itertools
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO
+
+# Event levels (same values as the logging module)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# Record layout
+_TIME, _LEVEL, _SOURCE, _MESSAGE, _ARGS = range(5)
+_EMPTY = (0.0, 0, "", "", ())
+
+
+class FlightRecorder:
+    """Leveled event recorder backed by a fixed-capacity ring buffer"""
+
+    def __init__(self, capacity: int = 4096, level: int = DEBUG):
+        self.capacity = capacity
+        self.level = level
+        self.echo = False  # Also print events as they are recorded (live debugging)
+        self._buffer = [_EMPTY] * capacity
+        self._counter = itertools.count()  # next() is atomic under the GIL
+        self._written = 0
+        self._written_lock = threading.Lock()
+
+    def record(self, level: int, source: str, message: str, *args):
+        """Store an event - message is a %-format string applied to args only when read,
+        so args must be immutable"""
+        if level < self.level:
+            return
+
+        index = next(self._counter)
+        # One store replaces the whole record - a concurrent dump sees the old event or the new one, never a mix
+        record = (time.time(), level, source, message, args)
+        self._buffer[index % self.capacity] = record
+        with self._written_lock:
+            if index >= self._written:  # A slower thread with an earlier index must not hide later events
+                self._written = index + 1
+
+        if self.echo:
+            print(self._format(record))
+
+    def debug(self, source: str, message: str, *args):
+        if self.level <= DEBUG:
+            self.record(DEBUG, source, message, *args)
+
+    def info(self, source: str, message: str, *args):
+        if self.level <= INFO:
+            self.record(INFO, source, message, *args)
+
+    def warning(self, source: str, message: str, *args):
+        if self.level <= WARNING:
+            self.record(WARNING, source, message, *args)
+
+    def error(self, source: str, message: str, *args):
+        if self.level <= ERROR:
+            self.record(ERROR, source, message, *args)
+
+    def enable(self, level: int = DEBUG):
+        """Start recording events at or above level"""
+        self.level = level
+
+    def disable(self):
+        """Stop recording - record() returns after one comparison"""
+        self.level = OFF
+
+    @property
+    def enabled(self) -> bool:
+        return self.level < OFF
+
+    def clear(self):
+        """Forget all recorded events"""
+        with self._written_lock:
+            self._counter = itertools.count()
+            self._written = 0
+
+    @staticmethod
+    def _format(record) -> str:
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record[_TIME]))
+        millis = int((record[_TIME] % 1) * 1000)
+        try:
+            message = record[_MESSAGE] % record[_ARGS] if record[_ARGS] else record[_MESSAGE]
+        except (TypeError, ValueError):
+            message = f"{record[_MESSAGE]} {record[_ARGS]!r}"
+        level = LEVEL_NAMES.get(record[_LEVEL], str(record[_LEVEL]))
+        return f"{timestamp}.{millis:03d} {level:<7} [{record[_SOURCE]}] {message}"
+
+    def get_events(self, limit: Optional[int] = None) -> List[str]:
+        """Formatted events, oldest first"""
+        written = self._written
+        count = min(written, self.capacity)
+        if limit is not None:
+            count = min(count, limit)
+        start = written - count
+        return [self._format(self._buffer[i % self.capacity]) for i in range(start, written)]
+
+    def dump(self, stream: Optional[TextIO] = None, limit: Optional[int] = None) -> int:
+        """Write the recorded events to stream (stdout by default), returns the number written"""
+        stream = stream or sys.stdout
+        events = self.get_events(limit)
+        stream.write(f"=== Flight recorder: {len(events)} events ===\n")
+        for event in events:
+            stream.write(event + "\n")
+        stream.flush()
+        return len(events)
+
+    def install_signal_handler(self, signum: Optional[int] = None) -> bool:
+        """Dump the recorder to stderr when the process receives signum (SIGUSR1 by default)"""
+        if signum is None:
+            signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False  # Not available on Windows
+
+        try:
+            signal.signal(signum, lambda *_: self.dump(sys.stderr))
+            return True
+        except ValueError:
+            return False  # Signal handlers can only be installed from the main thread
+
+
+# Shared recorder used by the whole assistant
+recorder = FlightRecorder()
@@ -3,14 +3,46 @@
 Simple launch script for the Local Smart Voice Assistant
 """
 
+import time
+
+STARTED_AT = time.perf_counter()  # Startup-to-ready is measured from here in a cold start
+
+import argparse
+
 from core import Assistant
 
 
 def main():
     """Launch the voice assistant"""
-    assistant = Assistant()
-    assistant.start()
+    parser = argparse.ArgumentParser(description="Local Smart Voice Assistant")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run headless and serve the control socket instead of the console")
+    parser.add_argument("--socket", default=None,
+                        help="control socket path for daemon mode")
+    parser.add_argument("--no-microphone", action="store_true",
+                        help="only accept text commands (skip speech recognition)")
+    parser.add_argument("--idle-after", type=float, default=300.0,
+                        help="seconds of quiet before releasing the model and gating the microphone (0 disables)")
+    parser.add_argument("--echo-cancel", action="store_true",
+                        help="render each response before speaking it and cancel its echo from the microphone")
+    parser.add_argument("--zygote", action="store_true",
+                        help="preload the model once and fork the assistant from it; "
+                             "SIGHUP restarts the assistant without reloading (POSIX only)")
+    args = parser.parse_args()
+
+    if args.zygote:
+        from core.zygote import Zygote
+        zygote = Zygote(use_microphone=not args.no_microphone, idle_after=args.idle_after,
+                        daemon=args.daemon, socket_path=args.socket, echo_cancel=args.echo_cancel)
+        raise SystemExit(zygote.serve())
+
+    assistant = Assistant(use_microphone=not args.no_microphone, idle_after=args.idle_after,
+                          started_at=STARTED_AT, echo_cancel=args.echo_cancel)
+    if args.daemon:
+        assistant.run_daemon(args.socket)
+    else:
+        assistant.start()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,137 @@
+"""
+Character n-gram classifier - the fast first tier in front of the sentence encoder
+
+Template examples are turned into TF-IDF vectors of character n-grams (with
+word-boundary padding, so "play" and "display" differ) at startup. An utterance
+is scored by cosine similarity against every example, keeping the best example
+per intent, the same way the encoder path scores embeddings. Scoring only
+touches the matrix columns of n-grams the utterance contains, so it runs in
+tens of microseconds.
+
+An answer is only trusted when both its similarity and its margin over the
+runner-up intent clear bounds calibrated by leave-one-out over the examples.
+Anything else is escalated to the encoder.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils import lazy_import
+
+np = lazy_import("numpy")
+
+
+def char_ngrams(text: str, sizes: Tuple[int, ...] = (2, 3, 4)) -> List[str]:
+    """Character n-grams of lowercased, whitespace-normalized text padded with spaces"""
+    padded = f" {' '.join(text.lower().split())} "
+    return [padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1)]
+
+
+class NgramClassifier:
+    """TF-IDF character n-gram nearest-example classifier with calibrated acceptance bounds"""
+
+    def __init__(self, ngram_sizes: Tuple[int, ...] = (2, 3, 4), target_precision: float = 0.98,
+                 min_confidence: float = 0.5):
+        self.ngram_sizes = ngram_sizes
+        self.target_precision = target_precision  # Leave-one-out precision the bounds must reach
+        self.min_confidence = min_confidence      # Never trust a similarity below this (out-of-domain guard)
+        self.vocabulary = {}  # n-gram -> column
+        self.idf = None
+        self.matrix = None    # Examples x n-grams, unit-length rows
+        self.offsets = None   # First row of each intent, for reduceat
+        self.intents = []
+        self.confidence_bound = math.inf
+        self.margin_bound = math.inf
+        self.calibration = {}
+
+    def fit(self, templates: Dict[str, Dict[str, Any]]) -> "NgramClassifier":
+        """Build the model from the static (type 0) command templates and calibrate it"""
+        self.intents = [intent for intent, data in templates.items() if data.get("type", 0) == 0]
+        documents = []
+        examples = []
+        owners = {}  # Example text -> every intent listing it (a few phrases are shared)
+        for index, intent in enumerate(self.intents):
+            for example in templates[intent]["examples"]:
+                documents.append(Counter(char_ngrams(example, self.ngram_sizes)))
+                examples.append(example)
+                owners.setdefault(example, set()).add(index)
+
+        document_frequency = Counter(gram for document in documents for gram in document)
+        self.vocabulary = {gram: column for column, gram in enumerate(sorted(document_frequency))}
+        count = len(documents)
+        self.idf = np.array([math.log((1 + count) / (1 + document_frequency[gram])) + 1
+                             for gram in sorted(document_frequency)], dtype=np.float32)
+
+        self.matrix = np.zeros((count, len(self.vocabulary)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            columns, weights = self._weigh(document)
+            self.matrix[row, columns] = weights
+
+        sizes = [len(templates[intent]["examples"]) for intent in self.intents]
+        self.offsets = np.cumsum([0] + sizes[:-1])
+        self._calibrate([owners[example] for example in examples])
+        return self
+
+    def _weigh(self, grams: Counter):
+        """Columns and unit-length sublinear TF-IDF weights for known n-grams"""
+        known = [(self.vocabulary[gram], c) for gram, c in grams.items() if gram in self.vocabulary]
+        if not known:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        columns = np.fromiter((column for column, _ in known), dtype=np.intp, count=len(known))
+        counts = np.fromiter((c for _, c in known), dtype=np.float32, count=len(known))
+        weights = (1.0 + np.log(counts)) * self.idf[columns]
+        return columns, weights / np.linalg.norm(weights)
+
+    def scores(self, text: str):
+        """Best example similarity for every intent"""
+        columns, weights = self._weigh(Counter(char_ngrams(text, self.ngram_sizes)))
+        if not len(columns):
+            return np.zeros(len(self.intents), dtype=np.float32)
+        # Only the columns of n-grams present in the text contribute
+        return np.maximum.reduceat(self.matrix[:, columns] @ weights, self.offsets)
+
+    def predict(self, text: str) -> Tuple[str, float, float]:
+        """Top intent, its similarity and its margin over the second-best intent"""
+        scores = self.scores(text)
+        if len(scores) < 2:
+            return (self.intents[0] if self.intents else "unknown"), float(scores.max(initial=0.0)), 0.0
+        # Ties go to the first intent, as in the encoder path
+        first = int(np.argmax(scores))
+        second = np.partition(scores, -2)[-2]
+        return self.intents[first], float(scores[first]), float(scores[first] - second)
+
+    def accepts(self, confidence: float, margin: float) -> bool:
+        """Whether a prediction is trusted without the encoder"""
+        return confidence >= self.confidence_bound and margin >= self.margin_bound
+
+    def _calibrate(self, owners: List[set]):
+        """Pick the bounds that accept the most leave-one-out predictions at the target precision.
+        owners holds, per example, the intents that count as a correct prediction."""
+        similarities = self.matrix @ self.matrix.T
+        np.fill_diagonal(similarities, -1.0)  # Leave each example out of its own prediction
+        per_intent = np.maximum.reduceat(similarities, self.offsets, axis=1)
+        if per_intent.shape[1] < 2:
+            return
+
+        ranked = np.sort(per_intent, axis=1)
+        confidence = ranked[:, -1]
+        margin = ranked[:, -1] - ranked[:, -2]
+        correct = np.array([prediction in owner for prediction, owner in zip(per_intent.argmax(axis=1), owners)])
+
+        best = None
+        for confidence_bound in np.arange(self.min_confidence, 1.0, 0.05):
+            for margin_bound in np.arange(0.0, 0.5, 0.02):
+                accepted = (confidence >= confidence_bound) & (margin >= margin_bound)
+                if not accepted.any():
+                    continue
+                precision = correct[accepted].mean()
+                coverage = accepted.mean()
+                if precision >= self.target_precision and (best is None or coverage > best[0]):
+                    best = (coverage, precision, float(confidence_bound), float(margin_bound))
+
+        if best is None:
+            self.calibration = {"coverage": 0.0, "precision": None}
+            return  # Bounds stay infinite - every utterance goes to the encoder
+        coverage, precision, self.confidence_bound, self.margin_bound = best
+        self.calibration = {"coverage": float(coverage), "precision": float(precision)}
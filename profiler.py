@@ -0,0 +1,253 @@
+"""
+Sampling profiler - on-demand stack sampling of every thread in the process
+
+While running, a background thread snapshots all thread stacks at a fixed rate
+with sys._current_frames(). Samples are aggregated as collapsed stacks
+("thread;outer;...;inner count" lines - the input format of flamegraph.pl and
+speedscope) and attributed to pipeline stages by the innermost frame that
+belongs to a known component. Threads that are blocked waiting are counted as
+idle instead of being attributed.
+
+Also has the helpers used by the memory report.
+"""
+
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+# (path fragment, function name or None for any) -> stage, checked from the innermost frame outwards
+STAGE_RULES = [
+    ("pyttsx3", None, "tts"),
+    ("speech_recognition", "recognize_google", "asr"),
+    ("speech_recognition", "listen", "endpointing"),
+    ("speech_recognition", None, "audio"),
+    ("sentence_transformers", None, "classify"),
+    ("/ai.py", None, "classify"),
+    ("/commands/", None, "handler"),
+    ("core/execution_lanes.py", "_worker", "lane"),
+    ("core/command_processor.py", "_execute_command", "dispatch"),
+    ("core/session_hub.py", None, "hub"),
+    ("core/command_processor.py", None, "processor"),
+    ("core/control_server.py", None, "control"),
+]
+
+# Innermost functions that mean the thread is blocked rather than working
+IDLE_FUNCTIONS = {"wait", "select", "poll", "get", "sleep", "accept", "recv", "readline", "_wait_for_tstate_lock"}
+# Innermost frames that block inside a C call (input(), time.sleep) with no Python frame of their own
+IDLE_FRAMES = {("core/assistant.py", "start")}
+
+UNATTRIBUTED = "other"
+IDLE = "idle"
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Periodic all-thread stack sampler with collapsed-stack output"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval    # Seconds between samples
+        self.max_depth = max_depth  # Deeper stacks are truncated at the outermost end
+        self.stacks = collections.Counter()  # "thread;frame;...;frame" -> samples
+        self.stages = collections.Counter()  # Stage -> samples
+        self.samples = 0
+        self.sample_time = 0.0  # Time spent taking samples (the profiler's own overhead)
+        self.started_at = None
+        self.stopped_at = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None):
+        """Clear previous results and start sampling"""
+        if self.is_running:
+            return
+        if interval:
+            self.interval = interval
+        with self._lock:
+            self.stacks.clear()
+            self.stages.clear()
+            self.samples = 0
+            self.sample_time = 0.0
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling - results stay available until the next start"""
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.stopped_at = time.time()
+
+    def toggle(self) -> bool:
+        """Start if stopped, stop if running - returns whether it is now running"""
+        if self.is_running:
+            self.stop()
+        else:
+            self.start()
+        return self.is_running
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            started = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+
+            stacks = []
+            stages = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                codes = []
+                while frame is not None and len(codes) < self.max_depth:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stacks.append(";".join([names.get(thread_id, str(thread_id))] +
+                                       [_frame_label(code) for code in reversed(codes)]))
+                stages.append(self._classify(codes))
+            del frames
+
+            with self._lock:
+                self.stacks.update(stacks)
+                self.stages.update(stages)
+                self.samples += 1
+                self.sample_time += time.perf_counter() - started
+
+    @staticmethod
+    def _classify(codes: List) -> str:
+        """Stage for a stack given innermost frame first"""
+        if codes:
+            innermost = codes[0]
+            if innermost.co_name in IDLE_FUNCTIONS:
+                return IDLE
+            path = innermost.co_filename.replace("\\", "/")
+            if any(fragment in path and innermost.co_name == function for fragment, function in IDLE_FRAMES):
+                return IDLE
+        for code in codes:
+            path = code.co_filename.replace("\\", "/")
+            for fragment, function, stage in STAGE_RULES:
+                if fragment in path and (function is None or code.co_name == function):
+                    return stage
+        return UNATTRIBUTED
+
+    # ---- Results ----
+
+    def write_collapsed(self, path: str) -> int:
+        """Write collapsed stacks for flamegraph.pl / speedscope - returns the number of lines"""
+        with self._lock:
+            lines = [f"{stack} {count}\n" for stack, count in self.stacks.most_common()]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+        return len(lines)
+
+    def get_report(self, top: int = 10) -> Dict[str, Any]:
+        """Busy time per stage and the functions most often on top of a busy stack"""
+        with self._lock:
+            stages = dict(self.stages)
+            stacks = list(self.stacks.items())
+            samples = self.samples
+            sample_time = self.sample_time
+
+        busy = sum(count for stage, count in stages.items() if stage != IDLE)
+        leaves = collections.Counter()
+        for stack, count in stacks:
+            leaf = stack.rsplit(";", 1)[-1]
+            if leaf.rsplit(":", 1)[-1] not in IDLE_FUNCTIONS:
+                leaves[leaf] += count
+
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.is_running,
+            "duration": end - self.started_at if self.started_at else 0.0,
+            "samples": samples,
+            "overhead": sample_time,
+            "stages": {
+                stage: {"samples": count, "share": count / busy if busy else 0.0}
+                for stage, count in sorted(stages.items(), key=lambda item: -item[1]) if stage != IDLE
+            },
+            "idle_samples": stages.get(IDLE, 0),
+            "top_functions": [{"function": name, "samples": count} for name, count in leaves.most_common(top)],
+        }
+
+    def install_signal_handler(self, on_stop=None, signum: Optional[int] = None) -> bool:
+        """Toggle sampling when the process receives signum (SIGUSR2 by default).
+        on_stop is called after sampling stops, e.g. to write the results."""
+        if signum is None:
+            signum = getattr(signal, "SIGUSR2", None)
+        if signum is None:
+            return False  # Not available on Windows
+
+        def handler(*_):
+            if not self.toggle() and on_stop:
+                on_stop()
+
+        try:
+            signal.signal(signum, handler)
+            return True
+        except ValueError:
+            return False  # Signal handlers can only be installed from the main thread
+
+
+# ---- Memory ----
+
+def get_rss() -> Optional[int]:
+    """Resident set size in bytes (peak RSS where the current value is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, KiB elsewhere
+    except (ImportError, OSError):
+        return None
+
+
+def model_weight_bytes(model) -> Optional[int]:
+    """Bytes held by a torch model's parameters and buffers, None if not a torch model"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except (AttributeError, TypeError):
+        return None
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def thread_summary() -> Dict[str, int]:
+    """Live threads grouped by name, with numeric suffixes folded ("lane-process-2" -> "lane-process")"""
+    groups = collections.Counter()
+    for thread in threading.enumerate():
+        groups[thread.name.rstrip("0123456789").rstrip("-_ ") or thread.name] += 1
+    return dict(groups)
+
+
+def format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "n/a"
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
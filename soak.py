@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Soak test - drive the full assistant pipeline for hours and watch for slow leaks
+
+Speech, text-to-speech and every OS-facing backend (keyboard, mixer, clipboard,
+windows) are replaced by stubs; application launches start a trivial Python
+child so process reaping is exercised too. Everything in between - session
+hub, classifier, lanes, handlers, tracer - is the real code.
+
+While running, resident memory, live threads, queue depth and the p99 of
+end-to-end latency are sampled at a fixed interval. At the end the run fails
+(exit status 1) when, after the warm-up, any of them grew from the first third
+of the samples to the last third by more than its tolerance, or when the
+pipeline had to drop utterances.
+
+    python soak.py --duration 2h --rate 2
+    python soak.py --duration 10m --rate 5 --out soak_samples.csv
+"""
+
+import argparse
+import collections
+import csv
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from commands.app_commands import AppCommands
+from commands.app_launcher import AppLauncher, AppSpec
+from commands.clipboard import ClipboardBackend
+from commands.keyboard import KeyboardBackend
+from commands.media_commands import MediaCommands
+from commands.media_sessions import FakeMediaSessions
+from commands.mixer import FakeMixer
+from commands.text_commands import TextCommands
+from commands.text_injector import TextInjector
+from commands.window_system import FakeWindowBackend
+from core.assistant import Assistant
+from core.command_processor import CommandProcessor
+from profiler import get_rss, format_bytes
+
+# Utterance mix - no shutdown/restart/sleep and nothing that opens a browser
+UTTERANCES = [
+    "hey nico",
+    "nico volume up",
+    "nico volume down",
+    "nico mute",
+    "nico next song",
+    "nico previous song",
+    "nico play",
+    "nico play music",
+    "nico fullscreen",
+    "nico volume to 40 percent",
+    "nico what time is it",
+    "nico write hello from the soak test",
+    "nico press enter",
+    "nico open notepad",
+    "nico open calculator",
+    "nico volume up and next song",
+    "what a nice day outside",  # No wake word - ignored
+]
+
+
+class StubAudioSource:
+    """Stands in for SpeechRecognizer - emits recognized text at random (Poisson) intervals"""
+
+    def __init__(self, tracer, rate: float, utterances: List[str], asr_delay: float = 0.05,
+                 seed: Optional[int] = None):
+        self.tracer = tracer
+        self.rate = rate
+        self.utterances = utterances
+        self.asr_delay = asr_delay  # Simulated speech-to-text time
+        self.random = random.Random(seed)
+        self.audio_stats = {"in_flight": 0, "last": 0, "peak": 0, "utterances": 0}
+        self.dropped = 0
+        self.sent = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_listening(self, command_queue):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(command_queue,), name="stub-audio", daemon=True)
+        self._thread.start()
+
+    def stop_listening(self):
+        self._stop.set()
+
+    def _run(self, command_queue):
+        while not self._stop.wait(self.random.expovariate(self.rate)):
+            text = self.random.choice(self.utterances)
+            trace = self.tracer.start_trace()
+            trace.mark("endpointing")
+            time.sleep(self.asr_delay)
+            trace.mark("asr")
+
+            size = int(len(text) * 0.08 * 32000)  # About 80 ms of 16 kHz 16-bit audio per character
+            self.audio_stats["last"] = size
+            self.audio_stats["peak"] = max(self.audio_stats["peak"], size)
+            self.audio_stats["utterances"] += 1
+            try:
+                command_queue.put_nowait((text, trace))
+                self.sent += 1
+            except queue.Full:
+                self.dropped += 1
+
+
+class StubTTS:
+    """pyttsx3-compatible engine that takes time to speak but makes no sound"""
+
+    def __init__(self, seconds_per_char: float = 0.002):
+        self.seconds_per_char = seconds_per_char
+        self.pending = []
+        self.spoken = 0
+
+    def setProperty(self, name, value):
+        pass
+
+    def getProperty(self, name):
+        return [] if name == "voices" else None
+
+    def say(self, text: str):
+        self.pending.append(text)
+
+    def runAndWait(self):
+        pending, self.pending = self.pending, []
+        for text in pending:
+            time.sleep(len(text) * self.seconds_per_char)
+            self.spoken += 1
+
+    def stop(self):
+        self.pending = []
+
+
+class NullKeyboard(KeyboardBackend):
+    """Accepts every key and sends nothing"""
+
+    def _send_events(self, events):
+        pass
+
+
+class NullClipboard(ClipboardBackend):
+    """Holds only the current text"""
+
+    def __init__(self):
+        self.text = None
+
+    def get_text(self) -> Optional[str]:
+        return self.text
+
+    def set_text(self, text: str):
+        self.text = text
+
+
+def build_assistant(rate: float, seed: Optional[int] = None):
+    """Assistant with stubbed devices, plus the stub audio source feeding it"""
+    processor = CommandProcessor(tts_engine=StubTTS())
+    registry = processor.command_registry
+
+    keyboard = NullKeyboard()
+    windows = FakeWindowBackend([("YouTube Music - Google Chrome", "chrome.exe"), ("Calculator", "calc.exe")])
+    windows.activated = collections.deque(maxlen=256)
+    child = [sys.executable, "-c", "pass"]
+    apps = {name: AppSpec(name, [child]) for name in ("stremio", "notepad", "calculator")}
+
+    registry.register_handler_instance(MediaCommands(
+        mixer=FakeMixer(), keyboard=keyboard, window_backend=windows,
+        media_sessions=FakeMediaSessions({"spotify": "Paused"})
+    ))
+    registry.register_handler_instance(TextCommands(
+        TextInjector(NullClipboard(), restore_delay=0.0, keyboard=keyboard), keyboard
+    ))
+    registry.register_handler_instance(AppCommands(AppLauncher(window_backend=windows, apps=apps)))
+
+    assistant = Assistant(use_microphone=False, command_processor=processor)
+    source = StubAudioSource(assistant.tracer, rate, UTTERANCES, seed=seed)
+    assistant.hub.add_session("soak", recognizer=source)
+    return assistant, source
+
+
+def parse_duration(text: str) -> float:
+    """Seconds from "90", "30s", "10m" or "2h" """
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1:] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class SoakSampler:
+    """Periodic samples of resource use and latency"""
+
+    def __init__(self, assistant: Assistant):
+        self.assistant = assistant
+        self.samples = []
+        self._finished = 0
+        self._started = time.monotonic()
+
+    def sample(self) -> Dict[str, Any]:
+        self._finished, durations = self.assistant.tracer.get_durations_since(self._finished)
+        durations.sort()
+
+        hub = self.assistant.hub.get_stats()
+        lanes = self.assistant.command_processor.get_lane_stats()
+        row = {
+            "elapsed": time.monotonic() - self._started,
+            "rss": get_rss() or 0,
+            "threads": threading.active_count(),
+            "queue_depth": sum(s["queue_size"] for s in hub["sessions"].values()) +
+                           sum(stats["queue_depth"] for stats in lanes.values()),
+            "p99": durations[min(len(durations) - 1, int(round(0.99 * (len(durations) - 1))))] if durations else 0.0,
+            "finished": len(durations),
+        }
+        self.samples.append(row)
+        return row
+
+
+def check_growth(name: str, values: List[float], tolerance: float, relative: bool,
+                 floor: float = 0.0) -> Optional[str]:
+    """Failure message if the last third of values sits above the first third by more than the tolerance"""
+    third = len(values) // 3
+    if third < 2:
+        return None
+    first = sum(values[:third]) / third
+    last = sum(values[-third:]) / third
+    limit = max(tolerance * first if relative else tolerance, floor)
+    if last - first > limit:
+        return f"{name} grew from {first:.4g} to {last:.4g} (allowed +{limit:.4g})"
+    return None
+
+
+def analyze(samples: List[Dict[str, Any]], args, source: StubAudioSource) -> List[str]:
+    """Failure messages for the samples after warm-up"""
+    steady = [row for row in samples if row["elapsed"] >= args.warmup]
+    if len(steady) < 6:
+        print(f"Only {len(steady)} samples after warm-up - run longer for drift checks")
+
+    failures = [
+        check_growth("RSS", [row["rss"] for row in steady], args.rss_tolerance, relative=True),
+        check_growth("Thread count", [row["threads"] for row in steady], args.thread_tolerance, relative=False),
+        check_growth("Queue depth", [row["queue_depth"] for row in steady], args.queue_tolerance, relative=False),
+        check_growth("p99 latency", [row["p99"] for row in steady if row["finished"]], args.latency_tolerance,
+                     relative=True, floor=args.latency_floor),
+    ]
+    if source.dropped:
+        failures.append(f"{source.dropped} utterances dropped because the command queue was full")
+    return [failure for failure in failures if failure]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the assistant pipeline with stubbed devices")
+    parser.add_argument("--duration", default="1h", help="run time, e.g. 600, 30m, 4h (default 1h)")
+    parser.add_argument("--rate", type=float, default=1.0, help="utterances per second (default 1)")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between samples (default 10)")
+    parser.add_argument("--warmup", type=float, default=60.0, help="seconds excluded from drift checks")
+    parser.add_argument("--rss-tolerance", type=float, default=0.10, help="allowed relative RSS growth")
+    parser.add_argument("--thread-tolerance", type=float, default=2, help="allowed growth in live threads")
+    parser.add_argument("--queue-tolerance", type=float, default=5, help="allowed growth in queued items")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed relative p99 drift")
+    parser.add_argument("--latency-floor", type=float, default=0.005,
+                        help="p99 drift in seconds that is never treated as a failure")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the samples as CSV")
+    args = parser.parse_args()
+
+    duration = parse_duration(args.duration)
+    assistant, source = build_assistant(args.rate, args.seed)
+    sampler = SoakSampler(assistant)
+
+    print(f"Soak test: {duration:.0f}s at {args.rate} utterances/s, sampling every {args.interval}s")
+    assistant.is_running = True
+    assistant._start_pipeline()
+    deadline = time.monotonic() + duration
+    try:
+        while time.monotonic() < deadline:
+            time.sleep(min(args.interval, max(0.0, deadline - time.monotonic())))
+            row = sampler.sample()
+            print(f"[{row['elapsed']:7.0f}s] rss={format_bytes(row['rss'])} threads={row['threads']} "
+                  f"queue={row['queue_depth']} p99={row['p99'] * 1000:.1f}ms n={row['finished']}")
+    except KeyboardInterrupt:
+        print("Interrupted - analyzing the samples so far")
+    finally:
+        assistant._stop()
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(sampler.samples[0]) if sampler.samples else ["elapsed"])
+            writer.writeheader()
+            writer.writerows(sampler.samples)
+        print(f"Wrote {len(sampler.samples)} samples to {args.out}")
+
+    print(f"Utterances sent: {source.sent}, dropped: {source.dropped}, "
+          f"responses spoken: {assistant.command_processor.tts_engine.spoken}")
+    failures = analyze(sampler.samples, args, source)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("PASS: no growth or latency drift beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
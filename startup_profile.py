@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Startup profile - per-module import times and an import-time budget check
+
+Imports the package in a fresh interpreter with `-X importtime`, reports the
+slowest modules, and exits non-zero when the import takes longer than the
+budget or pulls in a heavy dependency that should only load on first use,
+so it can gate CI:
+
+    python startup_profile.py                    # report for the package
+    python startup_profile.py --module ai        # report for one module
+    python startup_profile.py --budget 0.5       # fail above 0.5 s
+    python startup_profile.py --check            # no report, just the checks for every entry module
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds importing the top-level package may take (override with ASSISTANT_IMPORT_BUDGET)
+DEFAULT_IMPORT_BUDGET = 1.0
+
+# Dependencies that must only be imported on first use - each costs from tens of ms to seconds
+HEAVY_MODULES = ("numpy", "torch", "sentence_transformers", "transformers", "sklearn",
+                 "speech_recognition", "pyaudio", "pyttsx3", "pyautogui", "jeepney")
+
+# Modules whose import is on the startup path - checked by --check
+ENTRY_MODULES = ("ai", "main", "core.assistant", "core.command_processor", "core.speech_recognizer",
+                 "core.zygote", "commands.command_registry", "commands.manifest", "batch_classify")
+
+
+def profile_import(module: str = None) -> Dict[str, Any]:
+    """Import module (default: the top-level package) in a subprocess and collect timings"""
+    parent_dir = os.path.dirname(PACKAGE_DIR)
+    module = module or os.path.basename(PACKAGE_DIR)
+
+    # The package uses absolute imports of its own modules, so both directories go on the path
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_DIR, parent_dir, env.get("PYTHONPATH")]))
+
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - start)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=parent_dir, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Header line
+        name = parts[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self": int(parts[0]) / 1e6,
+            "cumulative": int(parts[1]) / 1e6,
+        })
+
+    return {
+        "module": module,
+        "total": float(proc.stdout.strip().splitlines()[-1]),
+        "modules": modules,
+    }
+
+
+def print_report(profile: Dict[str, Any], top: int = 15):
+    """Print the slowest modules by cumulative and self time"""
+    modules: List[Dict[str, Any]] = profile["modules"]
+    print(f"=== Startup profile: import {profile['module']} ===")
+    print(f"Total import time: {profile['total'] * 1000:.1f} ms ({len(modules)} modules)")
+
+    print("\nSlowest by cumulative time:")
+    for entry in sorted(modules, key=lambda m: m["cumulative"], reverse=True)[:top]:
+        print(f"  {entry['cumulative'] * 1000:9.1f} ms  {entry['module']}")
+
+    print("\nSlowest by self time:")
+    for entry in sorted(modules, key=lambda m: m["self"], reverse=True)[:top]:
+        print(f"  {entry['self'] * 1000:9.1f} ms  {entry['module']}")
+
+
+def heavy_imports(profile: Dict[str, Any]) -> List[str]:
+    """Heavy dependencies the import loaded eagerly"""
+    loaded = {entry["module"].split(".")[0] for entry in profile["modules"]}
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+
+def check_lazy_imports(profile: Dict[str, Any]) -> bool:
+    """Whether the import left every heavy dependency for first use"""
+    eager = heavy_imports(profile)
+    if eager:
+        print(f"Eager heavy imports in {profile['module']}: {', '.join(eager)}")
+    return not eager
+
+
+def check_budget(profile: Dict[str, Any], budget: float) -> bool:
+    """Whether the import finished within budget seconds"""
+    within = profile["total"] <= budget
+    verdict = "OK" if within else "OVER BUDGET"
+    print(f"\nImport budget: {profile['total'] * 1000:.1f} ms of {budget * 1000:.0f} ms - {verdict}")
+    return within
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import times")
+    parser.add_argument("--module", default=None, help="module to import (default: the package)")
+    parser.add_argument("--top", type=int, default=15, help="number of modules to list")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that the entry modules import no heavy dependency")
+    parser.add_argument("--budget", type=float,
+                        default=float(os.environ.get("ASSISTANT_IMPORT_BUDGET", DEFAULT_IMPORT_BUDGET)),
+                        help="fail if the import takes longer than this many seconds")
+    args = parser.parse_args()
+
+    if args.check:
+        modules = [args.module] if args.module else ENTRY_MODULES
+        failed = [module for module in modules if not check_lazy_imports(profile_import(module))]
+        print(f"Lazy imports: {len(modules) - len(failed)} of {len(modules)} modules OK")
+        sys.exit(1 if failed else 0)
+
+    profile = profile_import(args.module)
+    print_report(profile, args.top)
+    lazy = check_lazy_imports(profile)
+    if not check_budget(profile, args.budget) or not lazy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
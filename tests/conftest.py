@@ -0,0 +1,115 @@
+"""
+Shared test setup - the modules live at the repository root, not in an installed package
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import hashlib
+import types
+
+import numpy as np
+import pytest
+
+
+class HashEncoder:
+    """Stand-in for SentenceTransformer - a bag of hashed words, so shared words mean similar texts"""
+
+    dimensions = 256
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        return embeddings
+
+
+@pytest.fixture
+def intent_classifier(monkeypatch):
+    """IntentClassifier backed by HashEncoder instead of a downloaded model"""
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=HashEncoder))
+    from ai import IntentClassifier
+    return IntentClassifier(model_name="test-hash-encoder", audit_rate=0)
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class _FakeMicrophone:
+    CHUNK = 1600
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, device_index=None):
+        self.stream = _FakeStream([])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeRecognizer:
+    """speech_recognition.Recognizer defaults"""
+
+    def __init__(self):
+        self.energy_threshold = 300
+        self.dynamic_energy_threshold = True
+        self.dynamic_energy_adjustment_damping = 0.15
+        self.dynamic_energy_ratio = 1.5
+        self.pause_threshold = 0.8
+        self.phrase_threshold = 0.3
+        self.non_speaking_duration = 0.5
+        self.transcripts = []
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        pass
+
+    def recognize_google(self, audio, language=None, show_all=False):
+        return {"alternative": [{"transcript": text} for text in self.transcripts]}
+
+
+class _AudioData:
+    def __init__(self, frame_data, sample_rate, sample_width):
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+
+def chunk(level, seconds=0.1, rate=16000, seed=0):
+    """seconds of 16-bit noise with RMS level"""
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(0, level, int(rate * seconds)), -32768, 32767).astype(np.int16).tobytes()
+
+
+@pytest.fixture
+def speech_recognizer(monkeypatch):
+    """Build a SpeechRecognizer over a fake microphone that plays the given chunks, then ends"""
+    from core import speech_recognizer as module
+
+    fake_sr = types.SimpleNamespace(Recognizer=_FakeRecognizer, Microphone=_FakeMicrophone, AudioData=_AudioData,
+                                    UnknownValueError=type("UnknownValueError", (Exception,), {}),
+                                    RequestError=type("RequestError", (Exception,), {}))
+    monkeypatch.setattr(module, "sr", fake_sr)
+
+    def build(chunks=()):
+        recognizer = module.SpeechRecognizer()
+        recognizer.microphone.stream = _FakeStream(chunks)
+        return recognizer
+    return build
@@ -0,0 +1,104 @@
+import subprocess
+import sys
+
+import pytest
+
+from commands import app_launcher
+from commands.app_launcher import AppLauncher, AppSpec
+from commands.window_system import FakeWindowBackend, NullWindowBackend, X11WindowBackend
+
+
+class _Backend(FakeWindowBackend):
+    def __init__(self, windows=()):
+        super().__init__(windows)
+        self.activated = []
+
+    def activate_window(self, handle):
+        self.activated.append(handle)
+        return True
+
+
+def _launcher(backend, **apps):
+    return AppLauncher(backend, apps=apps or {"calculator": AppSpec("calculator", [["gnome-calculator"]])},
+                       reap_interval=0.01)
+
+
+def test_browser_tab_named_after_the_app_is_not_focused(monkeypatch):
+    backend = _Backend([("Calculator - Google Search - Chromium", "chromium", 10, "chromium.Chromium")])
+    launcher = _launcher(backend)
+    started = []
+    monkeypatch.setattr(launcher, "_start", lambda app, t: started.append(app.name) or True)
+    assert launcher.launch("calculator")
+    assert backend.activated == [] and started == ["calculator"]
+
+
+def test_running_app_is_focused_by_window_class():
+    backend = _Backend([("Inbox - Mozilla Firefox", "firefox", 10, "Navigator.firefox"),
+                        ("Calculator", "", 20, "gnome-calculator.Gnome-calculator")])
+    launcher = _launcher(backend)
+    assert launcher.launch("calculator")
+    assert backend.activated == [2]
+    assert launcher.get_stats()["calculator"]["focus"]["count"] == 1
+
+
+class _Process:
+    def __init__(self, pid):
+        self.pid = pid
+
+    def wait(self, timeout=None):
+        raise subprocess.TimeoutExpired("app", timeout)
+
+
+def test_launched_pid_wins_over_other_instances():
+    backend = _Backend([("Calculator", "gnome-calculator", 30),
+                        ("Calculator", "gnome-calculator", 31)])
+    launcher = _launcher(backend)
+    launcher.launched["calculator"] = [app_launcher._LaunchRecord("calculator", _Process(31), 0.0)]
+    assert launcher.launch("calculator")
+    assert backend.activated == [2]
+
+
+def test_null_backend_never_tries_to_focus(monkeypatch):
+    launcher = _launcher(NullWindowBackend())
+    started = []
+    monkeypatch.setattr(launcher, "_start", lambda app, t: started.append(app.name) or True)
+    assert launcher.launch("calculator")
+    assert started == ["calculator"]
+
+
+def test_exited_children_are_reaped_even_if_waited_elsewhere():
+    launcher = AppLauncher(NullWindowBackend(), apps={"py": AppSpec("py", [[sys.executable, "-c", "pass"]])},
+                           reap_interval=0.01)
+    assert launcher.launch("py")
+    record = launcher.launched["py"][0]
+    record.process.wait()  # Someone else reaped it first
+    launcher._reaper.join(timeout=5)
+    assert not launcher._reaper.is_alive()
+    assert launcher.launched == {}
+    assert not record.is_running
+
+
+def test_x11_backend_parses_wmctrl_and_stacking(monkeypatch):
+    outputs = {
+        "wmctrl": "0x03a00003  0 4242  gnome-calculator.Gnome-calculator  host Calculator\n"
+                  "0x01200007 -1 100   panel.Panel  host Top bar\n"
+                  "0x02c00001  0 4343  Navigator.firefox  host Inbox — Mozilla Firefox\n",
+        "_NET_CLIENT_LIST_STACKING": "_NET_CLIENT_LIST_STACKING(WINDOW): window id # 0x3a00003, 0x2c00001\n",
+        "_NET_ACTIVE_WINDOW": "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x2c00001\n",
+    }
+    backend = X11WindowBackend()
+    monkeypatch.setattr(backend, "_run", lambda *args: outputs[args[0] if args[0] == "wmctrl" else args[-1]])
+    windows = backend.enumerate_windows()
+    assert [(w.handle, w.pid, w.title) for w in windows] == [
+        (0x2c00001, 4343, "Inbox — Mozilla Firefox"), (0x3a00003, 4242, "Calculator")]
+    assert windows[1].app_names() >= {"gnome-calculator"}
+    assert backend.get_foreground_window() == 0x2c00001
+
+
+@pytest.mark.parametrize("process_name, window_class, expected", [
+    ("CalculatorApp.exe", "", {"calculatorapp"}),
+    ("", "kcalc.kcalc", {"kcalc"}),
+])
+def test_app_names_strip_extension_and_split_class(process_name, window_class, expected):
+    window = FakeWindowBackend([("x", process_name, 1, window_class)]).windows[0]
+    assert window.app_names() == expected
@@ -0,0 +1,63 @@
+import argparse
+import json
+
+import pytest
+
+import batch_classify
+
+LINES = ["open calculator", "next song", "", "write hello world", "open notepad and next song", "banana bread"]
+
+
+@pytest.fixture
+def args(tmp_path, intent_classifier):
+    source = tmp_path / "transcripts.jsonl"
+    records = [json.dumps({"id": i, "text": text}) for i, text in enumerate(LINES)] + ["not json"]
+    source.write_text("\n".join(records) + "\n")
+    return argparse.Namespace(input=str(source), output=str(tmp_path / "out.jsonl"), format=None,
+                              text_field="text", workers=1, threads=0, chunk_size=3, batch_size=4, top_k=2,
+                              model="test-hash-encoder", cascade=False, resume=False)
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_every_line_gets_a_record_in_order(args):
+    assert batch_classify.run(args) == len(LINES) + 1
+    records = _records(args.output)
+    assert [r["line"] for r in records] == list(range(1, len(LINES) + 2))
+    assert records[0]["intent"] == "open_calculator" and records[0]["id"] == 0
+    assert len(records[0]["top_k"]) == 2 and records[0]["accepted"]
+    assert records[2]["intent"] == "unknown" and not records[2]["accepted"]
+    assert records[3]["intent"] == "write_text"
+    assert records[4]["intent"] == "compound_command" and len(records[4]["commands"]) == 2
+    assert records[-1] == {"line": len(LINES) + 1, "error": "unreadable line"}
+
+
+def test_resume_continues_after_the_last_checkpoint(args, monkeypatch):
+    classify = batch_classify.classify_chunk
+    calls = []
+
+    def interrupted(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return classify(chunk)
+
+    monkeypatch.setattr(batch_classify, "classify_chunk", interrupted)
+    assert batch_classify.run(args) == 3
+    assert [r["line"] for r in _records(args.output)] == [1, 2, 3]
+
+    monkeypatch.setattr(batch_classify, "classify_chunk", classify)
+    args.resume = True
+    assert batch_classify.run(args) == len(LINES) + 1 - 3
+    assert [r["line"] for r in _records(args.output)] == list(range(1, len(LINES) + 2))
+
+
+def test_plain_text_input_and_chunking(tmp_path):
+    source = tmp_path / "lines.txt"
+    source.write_text("one\ntwo\nthree\n")
+    lines = list(batch_classify.read_lines(str(source), "text", "text", skip=1))
+    assert lines == [(2, None, "two"), (3, None, "three")]
+    assert [len(chunk) for chunk in batch_classify.read_chunks(iter(range(5)), 2)] == [2, 2, 1]
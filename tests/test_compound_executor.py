@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from commands.command_registry import CommandRegistry
+from commands.compound_executor import BEST_EFFORT
+from commands.handler_supervisor import HandlerSupervisor
+from commands.manifest import compile_manifests
+
+CALLS = []
+RELEASE = threading.Event()
+
+
+def ok(params):
+    CALLS.append(("ok", threading.current_thread().name))
+    return True
+
+
+def fail(params):
+    CALLS.append(("fail", threading.current_thread().name))
+    return False
+
+
+def hang(params):
+    CALLS.append(("hang", threading.current_thread().name))
+    RELEASE.wait(5)
+    return True
+
+
+@pytest.fixture
+def registry():
+    handlers = {"ok": "system", "fail": "system", "hang": "system", "type": "keyboard", "launch": "process"}
+    manifests = [({"intent": intent, "examples": [intent], "lane": lane,
+                   "handler": f"{__name__}:{'ok' if intent in ('type', 'launch') else intent}",
+                   "timeout": 0.2 if intent == "hang" else 5}, "test")
+                 for intent, lane in handlers.items()]
+    CALLS.clear()
+    RELEASE.clear()
+    yield CommandRegistry(compile_manifests(manifests))
+    RELEASE.set()
+
+
+def _run(registry, *intents, policy=None):
+    params = {"commands": [{"intent": intent, "parameters": {}} for intent in intents], "policy": policy}
+    success = registry.execute_command("compound_command", params)
+    return success, [step["status"] for step in params["result"]["steps"]]
+
+
+def test_steps_run_on_supervised_workers(registry):
+    assert _run(registry, "ok", "launch") == (True, ["ok", "ok"])
+    assert all(name.startswith("handler-") for _, name in CALLS)
+    assert registry.supervisor.get_stats()["intents"]["ok"]["count"] == 1
+
+
+def test_step_uses_its_manifest_timeout(registry):
+    started = time.perf_counter()
+    success, statuses = _run(registry, "hang", "ok", policy=BEST_EFFORT)
+    assert time.perf_counter() - started < 2
+    assert (success, statuses) == (False, ["timeout", "ok"])
+    assert registry.supervisor.get_stats()["intents"]["hang"]["timeouts"] == 1
+
+
+def test_keyboard_step_waits_for_earlier_steps_and_stops_on_failure(registry):
+    steps = registry.compound_executor.build_graph(
+        [{"intent": "ok"}, {"intent": "launch"}, {"intent": "type"}, {"intent": "launch"}])
+    assert [s.depends_on for s in steps] == [[], [], [0, 1], [2]]
+    assert _run(registry, "fail", "type") == (False, ["failed", "skipped"])
+
+
+def test_unknown_step_fails_without_a_worker(registry):
+    assert _run(registry, "nope", "ok", policy=BEST_EFFORT) == (False, ["failed", "ok"])
+
+
+def test_supervisor_abandons_and_replaces_a_hung_worker():
+    supervisor = HandlerSupervisor(default_timeout=0.1)
+    release = threading.Event()
+    assert supervisor.run("hang", release.wait, 5) is False
+    assert supervisor.run("quick", lambda: "done") == "done"
+    stats = supervisor.get_stats()
+    assert stats["abandoned"] == 1 and stats["intents"]["hang"]["timeouts"] == 1
+    assert [s["intent"] for s in stats["stuck"]] == ["hang"]
+    release.set()
+
+
+def test_supervisor_wait_past_the_deadline_does_not_block():
+    supervisor = HandlerSupervisor()
+    release = threading.Event()
+    job = supervisor.submit("hang", release.wait, 5, timeout=0.05)
+    time.sleep(0.1)
+    started = time.perf_counter()
+    assert supervisor.wait(job) is False
+    assert time.perf_counter() - started < 0.05 and job.abandoned
+    release.set()
+
+
+def test_supervisor_reraises_handler_errors():
+    supervisor = HandlerSupervisor()
+    with pytest.raises(ZeroDivisionError):
+        supervisor.run("divide", lambda: 1 / 0)
+    assert supervisor.get_stats()["intents"]["divide"]["failures"] == 1
+
+
+def test_keyboard_work_is_refused_while_an_abandoned_keyboard_handler_runs():
+    manifests = [({"intent": intent, "examples": [intent], "lane": lane, "handler": f"{__name__}:{handler}",
+                   "timeout": 0.1}, "test")
+                 for intent, lane, handler in (("stuck_typing", "keyboard", "hang"), ("type", "keyboard", "ok"),
+                                               ("time", "system", "ok"))]
+    registry = CommandRegistry(compile_manifests(manifests))
+    RELEASE.clear()
+    try:
+        assert registry.execute_command("stuck_typing") is False
+        assert registry.execute_command("type") is False
+        assert registry.execute_command("time") is True  # Other lanes are unaffected
+    finally:
+        RELEASE.set()
+    deadline = time.monotonic() + 5
+    while registry.supervisor.stuck_intents() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.execute_command("type") is True
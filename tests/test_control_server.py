@@ -0,0 +1,170 @@
+import json
+import os
+import queue
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+from core.control_server import ControlServer, _Client
+
+
+class _Processor:
+    def __init__(self):
+        self.listeners = []
+
+    def add_event_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_event_listener(self, listener):
+        self.listeners.remove(listener)
+
+
+class _Session:
+    def __init__(self):
+        self.queue = queue.Queue()
+
+
+class _Hub:
+    def __init__(self):
+        self.session = _Session()
+
+    def get_session(self, session_id):
+        return self.session if session_id == "main" else None
+
+
+class _Assistant:
+    def __init__(self):
+        self.command_processor = _Processor()
+        self.hub = _Hub()
+
+    def get_status(self):
+        return {"running": True}
+
+
+@pytest.fixture
+def socket_dir():
+    # AF_UNIX paths are short - pytest's tmp_path can be too long
+    path = tempfile.mkdtemp(prefix="va-", dir="/tmp")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _serve(path, max_buffer=1 << 20):
+    server = ControlServer(_Assistant(), path, max_buffer=max_buffer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(200):
+        if server.is_serving:
+            break
+        time.sleep(0.01)
+    return server, thread
+
+
+@pytest.fixture
+def server(socket_dir):
+    server, thread = _serve(os.path.join(socket_dir, "control.sock"), max_buffer=4096)
+    yield server
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+def _connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(5)
+    client.connect(path)
+    return client
+
+
+def _request(client, request):
+    client.sendall((json.dumps(request) + "\n").encode())
+    data = b""
+    while not data.endswith(b"\n"):
+        data += client.recv(65536)
+    return json.loads(data)
+
+
+def test_ping_and_status(server):
+    with _connect(server.socket_path) as client:
+        assert _request(client, {"id": 1, "op": "ping"}) == {"id": 1, "ok": True}
+        assert _request(client, {"id": 2, "op": "status"})["status"] == {"running": True}
+        assert _request(client, {"id": 3, "op": "nope"})["ok"] is False
+
+
+def test_utterance_reply_comes_from_the_processing_thread(server):
+    with _connect(server.socket_path) as client:
+        client.sendall(b'{"id": 7, "op": "utterance", "text": " open calculator "}\n')
+        utterance = server.assistant.hub.session.queue.get(timeout=5)
+        assert utterance.text == "open calculator" and utterance.source == "socket"
+        utterance.on_result({"intent": "open_calculator", "status": "dispatched"})
+        reply = json.loads(client.recv(65536))
+    assert reply["id"] == 7 and reply["result"]["intent"] == "open_calculator"
+
+
+def test_socket_is_owner_only(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_refuses_to_replace_a_live_socket(server):
+    with pytest.raises(RuntimeError, match="Another instance"):
+        ControlServer(_Assistant(), server.socket_path).serve_forever()
+    with _connect(server.socket_path) as client:
+        assert _request(client, {"id": 1, "op": "ping"})["ok"]
+
+
+def test_refuses_to_remove_a_file_that_is_not_a_socket(socket_dir):
+    path = os.path.join(socket_dir, "control.sock")
+    with open(path, "w") as f:
+        f.write("keep me")
+    with pytest.raises(RuntimeError, match="not a socket"):
+        ControlServer(_Assistant(), path).serve_forever()
+    assert open(path).read() == "keep me"
+
+
+def test_replaces_a_stale_socket(socket_dir):
+    path = os.path.join(socket_dir, "control.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)  # Bound but not listening, like a socket left by a crash
+    stale.close()
+    server, thread = _serve(path)
+    try:
+        with _connect(path) as client:
+            assert _request(client, {"id": 1, "op": "ping"})["ok"]
+    finally:
+        server.shutdown()
+        thread.join(timeout=5)
+    assert not os.path.exists(path)
+
+
+def test_shutdown_leaves_a_replaced_socket_alone(socket_dir):
+    path = os.path.join(socket_dir, "control.sock")
+    server, thread = _serve(path)
+    os.unlink(path)
+    with open(path, "w") as f:
+        f.write("another instance")
+    server.shutdown()
+    thread.join(timeout=5)
+    assert os.path.exists(path)
+
+
+def test_endless_line_disconnects_the_client(server):
+    with _connect(server.socket_path) as client:
+        client.sendall(b"x" * 10000)
+        assert client.recv(1024) == b""
+
+
+def test_unread_replies_disconnect_the_client(server):
+    a, b = socket.socketpair()
+    try:
+        client = _Client(a)
+        client.outbuf += b"x" * (server.max_buffer + 1)
+        server._send(client, {"event": "heard"}, droppable=True)
+        assert not client.closed
+        server._send(client, {"id": 1, "ok": True})
+        assert client.closed
+    finally:
+        b.close()
@@ -0,0 +1,98 @@
+import queue
+
+import pytest
+
+from conftest import chunk
+from core.endpointer import AdaptiveEndpointer, BASE, COMMAND, DICTATION, SHORT
+
+QUIET, LOUD = 30, 3000
+
+
+def _capture(recognizer):
+    """Run the capture loop over the fake microphone - (seconds of audio, endpoint reason) per phrase"""
+    recognizer._listening = True
+    recognizer._listen_loop()
+    phrases = []
+    while True:
+        try:
+            audio, _, _ = recognizer._phrases.get_nowait()
+        except queue.Empty:
+            break
+        phrases.append(len(audio.frame_data) / (audio.sample_rate * audio.sample_width))
+    reasons = [reason for reason, stats in recognizer.endpointer.get_stats()["reasons"].items()
+               for _ in range(stats["count"])]
+    return phrases, reasons
+
+
+def test_loud_speech_is_not_cut_off_by_threshold_drift(speech_recognizer):
+    chunks = [chunk(QUIET)] * 10 + [chunk(LOUD, seed=i) for i in range(40)] + [chunk(QUIET)] * 15
+    recognizer = speech_recognizer(chunks)
+    phrases, reasons = _capture(recognizer)
+    assert len(phrases) == 1 and phrases[0] >= 4.0
+    assert reasons == [BASE]
+    assert recognizer.recognizer.energy_threshold < LOUD
+
+
+def test_threshold_adapts_to_noise_between_phrases(speech_recognizer):
+    recognizer = speech_recognizer([chunk(QUIET)] * 30)
+    _capture(recognizer)
+    assert recognizer.recognizer.energy_threshold < 100  # Drifted from 300 towards 1.5 x the noise
+
+
+def test_short_command_ends_on_the_short_pause(speech_recognizer):
+    recognizer = speech_recognizer([chunk(QUIET)] * 5 + [chunk(LOUD)] * 5 + [chunk(QUIET)] * 10)
+    phrases, reasons = _capture(recognizer)
+    assert reasons == [SHORT] and len(phrases) == 1
+
+
+@pytest.fixture
+def endpointer():
+    return AdaptiveEndpointer(base_pause=0.8, short_pause=0.35, command_pause=0.2, dictation_pause=1.4)
+
+
+def _speak(endpointer, start, voiced_seconds, silence_seconds, step=0.1):
+    endpointer.start_phrase(start)
+    now = start
+    for _ in range(round(voiced_seconds / step)):
+        now += step
+        endpointer.add_chunk(now, step, True)
+    for _ in range(round(silence_seconds / step)):
+        now += step
+        endpointer.add_chunk(now, step, False)
+    return now
+
+
+def test_long_phrase_waits_for_the_base_pause(endpointer):
+    _speak(endpointer, 0.0, 2.0, 0.7)
+    assert endpointer.check() is None
+    endpointer.add_chunk(2.8, 0.1, False)
+    assert endpointer.check() == BASE
+
+
+def test_complete_command_ends_early_and_dictation_waits(endpointer):
+    _speak(endpointer, 0.0, 0.5, 0.3)  # Under the short pause
+    endpointer.set_partial(endpointer.voiced, ("mute", False))
+    assert endpointer.check() == COMMAND
+
+    _speak(endpointer, 5.0, 0.5, 1.0)
+    endpointer.set_partial(endpointer.voiced, ("write_text", True))
+    assert endpointer.check() is None
+    assert endpointer.pause_for() == (DICTATION, 1.4)
+
+
+def test_stale_partial_is_ignored(endpointer):
+    _speak(endpointer, 0.0, 0.5, 0.0)
+    covered = endpointer.voiced
+    endpointer.add_chunk(0.6, 0.1, True)
+    endpointer.set_partial(covered, ("mute", False))
+    assert endpointer.partial is None
+
+
+def test_speech_resuming_after_an_early_endpoint_counts_as_early(endpointer):
+    end = _speak(endpointer, 0.0, 0.5, 0.4)
+    assert endpointer.check() == SHORT
+    endpointer.end_phrase(SHORT)
+    endpointer.start_phrase(end + 0.1)  # Still talking
+    stats = endpointer.get_stats()
+    assert stats["early"] == 1 and stats["reasons"][SHORT]["early_rate"] == 1.0
+    assert stats["saved_per_utterance"] == pytest.approx(0.4)
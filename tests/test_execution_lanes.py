@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from commands.command_registry import CommandRegistry
+from core.execution_lanes import (ExecutionLane, LaneManager, KEYBOARD_LANE, PROCESS_LANE, SYSTEM_LANE)
+
+
+@pytest.fixture
+def manager():
+    manager = LaneManager()
+    manager.start()
+    yield manager
+    manager.stop()
+
+
+def _overlap(lane_name, manager, count=3):
+    """Largest number of handlers that ran at the same time on the lane"""
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def handler():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        return True
+
+    futures = [manager.submit(lane_name, handler) for _ in range(count)]
+    assert all(future.result(timeout=5) for future in futures)
+    return state["peak"]
+
+
+def test_keyboard_lane_runs_one_handler_at_a_time(manager):
+    assert _overlap(KEYBOARD_LANE, manager) == 1
+
+
+def test_process_lane_runs_handlers_in_parallel(manager):
+    assert _overlap(PROCESS_LANE, manager) > 1
+
+
+def test_unknown_lane_falls_back_to_default(manager):
+    assert manager.get_lane("nope") is manager.lanes[SYSTEM_LANE]
+
+
+def test_lane_counts_failures_and_exceptions():
+    lane = ExecutionLane("test")
+    lane.start()
+    try:
+        assert lane.submit(lambda: False).result(timeout=5) is False
+        with pytest.raises(ValueError):
+            lane.submit(lambda: (_ for _ in ()).throw(ValueError("boom"))).result(timeout=5)
+    finally:
+        lane.stop()
+    stats = lane.get_stats()
+    assert stats["executed"] == 2
+    assert stats["failed"] == 2
+
+
+def _compound(*intents):
+    return {"commands": [{"intent": intent, "parameters": {}} for intent in intents]}
+
+
+@pytest.mark.parametrize("intents, lane", [
+    (("open_calculator", "write_text"), KEYBOARD_LANE),
+    (("open_calculator", "open_notepad"), PROCESS_LANE),
+    (("open_calculator", "get_time"), SYSTEM_LANE),
+    (("get_time", "mute"), SYSTEM_LANE),
+])
+def test_compound_lane_follows_its_steps(intents, lane):
+    registry = CommandRegistry()
+    assert registry.get_command_lane("compound_command", _compound(*intents)) == lane
+
+
+def test_single_command_lane_comes_from_the_manifest():
+    registry = CommandRegistry()
+    assert registry.get_command_lane("write_text") == KEYBOARD_LANE
+    assert registry.get_command_lane("open_notepad") == PROCESS_LANE
+    assert registry.get_command_lane("not_a_command") == SYSTEM_LANE
+
+
+def test_submit_after_stop_is_cancelled_not_stranded():
+    lane = ExecutionLane("test")
+    assert lane.submit(lambda: True).cancelled()  # Not started yet
+    lane.start()
+    lane.stop()
+    future = lane.submit(lambda: True)
+    assert future.cancelled() and future.done()
+    assert lane.queue_depth == 0  # The stop markers are not queued handlers
+
+
+def test_stop_cancels_queued_work():
+    lane = ExecutionLane("test")
+    lane.start()
+    release = threading.Event()
+    running = lane.submit(release.wait, 5)
+    queued = lane.submit(lambda: True)
+    while not running.running():
+        time.sleep(0.005)
+    lane.stop()
+    release.set()
+    assert queued.cancelled() and running.result(timeout=5)
@@ -0,0 +1,51 @@
+import pytest
+
+from ngram_classifier import NgramClassifier, char_ngrams
+
+NEAR_MISSES = ["restart song", "reboot router", "power off the tv", "close computer lid", "sleep timer"]
+
+
+def test_char_ngrams_pad_word_boundaries():
+    assert " pl" in char_ngrams("play") and " pl" not in char_ngrams("display")
+
+
+def test_calibrated_bounds_reach_target_precision(intent_classifier):
+    tier = intent_classifier.fast_tier
+    assert tier.calibration["coverage"] > 0
+    assert tier.calibration["precision"] >= tier.target_precision
+    assert tier.predict("open the calculator")[0] == "open_calculator"
+
+
+def test_uncalibratable_tier_trusts_nothing():
+    tier = NgramClassifier().fit({"only": {"examples": ["hello there"]}})
+    assert not tier.accepts(1.0, 1.0)
+
+
+@pytest.mark.parametrize("text", NEAR_MISSES)
+def test_fast_tier_never_decides_cooldown_commands(intent_classifier, text):
+    assert intent_classifier._fast_predict(text)[0] is None
+    assert intent_classifier.match_command(text) is None
+    result = intent_classifier._classify_single_intent(text)
+    assert result["tier"] == "encoder"
+
+
+@pytest.mark.parametrize("intent", ["shutdown", "restart", "sleep"])
+def test_cooldown_commands_go_to_the_encoder_even_when_exact(intent_classifier, intent):
+    example = intent_classifier.command_templates[intent]["examples"][0]
+    assert intent_classifier._fast_predict(example)[0] is None
+    result = intent_classifier._classify_single_intent(example)
+    assert result["tier"] == "encoder"
+    assert result["threshold"] == intent_classifier.command_templates[intent]["confidence_threshold"]
+
+
+def test_fast_answers_clear_the_template_threshold(intent_classifier, monkeypatch):
+    classifier = intent_classifier
+    result = classifier._classify_single_intent("open calculator")
+    assert result["tier"] == "fast" and result["intent"] == "open_calculator"
+    assert result["threshold"] >= classifier.command_templates["open_calculator"]["confidence_threshold"]
+    assert result["confidence"] >= result["threshold"]
+
+    # A command whose own threshold sits above the similarity must escalate
+    monkeypatch.setitem(classifier.command_templates["open_calculator"], "confidence_threshold", 1.01)
+    assert classifier._fast_predict("open calculator")[0] is None
+    assert classifier._classify_single_intent("open calculator")["tier"] == "encoder"
@@ -0,0 +1,107 @@
+import io
+import threading
+
+import pytest
+
+from core.command_processor import CommandProcessor, Utterance
+from flight_recorder import FlightRecorder, INFO, OFF, recorder
+
+
+def test_ring_buffer_keeps_the_newest_events():
+    flight = FlightRecorder(capacity=3)
+    for i in range(5):
+        flight.info("test", "event %d", i)
+    events = flight.get_events()
+    assert len(events) == 3
+    assert [event.endswith(f"event {i}") for event, i in zip(events, (2, 3, 4))] == [True] * 3
+
+
+def test_events_below_the_level_are_not_recorded():
+    flight = FlightRecorder(level=INFO)
+    flight.debug("test", "hidden")
+    flight.info("test", "shown")
+    assert len(flight.get_events()) == 1
+    flight.disable()
+    flight.error("test", "off")
+    assert flight.level == OFF and len(flight.get_events()) == 1
+
+
+def test_arguments_are_formatted_when_read():
+    flight = FlightRecorder()
+    flight.info("test", "%s and %d", "text", 3)
+    flight.info("test", "bad %d", "not a number")
+    first, second = flight.get_events()
+    assert first.endswith("[test] text and 3")
+    assert "bad %d" in second
+
+
+def test_dump_writes_every_event():
+    flight = FlightRecorder()
+    flight.warning("test", "one")
+    stream = io.StringIO()
+    assert flight.dump(stream) == 1
+    assert "WARNING" in stream.getvalue()
+
+
+class _Engine:
+    def setProperty(self, *args):
+        pass
+
+    def getProperty(self, name):
+        return []
+
+
+class _Classifier:
+    """Returns a fixed result for every utterance"""
+
+    def __init__(self, result):
+        self.result = result
+
+    def process_audio_input(self, text, activation=None, encoded=None):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return dict(self.result)
+
+    classify_intent = process_audio_input
+
+
+@pytest.mark.parametrize("result, status", [
+    ({"intent": "ignored", "confidence": 0.0, "parameters": {}, "threshold": 0.0}, "ignored"),
+    ({"intent": "mute", "confidence": 0.2, "parameters": {}, "threshold": 0.5}, "low_confidence"),
+    (RuntimeError("broken"), "error"),
+])
+def test_processing_goes_to_the_recorder_not_stdout(capsys, result, status):
+    processor = CommandProcessor(intent_classifier=_Classifier(result), tts_engine=_Engine())
+    capsys.readouterr()
+    recorder.clear()
+
+    assert processor._process_utterance(Utterance("hey nico mute"))["status"] == status
+    assert capsys.readouterr().out == ""
+    assert any("Processing 'hey nico mute'" in event for event in recorder.get_events())
+
+
+def test_written_count_never_moves_backwards():
+    flight = FlightRecorder(capacity=8)
+    flight._counter = iter([1, 0])  # The thread holding index 0 finishes last
+    flight.info("test", "second")
+    flight.info("test", "first")
+    assert [event.split("] ")[1] for event in flight.get_events()] == ["first", "second"]
+
+
+def test_concurrent_records_are_never_torn():
+    flight = FlightRecorder(capacity=64)
+
+    def writer(name):
+        for i in range(2000):
+            flight.info(name, "%s %d", name, i)
+
+    threads = [threading.Thread(target=writer, args=(f"t{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        for event in flight.get_events():
+            source, message = event.split("[", 1)[1].split("] ")
+            assert message.startswith(source + " ")
+    for thread in threads:
+        thread.join()
+    assert flight._written == 8000
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from core.idle_governor import ACTIVE, IDLE, IdleGovernor
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def governor():
+    governor = IdleGovernor(idle_after=0.05, resume_budget=5)
+    yield governor
+    governor.stop()
+
+
+def test_goes_idle_after_quiet_and_resumes_on_activity(governor):
+    calls = []
+    governor.add_component("encoder", lambda: calls.append("idle encoder"), lambda: calls.append("resume encoder"))
+    governor.add_component("gate", lambda: calls.append("idle gate"), lambda: calls.append("resume gate"))
+    governor.start()
+
+    assert _wait_for(lambda: governor.is_idle)
+    assert calls == ["idle encoder", "idle gate"]
+
+    governor.activity()
+    assert _wait_for(lambda: governor.get_stats()["resumes"] == 1)
+    assert calls[2:] == ["resume encoder", "resume gate"]
+    stats = governor.get_stats()
+    assert stats["state"] == ACTIVE and stats["over_budget"] == 0
+    assert set(stats["resume_times"]) == {"encoder", "gate"}
+
+
+def test_activity_keeps_it_awake(governor):
+    governor.start()
+    for _ in range(10):
+        governor.activity()
+        time.sleep(0.01)
+    assert governor.state == ACTIVE
+
+
+def test_failing_component_does_not_block_the_others(governor):
+    resumed = []
+    governor.add_component("broken", lambda: 1 / 0, lambda: 1 / 0)
+    governor.add_component("ok", lambda: None, lambda: resumed.append(True))
+    governor.start()
+    assert _wait_for(lambda: governor.is_idle)
+    governor.activity()
+    assert _wait_for(lambda: resumed == [True])
+
+
+def test_slow_resume_is_counted_over_budget():
+    governor = IdleGovernor(idle_after=0.02, resume_budget=0.01)
+    governor.add_component("slow", lambda: None, lambda: time.sleep(0.05))
+    governor.start()
+    try:
+        assert _wait_for(lambda: governor.is_idle)
+        governor.activity()
+        assert _wait_for(lambda: governor.get_stats()["resumes"] == 1)
+        assert governor.get_stats()["over_budget"] == 1
+    finally:
+        governor.stop()
+
+
+def test_disabled_governor_never_starts():
+    governor = IdleGovernor(idle_after=0)
+    governor.start()
+    assert not governor.is_running and governor.get_stats()["enabled"] is False
+    assert governor.state != IDLE
+
+
+def test_released_encoder_reloads_on_next_use(intent_classifier):
+    assert intent_classifier.release_encoder()
+    assert not intent_classifier.release_encoder()
+    assert intent_classifier._fast_predict("open calculator")[0] == "open_calculator"  # No encoder needed
+    assert not intent_classifier.encoder_loaded
+    intent_classifier.encode_texts(["next song"])
+    assert intent_classifier.encoder_loaded
+    assert intent_classifier.encoder_stats["loads"] == 2
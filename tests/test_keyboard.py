@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from commands import keyboard as keyboard_module
+from commands.keyboard import (EV_KEY, EV_SYN, INPUT_EVENT, LINUX_KEY_CODES, PyAutoGuiKeyboard, KeySequence,
+                               RecordingKeyboard, UinputKeyboard, XTestKeyboard, create_keyboard)
+
+
+def test_press_repeats_and_hotkey_releases_in_reverse():
+    assert KeySequence().press("volumeup", repeat=2).actions == [("down", "volumeup"), ("up", "volumeup")] * 2
+    assert KeySequence().hotkey("ctrl", "shift", "t").actions == [
+        ("down", "ctrl"), ("down", "shift"), ("down", "t"), ("up", "t"), ("up", "shift"), ("up", "ctrl")]
+
+
+def test_combo_is_a_chord_or_a_single_key():
+    assert KeySequence().combo("ctrl+c").actions == KeySequence().hotkey("ctrl", "c").actions
+    assert KeySequence().combo("enter").actions == KeySequence().press("enter").actions
+
+
+def test_write_maps_shifted_characters_to_their_keys():
+    expected = KeySequence().hotkey("shift", "h").press("i").press("space").hotkey("shift", "1").press("enter")
+    assert KeySequence().write("Hi !\n").actions == expected.actions
+
+
+def test_pauses_split_the_batches():
+    sequence = KeySequence().press("a").pause(0.2).hotkey("ctrl", "v").pause(0)
+    assert sequence.batches() == [[(True, "a"), (False, "a")], 0.2,
+                                  [(True, "ctrl"), (True, "v"), (False, "v"), (False, "ctrl")]]
+    assert len(sequence) == 6
+
+
+class _PickyKeyboard(RecordingKeyboard):
+    """Knows only a few keys, like a real backend, and can fail on one of them"""
+
+    def __init__(self, key_delay=0.0, fail_on=None):
+        super().__init__(key_delay)
+        self.fail_on = fail_on
+
+    def supports(self, key):
+        return key in ("ctrl", "shift", "c", "v")
+
+    def _send_events(self, events):
+        if any(is_down and key == self.fail_on for is_down, key in events):
+            raise OSError("device went away")
+        super()._send_events(events)
+
+
+@pytest.mark.parametrize("key_delay", [0.0, 0.001])
+def test_unknown_key_sends_nothing(key_delay):
+    keyboard = _PickyKeyboard(key_delay)
+    with pytest.raises(ValueError, match="banana"):
+        keyboard.send(KeySequence().combo("ctrl+banana"))
+    assert keyboard.events == []
+
+
+@pytest.mark.parametrize("key_delay", [0.0, 0.001])
+def test_failed_send_releases_held_keys(key_delay):
+    keyboard = _PickyKeyboard(key_delay, fail_on="v")
+    with pytest.raises(OSError):
+        keyboard.send(KeySequence().hotkey("ctrl", "shift", "v"))
+    held = set()
+    for is_down, key in keyboard.events:
+        (held.add if is_down else held.discard)(key)
+    assert held == set()
+
+
+@pytest.fixture
+def uinput():
+    """UinputKeyboard writing into a pipe instead of a device"""
+    read_fd, write_fd = os.pipe()
+    keyboard = UinputKeyboard()
+    keyboard._fd = write_fd
+    yield keyboard, read_fd
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def test_uinput_batch_is_one_write_of_key_and_sync_events(uinput, monkeypatch):
+    keyboard, read_fd = uinput
+    writes = []
+    write = os.write
+    monkeypatch.setattr(keyboard_module.os, "write", lambda fd, data: writes.append(data) or write(fd, data))
+    keyboard.hotkey("ctrl", "v")
+
+    assert len(writes) == 1
+    data = os.read(read_fd, 4096)
+    events = [INPUT_EVENT.unpack_from(data, offset)[2:] for offset in range(0, len(data), INPUT_EVENT.size)]
+    ctrl, v = LINUX_KEY_CODES["ctrl"], LINUX_KEY_CODES["v"]
+    assert events == [(EV_KEY, ctrl, 1), (EV_SYN, 0, 0), (EV_KEY, v, 1), (EV_SYN, 0, 0),
+                      (EV_KEY, v, 0), (EV_SYN, 0, 0), (EV_KEY, ctrl, 0), (EV_SYN, 0, 0)]
+    assert keyboard.get_stats()["batches"] == 1
+
+
+def test_uinput_refuses_unknown_keys_before_writing(uinput):
+    keyboard, read_fd = uinput
+    assert not keyboard.supports("banana") and keyboard.supports("Ctrl")
+    with pytest.raises(ValueError):
+        keyboard.send(KeySequence().combo("ctrl+banana"))
+    os.set_blocking(read_fd, False)
+    with pytest.raises(BlockingIOError):
+        os.read(read_fd, 4096)
+
+
+@pytest.mark.parametrize("uinput, display, wayland, xtst, expected", [
+    (True, True, True, True, UinputKeyboard),      # Wayland - XTest would only reach XWayland windows
+    (True, True, False, True, XTestKeyboard),
+    (False, True, False, True, XTestKeyboard),
+    (True, True, False, False, UinputKeyboard),    # No libXtst
+    (True, False, False, True, UinputKeyboard),
+    (False, False, False, True, PyAutoGuiKeyboard),
+])
+def test_create_keyboard_picks_the_backend(monkeypatch, uinput, display, wayland, xtst, expected):
+    monkeypatch.setattr(keyboard_module.sys, "platform", "linux")
+    monkeypatch.setattr(keyboard_module.os, "access", lambda path, mode: uinput)
+    monkeypatch.setattr(keyboard_module.ctypes.util, "find_library", lambda name: "libXtst.so.6" if xtst else None)
+    for name, value in (("DISPLAY", display and ":0"), ("WAYLAND_DISPLAY", wayland and "wayland-0")):
+        if value:
+            monkeypatch.setenv(name, value)
+        else:
+            monkeypatch.delenv(name, raising=False)
+    assert type(create_keyboard()) is expected
+
+
+def test_other_platforms_use_pyautogui(monkeypatch):
+    monkeypatch.setattr(keyboard_module.sys, "platform", "win32")
+    assert type(create_keyboard()) is PyAutoGuiKeyboard
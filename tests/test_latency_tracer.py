@@ -0,0 +1,71 @@
+import json
+
+from core.latency_tracer import LatencyHistogram, LatencyTracer
+
+
+def _trace(tracer, marks, start=100.0):
+    """A finished trace with the given (stage, seconds after start) marks"""
+    trace = tracer.start_trace(start)
+    trace.marks.extend((stage, start + offset) for stage, offset in marks)
+    trace.set("intent", "mute")
+    trace.finish()
+    return trace
+
+
+def test_spans_run_from_mark_to_mark():
+    trace = _trace(LatencyTracer(), [("asr", 0.5), ("classify", 0.6)])
+    assert [(span["stage"], round(span["duration"], 6)) for span in trace.get_spans()] == \
+        [("asr", 0.5), ("classify", 0.1)]
+    assert round(trace.duration, 6) == 0.6
+
+
+def test_finish_counts_once():
+    tracer = LatencyTracer()
+    trace = _trace(tracer, [("asr", 0.1)])
+    trace.finish("error")
+    assert tracer.histograms["total"].count == 1
+    assert trace.attributes["status"] == "ok"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [1, 3, 4]
+    assert histogram.percentile(50) == 0.5
+
+
+def test_summary_lists_stages_in_pipeline_order():
+    tracer = LatencyTracer()
+    _trace(tracer, [("endpointing", 0.2), ("asr", 0.4), ("custom", 0.5), ("handler", 0.6)])
+    assert list(tracer.get_summary()) == ["endpointing", "asr", "handler", "custom", "total"]
+
+
+def test_prometheus_export(tmp_path):
+    tracer = LatencyTracer()
+    _trace(tracer, [("asr", 0.003)])
+    path = tmp_path / "metrics.prom"
+    tracer.export_prometheus(str(path))
+    text = path.read_text()
+    assert 'assistant_stage_latency_seconds_bucket{stage="asr",le="0.005"} 1' in text
+    assert 'assistant_stage_latency_seconds_count{stage="total"} 1' in text
+
+
+def test_spans_are_appended_as_jsonl(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = LatencyTracer(spans_path=str(path))
+    trace = _trace(tracer, [("asr", 0.25), ("classify", 0.3)])
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["stage"] for record in records] == ["asr", "classify"]
+    assert all(record["trace_id"] == trace.trace_id and record["intent"] == "mute" for record in records)
+    assert round(records[0]["duration_ms"], 3) == 250.0
+
+
+def test_durations_since_returns_only_new_traces():
+    tracer = LatencyTracer()
+    _trace(tracer, [("asr", 0.1)])
+    completed, durations = tracer.get_durations_since(0)
+    assert completed == 1 and len(durations) == 1
+    _trace(tracer, [("asr", 0.2)])
+    completed, durations = tracer.get_durations_since(completed)
+    assert completed == 2 and [round(d, 6) for d in durations] == [0.2]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from commands import manifest
+from commands.builtin_manifest import BUILTIN_COMMANDS
+from commands.manifest import compile_manifests, load_template_bundle, build_template_bundle, validate_manifest
+
+
+def _entry(intent="do_thing", **fields):
+    entry = {"intent": intent, "examples": ["do the thing"], "handler": "tests.plugin:handle"}
+    entry.update(fields)
+    return entry
+
+
+def test_builtin_manifest_compiles():
+    compiled = compile_manifests((entry, "builtin") for entry in BUILTIN_COMMANDS)
+    assert set(compiled.dispatch) == set(compiled.templates)
+    assert all(entry.lane in manifest.LANES for entry in compiled.dispatch.values())
+    assert {"shutdown", "restart", "sleep"} <= compiled.non_repeatable
+
+
+def test_defaults_and_extra_fields_go_to_options():
+    compiled = compile_manifests([(_entry(timeout=3, icon="x"), "plugin")])
+    entry = compiled.dispatch["do_thing"]
+    assert (entry.lane, entry.repeatable) == ("system", True)
+    assert entry.options == {"timeout": 3, "icon": "x"}
+    assert compiled.templates["do_thing"] == {
+        "type": 0, "confidence_threshold": 0.7, "examples": ["do the thing"], "response": ""}
+
+
+def test_later_declaration_overrides_earlier():
+    compiled = compile_manifests([(_entry(lane="keyboard"), "builtin"), (_entry(lane="process"), "plugin")])
+    assert compiled.dispatch["do_thing"].lane == "process"
+
+
+@pytest.mark.parametrize("fields", [
+    {"handler": "no_colon"},
+    {"examples": []},
+    {"lane": "gpu"},
+    {"type": 2},
+    {"timeout": -1},
+    {"timeout": "soon"},
+])
+def test_malformed_entries_are_rejected(fields):
+    with pytest.raises(ValueError):
+        validate_manifest(_entry(**fields))
+
+
+class _Encoder:
+    def encode(self, sentences):
+        return np.array([[len(s), 1.0] for s in sentences], dtype=np.float32)
+
+
+def test_template_bundle_round_trip_and_staleness(tmp_path):
+    templates = compile_manifests([(_entry(), "a"), (_entry("other", examples=["x", "yy"]), "a")]).templates
+    path = str(tmp_path / "bundle.npz")
+    build_template_bundle(_Encoder(), templates, "model-a", path)
+
+    loaded = load_template_bundle(templates, "model-a", path)
+    assert loaded["other"].shape == (2, 2)
+    assert np.allclose(np.linalg.norm(loaded["do_thing"], axis=1), 1.0)
+
+    assert load_template_bundle(templates, "model-b", path) is None
+    templates["other"]["examples"].append("zzz")
+    assert load_template_bundle(templates, "model-a", path) is None
+    assert load_template_bundle(templates, "model-a", str(tmp_path / "missing.npz")) is None
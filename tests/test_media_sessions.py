@@ -0,0 +1,130 @@
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from commands.keyboard import RecordingKeyboard
+from commands.media_sessions import (FakeMediaSessions, FakeMprisPlayer, MediaPlayer, MprisSessions, MPRIS_PREFIX,
+                                     PAUSED, PLAYING, create_media_sessions)
+from commands.smart_media_controller import SmartMediaController
+from commands.window_system import FakeWindowBackend
+
+
+def test_identity_drops_prefix_and_instance_suffix():
+    assert MediaPlayer(MPRIS_PREFIX + "chromium.instance1234").identity == "chromium"
+    assert MediaPlayer("not.mpris").identity == "not.mpris"
+
+
+def test_playing_player_wins_over_a_more_recent_paused_one():
+    sessions = FakeMediaSessions({"spotify": PLAYING})
+    time.sleep(0.01)
+    sessions.add_player("vlc", PAUSED)
+    assert sessions.active_player().identity == "spotify"
+
+
+def test_last_used_player_wins_when_nothing_plays():
+    sessions = FakeMediaSessions({"spotify": PAUSED, "vlc": PAUSED})
+    vlc = next(player for player in sessions.get_players() if player.identity == "vlc")
+    assert sessions.send("next", vlc)
+    assert sessions.active_player() is vlc
+
+
+def test_commands_change_state_and_are_counted():
+    sessions = FakeMediaSessions({"spotify": PAUSED})
+    assert sessions.send("play_pause")
+    assert sessions.active_player().is_playing
+    assert sessions.send("pause")
+    assert sessions.calls == [("spotify", "PlayPause"), ("spotify", "Pause")]
+    stats = sessions.get_stats()
+    assert stats["commands"] == 2 and stats["failed"] == 0 and stats["players"] == {"spotify": PAUSED}
+
+
+def test_failed_call_is_reported_not_raised():
+    class _Broken(FakeMediaSessions):
+        def _call(self, name, method):
+            raise OSError("player went away")
+
+    sessions = _Broken({"spotify": PLAYING})
+    assert not sessions.send("next")
+    assert sessions.get_stats()["failed"] == 1
+
+
+def test_no_players_means_no_target():
+    assert not FakeMediaSessions().send("play_pause")
+
+
+def test_media_action_falls_back_to_the_media_key():
+    keyboard = RecordingKeyboard()
+    controller = SmartMediaController(FakeWindowBackend(), keyboard=keyboard, media_sessions=FakeMediaSessions())
+    assert controller.media_action("next", "nexttrack")
+    assert keyboard.taps == ["nexttrack"]
+
+    controller.media_sessions.add_player("spotify", PLAYING)
+    keyboard.clear()
+    assert controller.media_action("next", "nexttrack")
+    assert keyboard.taps == [] and controller.media_sessions.calls == [("spotify", "Next")]
+
+
+def test_no_session_bus_means_no_backend(monkeypatch):
+    monkeypatch.delenv("DBUS_SESSION_BUS_ADDRESS", raising=False)
+    assert create_media_sessions() is None
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def session_bus():
+    """Address of a private session bus, so the test never touches the desktop's players"""
+    pytest.importorskip("jeepney")
+    if not shutil.which("dbus-daemon"):
+        pytest.skip("dbus-daemon not installed")
+    daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address"],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        yield daemon.stdout.readline().strip()
+    finally:
+        daemon.terminate()
+        daemon.wait(5)
+
+
+def test_mpris_registry_follows_real_players(session_bus):
+    spotify = FakeMprisPlayer("spotify", PAUSED, bus=session_bus).start()
+    vlc = FakeMprisPlayer("vlc", PLAYING, title="song", bus=session_bus).start()
+    sessions = MprisSessions(bus=session_bus)
+    try:
+        sessions.start()
+        assert sessions.active_player().identity == "vlc" and sessions.active_player().title == "song"
+
+        assert sessions.send("pause")
+        assert vlc.calls == ["Pause"] and spotify.calls == []
+        assert _wait_for(lambda: not sessions.active_player().is_playing)  # PropertiesChanged from vlc
+
+        spotify.set_status(PLAYING)
+        assert _wait_for(lambda: sessions.active_player().identity == "spotify")
+
+        spotify.stop()  # NameOwnerChanged - the player left the bus
+        assert _wait_for(lambda: [player.identity for player in sessions.get_players()] == ["vlc"])
+        assert sessions.get_stats()["events"] >= 3
+    finally:
+        sessions.stop()
+        vlc.stop()
+
+
+def test_player_started_later_is_picked_up(session_bus):
+    sessions = MprisSessions(bus=session_bus)
+    sessions.start()
+    player = FakeMprisPlayer("mpv", PLAYING, bus=session_bus)
+    try:
+        assert sessions.active_player() is None
+        player.start()
+        assert _wait_for(lambda: sessions.active_player() is not None)
+        assert sessions.send("next") and player.calls == ["Next"]
+    finally:
+        sessions.stop()
+        player.stop()
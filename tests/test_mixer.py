@@ -0,0 +1,81 @@
+import pytest
+
+from commands.keyboard import RecordingKeyboard
+from commands.media_commands import MediaCommands
+from commands.media_sessions import FakeMediaSessions
+from commands.mixer import FakeMixer, KeyTapMixer, PulseAudioMixer
+from commands.window_system import FakeWindowBackend
+from utils import parse_amount
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("30 percent", 30), ("30%", 30), ("by twenty five", 25), ("twenty-five", 25), ("ninety nine", 99),
+    ("a hundred", 100), ("one hundred and five", 105), ("zero", 0),
+])
+def test_parse_amount(text, amount):
+    assert parse_amount(text) == amount
+
+
+@pytest.mark.parametrize("text", ["", "please", "five ten", "twenty thirty", "10 or 20", "20 five",
+                                  "fifteen five", "two hundred hundred", "ten and then five"])
+def test_parse_amount_rejects_what_it_cannot_read(text):
+    assert parse_amount(text) is None
+
+
+class _Pactl(PulseAudioMixer):
+    """pactl with an in-memory sink - records every invocation"""
+
+    def __init__(self, volume=50):
+        super().__init__()
+        self.volume = volume
+        self.runs = []
+
+    def _run(self, *args):
+        self.runs.append(args)
+        if args[0] == "get-sink-volume":
+            return f"Volume: front-left: 0 / {self.volume}% / 0 dB,   front-right: 0 / {self.volume}% / 0 dB"
+        if args[0] == "set-sink-volume":
+            value = args[2].rstrip("%")
+            self.volume = self.volume + int(value) if value[0] in "+-" else int(value)
+        return ""
+
+
+def test_pactl_relative_change_is_one_set_call():
+    mixer = _Pactl(volume=40)
+    assert mixer.change_volume(-15) == 25
+    assert [run for run in mixer.runs if run[0] == "set-sink-volume"] == [
+        ("set-sink-volume", "@DEFAULT_SINK@", "-15%")]
+
+
+def test_pactl_raise_is_capped_at_100():
+    mixer = _Pactl(volume=95)
+    assert mixer.change_volume(10) == 100
+    assert mixer.volume == 100
+
+
+def test_key_tap_mixer_batches_presses():
+    keyboard = RecordingKeyboard()
+    KeyTapMixer(keyboard).change_volume(-10)
+    assert keyboard.taps == ["volumedown"] * 5
+    assert len(keyboard.sequences) == 1
+
+
+@pytest.fixture
+def media():
+    return MediaCommands(mixer=FakeMixer(volume=50), keyboard=RecordingKeyboard(),
+                         window_backend=FakeWindowBackend(), media_sessions=FakeMediaSessions())
+
+
+def test_volume_intents(media):
+    assert media.set_volume({"content": "thirty percent"})
+    assert media.mixer.volume == 30
+    assert media.volume_up_by({"content": "by twenty"})
+    assert media.mixer.volume == 50
+    assert media.volume_down_by({})
+    assert media.mixer.volume == 40
+
+
+def test_unreadable_amount_changes_nothing(media):
+    assert not media.volume_up_by({"content": "by five ten"})
+    assert not media.set_volume({"content": "loud"})
+    assert media.mixer.calls == 0
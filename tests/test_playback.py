@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+import pytest
+
+from conftest import chunk
+from core.playback import EchoCanceller, Playback, PlaybackLog
+from core.speech_recognizer import SpeechRecognizer
+
+
+def test_active_covers_the_playback_and_its_tail():
+    log = PlaybackLog(tail=0.3)
+    playback = log.begin("hello")
+    assert log.is_playing
+    log.end(playback)
+    assert log.active(playback.end + 0.2, playback.end + 0.25) is playback
+    assert log.active(playback.end + 0.4, playback.end + 0.5) is None
+    assert log.active(playback.start - 1.0, playback.start - 0.5) is None
+    stats = log.get_stats()
+    assert stats["playbacks"] == 1 and stats["playing_time"] >= 0 and stats["tail"] == 0.3
+
+
+def test_newest_overlapping_playback_wins():
+    log = PlaybackLog(tail=0.0)
+    first = log.begin("first")
+    log.end(first)
+    second = log.begin("second")
+    now = time.perf_counter()
+    assert log.active(first.start, now) is second
+
+
+def test_reference_is_resampled_once_per_rate():
+    playback = Playback("hi", 0.0, np.linspace(0, 1, 22050, dtype=np.float32), 22050)
+    resampled = playback.reference_at(16000)
+    assert len(resampled) == 16000 and resampled.dtype == np.float32
+    assert playback.reference_at(16000) is resampled
+    assert playback.reference_at(22050) is playback.reference
+    assert Playback("hi", 0.0).reference_at(16000) is None
+
+
+def test_nlms_removes_a_delayed_echo():
+    taps, size = 64, 1024
+    rng = np.random.default_rng(1)
+    reference = rng.normal(0, 3000, 40 * size).astype(np.float32)
+    echo = np.zeros_like(reference)
+    echo[10:] = 0.5 * reference[:-10]  # Echo path - half as loud, 10 samples late
+    canceller = EchoCanceller(taps=taps, step=0.5)
+    playback = Playback("hi", 0.0)
+
+    history = np.concatenate([np.zeros(taps - 1, dtype=np.float32), reference])
+    residuals = []
+    for start in range(0, len(reference), size):
+        residual = canceller.process(playback, echo[start:start + size], history[start:start + size + taps - 1])
+        residuals.append(float(np.mean(residual * residual)))
+    assert residuals[-1] < residuals[0] / 1000
+    assert canceller.get_stats()["erle_db"] > 10
+    assert canceller.get_stats()["chunks"] == 40
+
+
+def test_new_playback_resets_the_filter():
+    canceller = EchoCanceller(taps=8)
+    canceller.process(Playback("a", 0.0), np.ones(16, np.float32), np.ones(23, np.float32))
+    assert np.any(canceller.weights)
+    canceller.process(Playback("b", 0.0), np.zeros(16, np.float32), np.zeros(23, np.float32))
+    assert not np.any(canceller.weights)
+
+
+def test_reference_segment_is_zero_outside_the_response():
+    reference = np.arange(1, 11, dtype=np.float32)
+    segment = SpeechRecognizer._reference_segment(reference, offset=-2, count=4, taps=3)
+    assert segment.tolist() == [0, 0, 0, 0, 1, 2]
+    segment = SpeechRecognizer._reference_segment(reference, offset=8, count=4, taps=3)
+    assert segment.tolist() == [7, 8, 9, 10, 0, 0]
+
+
+def _run(recognizer):
+    recognizer._listening = True
+    recognizer._listen_loop()
+    return recognizer._phrases.qsize()
+
+
+@pytest.fixture
+def playing(speech_recognizer):
+    """Recognizer whose playback log has a response still playing"""
+    def build(chunks, self_speech="attenuate"):
+        recognizer = speech_recognizer(chunks)
+        recognizer.playback = PlaybackLog()
+        recognizer.playback.begin("the assistant talking")
+        recognizer.self_speech = self_speech
+        return recognizer
+    return build
+
+
+def test_own_voice_is_suppressed_and_counted(playing):
+    recognizer = playing([chunk(600, seed=i) for i in range(10)] + [chunk(30)] * 10)
+    assert _run(recognizer) == 0
+    stats = recognizer.get_suppression_stats()
+    assert stats["suppressed_audio"] == pytest.approx(1.0)
+    assert stats["segments"] == 1 and stats["mode"] == "attenuate"
+    assert recognizer.recognizer.energy_threshold == 300  # Never adapted to playback
+
+
+def test_louder_speech_barges_in_unless_dropped(playing):
+    chunks = [chunk(3000, seed=i) for i in range(10)] + [chunk(30)] * 10
+    assert _run(playing(chunks)) == 1
+    assert _run(playing(chunks, self_speech="drop")) == 0
@@ -0,0 +1,60 @@
+import time
+
+from commands.command_registry import CommandRegistry
+from commands.keyboard import RecordingKeyboard
+from commands.window_system import FakeWindowBackend, WindowIndex
+from core.prefetch import ContextPrefetcher
+
+
+def test_tasks_run_on_trigger_and_are_reported():
+    prefetcher = ContextPrefetcher()
+    prefetcher.add_task("windows", lambda: True, stats=lambda: {"hits": 3})
+    prefetcher.add_task("broken", lambda: 1 / 0)
+    prefetcher.start()
+    try:
+        prefetcher.trigger("main")
+        deadline = time.monotonic() + 5
+        while prefetcher.get_stats()["runs"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        prefetcher.stop()
+
+    stats = prefetcher.get_stats()
+    assert stats["triggers"] == 1
+    assert stats["tasks"]["windows"]["prepared"] == 1 and stats["tasks"]["windows"]["hits"] == 3
+    assert stats["tasks"]["broken"]["errors"] == 1
+
+
+def test_use_and_expiry_are_counted_per_session():
+    prefetcher = ContextPrefetcher(expiry=0.05)
+    prefetcher.trigger("kitchen")
+    prefetcher.trigger("office")
+    prefetcher.command_arrived("kitchen")
+    prefetcher.command_arrived("nobody")
+    time.sleep(0.1)
+    stats = prefetcher.get_stats()
+    assert (stats["used"], stats["expired"]) == (1, 1)
+    assert stats["use_rate"] == 0.5
+
+
+def test_prefetched_snapshot_is_served_once_past_its_ttl():
+    backend = FakeWindowBackend([("Stremio", "stremio.exe")])
+    index = WindowIndex(backend, ttl=0)
+    prefetched = index.prefetch(hold=60)
+    assert index.get_snapshot() is prefetched
+    assert index.get_snapshot() is not prefetched
+    stats = index.get_stats()
+    assert (stats["prefetches"], stats["prefetch_hits"]) == (1, 1)
+
+
+def test_focus_change_drops_the_prefetched_snapshot():
+    index = WindowIndex(FakeWindowBackend([("Stremio", "stremio.exe")]), ttl=0)
+    prefetched = index.prefetch(hold=60)
+    index.invalidate()
+    assert index.get_snapshot() is not prefetched
+
+
+def test_registry_prefetch_prepares_handlers_that_support_it():
+    registry = CommandRegistry(keyboard=RecordingKeyboard())
+    assert registry.prefetch() >= 1
+    assert "MediaCommands" in registry.get_prefetch_stats()
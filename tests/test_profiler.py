@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+import profiler
+from profiler import IDLE, SamplingProfiler, UNATTRIBUTED
+
+
+def _code(path, name):
+    namespace = {}
+    exec(compile(f"def {name}(): pass", path, "exec"), namespace)
+    return namespace[name].__code__
+
+
+@pytest.mark.parametrize("codes, stage", [
+    ([_code("/repo/commands/keyboard.py", "send"), _code("/repo/core/execution_lanes.py", "_worker")], "handler"),
+    ([_code("/repo/core/execution_lanes.py", "_worker")], "lane"),
+    ([_code("/usr/lib/python3/threading.py", "wait"), _code("/repo/commands/mixer.py", "run")], IDLE),
+    ([_code("/repo/core/assistant.py", "start")], IDLE),
+    ([_code("/usr/lib/python3/json/decoder.py", "decode")], UNATTRIBUTED),
+])
+def test_stacks_are_attributed_from_the_innermost_frame(codes, stage):
+    assert SamplingProfiler._classify(codes) == stage
+
+
+def test_sampling_a_busy_thread(tmp_path):
+    namespace = {}
+    exec(compile("def spin(stop):\n    while not stop.is_set():\n        sum(range(200))\n",
+                 "/repo/commands/busy.py", "exec"), namespace)
+    stop = threading.Event()
+    worker = threading.Thread(target=namespace["spin"], args=(stop,), name="busy-worker")
+    worker.start()
+    sampler = SamplingProfiler(interval=0.002)
+    try:
+        assert sampler.toggle()
+        time.sleep(0.2)
+        assert not sampler.toggle()
+    finally:
+        stop.set()
+        worker.join()
+
+    report = sampler.get_report()
+    assert report["samples"] > 0 and not report["running"]
+    assert report["stages"]["handler"]["samples"] > 0
+    assert any(entry["function"] == "busy:spin" for entry in report["top_functions"])
+
+    path = str(tmp_path / "stacks.txt")
+    assert sampler.write_collapsed(path) > 0
+    with open(path) as f:
+        assert any(line.startswith("busy-worker;") and line.rstrip().split()[-1].isdigit() for line in f)
+
+
+def test_memory_helpers():
+    assert profiler.get_rss() > 0
+    assert profiler.model_weight_bytes(object()) is None
+    assert profiler.format_bytes(None) == "n/a"
+    assert profiler.format_bytes(512) == "512 B"
+    assert profiler.format_bytes(3 * 1024 * 1024) == "3.0 MiB"
+
+
+def test_thread_summary_folds_numbered_threads():
+    release = threading.Event()
+    threads = [threading.Thread(target=release.wait, name=f"lane-process-{i}") for i in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        assert profiler.thread_summary()["lane-process"] >= 2
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
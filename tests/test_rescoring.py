@@ -0,0 +1,62 @@
+import pytest
+
+from core.command_processor import Utterance
+from core.speech_recognizer import SpeechRecognizer
+
+
+def test_command_alternative_beats_a_better_scored_non_command(intent_classifier):
+    text, encoded = intent_classifier.rescore_alternatives([("banana bread", 0.9), ("open calculator", 0.7)],
+                                                           require_wake_word=False)
+    assert text == "open calculator"
+    stats = intent_classifier.get_rescore_stats()
+    assert stats["utterances"] == 1 and stats["changed"] == 1 and stats["avg_alternatives"] == 2
+
+
+def test_best_transcript_stays_without_a_confident_command(intent_classifier):
+    alternatives = [("banana bread", 0.9), ("banana red", 0.7)]
+    assert intent_classifier.rescore_alternatives(alternatives, require_wake_word=False)[0] == "banana bread"
+    assert intent_classifier.get_rescore_stats()["change_rate"] == 0.0
+
+
+def test_wake_word_is_required_while_inactive(intent_classifier):
+    alternatives = [("open calculator", 0.9), ("nico open calculator", 0.6)]
+    assert intent_classifier.rescore_alternatives(alternatives)[0] == "nico open calculator"
+    assert not intent_classifier.activation.check()  # Rescoring never activates
+
+
+def test_rescoring_returns_the_embeddings_it_made(intent_classifier):
+    _, encoded = intent_classifier.rescore_alternatives([("banana bread", 0.9), ("pear cake", 0.8)],
+                                                        require_wake_word=False)
+    calls = len(intent_classifier.sentence_model.calls)
+    assert intent_classifier._clean_text("banana bread") in encoded
+    intent_classifier.rescore_alternatives([("banana bread", 0.9)], require_wake_word=False, encoded=encoded)
+    assert len(intent_classifier.sentence_model.calls) == calls
+
+
+@pytest.fixture
+def recognizer():
+    recognizer = SpeechRecognizer.__new__(SpeechRecognizer)  # Only the parsing settings - no microphone
+    recognizer.max_alternatives, recognizer.alternative_decay = 3, 0.5
+    return recognizer
+
+
+def test_alternatives_are_scored_deduplicated_and_capped(recognizer):
+    result = {"alternative": [{"transcript": "open calculator", "confidence": 0.9}, {"transcript": "Open Calculator"},
+                              {"transcript": " "}, {"transcript": "open calc"}, {"transcript": "oh pen"},
+                              {"transcript": "never reached"}]}
+    assert recognizer._alternatives(result) == [("open calculator", 0.9), ("open calc", pytest.approx(0.1125)),
+                                                ("oh pen", pytest.approx(0.05625))]
+
+
+def test_alternatives_without_a_confidence_start_at_the_default(recognizer):
+    assert recognizer._alternatives({"alternative": [{"transcript": "next song"}]}) == [("next song", 0.8)]
+    assert recognizer._alternatives([]) == []
+
+
+def test_queue_items_become_utterances():
+    alternatives = [("next song", 0.9), ("next long", 0.4)]
+    utterance = Utterance.from_queue_item(("next song", "trace", alternatives))
+    assert (utterance.text, utterance.trace, utterance.alternatives) == ("next song", "trace", alternatives)
+    assert Utterance.from_queue_item(("next song", "trace")).alternatives is None
+    assert Utterance.from_queue_item("next song").require_wake_word
+    assert Utterance.from_queue_item(utterance) is utterance
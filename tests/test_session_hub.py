@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from core.session_hub import SessionHub
+
+
+class _Trace:
+    def set(self, key, value):
+        pass
+
+
+class _Classifier:
+    def __init__(self):
+        self.encode_calls = []
+
+    def embedding_inputs(self, text, activation, require_wake_word):
+        return [text]
+
+    def encode_texts(self, texts):
+        self.encode_calls.append(list(texts))
+        return list(texts)
+
+    def match_command(self, text):
+        return None
+
+
+class _Processor:
+    def __init__(self, classifier):
+        self.intent_classifier = classifier
+        self.playback = None
+        self.processed = []
+        self.done = threading.Event()
+
+    def _begin_utterance(self, utterance):
+        return _Trace()
+
+    def _process_utterance(self, utterance, activation, encoded, trace):
+        self.processed.append((utterance.text, encoded))
+        return {"status": "dispatched"}
+
+    def _deliver(self, utterance, result):
+        if len(self.processed) >= 4:
+            self.done.set()
+
+
+@pytest.fixture
+def hub():
+    return SessionHub(_Processor(_Classifier()), max_batch=3, max_queue=2)
+
+
+def test_collect_takes_round_robin_up_to_max_batch(hub):
+    kitchen, office = hub.add_session("kitchen"), hub.add_session("office")
+    kitchen.submit("k1"), kitchen.submit("k2"), office.submit("o1"), office.submit("o2")
+    batch = hub._collect()
+    assert [(s.session_id, u.text) for s, u in batch] == [("kitchen", "k1"), ("office", "o1"), ("kitchen", "k2")]
+
+
+def test_session_queue_is_bounded(hub):
+    session = hub.add_session("main")
+    assert session.submit("one") and session.submit("two")
+    assert not session.submit("three")
+
+
+def test_batch_is_encoded_in_one_call(hub):
+    a, b = hub.add_session("a"), hub.add_session("b")
+    a.submit("pause"), b.submit("next song")
+    hub._process_batch(hub._collect())
+    assert hub.classifier.encode_calls == [["pause", "next song"]]
+    assert hub.processor.processed == [("pause", ["pause", "next song"]), ("next song", ["pause", "next song"])]
+    stats = hub.get_stats()
+    assert stats["batches"] == 1 and stats["max_batch"] == 2
+    assert stats["sessions"]["a"]["dispatched"] == 1
+
+
+def test_running_hub_drains_more_than_one_batch(hub):
+    sessions = [hub.add_session(name) for name in ("a", "b")]
+    for session in sessions:
+        session.submit(f"{session.session_id}1"), session.submit(f"{session.session_id}2")
+    hub.start()
+    try:
+        assert hub.processor.done.wait(5)
+    finally:
+        hub.stop()
+    assert sorted(text for text, _ in hub.processor.processed) == ["a1", "a2", "b1", "b2"]
+    assert hub.get_stats()["batches"] == 2
+
+
+def test_duplicate_and_removed_sessions(hub):
+    hub.add_session("main")
+    with pytest.raises(ValueError):
+        hub.add_session("main")
+    assert hub.remove_session("main") and not hub.remove_session("main")
+    assert hub.get_session("main") is None
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+import soak
+from core.command_processor import CommandProcessor
+from core.latency_tracer import LatencyTracer
+
+
+class _BlockingTTS(soak.StubTTS):
+    """Holds the first response until released"""
+
+    def __init__(self):
+        super().__init__(seconds_per_char=0)
+        self.release = threading.Event()
+        self.said = []
+
+    def say(self, text):
+        self.said.append(text)
+
+    def runAndWait(self):
+        self.release.wait(5)
+
+
+def test_tts_backlog_is_bounded_and_keeps_recent_replies():
+    tts = _BlockingTTS()
+    processor = CommandProcessor(intent_classifier=object(), tts_engine=tts)
+    processor._speak("reply 0")
+    while not tts.said:
+        time.sleep(0.01)  # The TTS thread is now busy with the first reply
+
+    for i in range(1, 10):
+        processor._speak(f"reply {i}")
+    assert processor._tts_queue.qsize() == CommandProcessor.TTS_QUEUE_SIZE
+    assert [t.name for t in threading.enumerate()].count("tts") == 1
+
+    tts.release.set()
+    deadline = time.monotonic() + 5
+    while len(tts.said) < 1 + CommandProcessor.TTS_QUEUE_SIZE and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tts.said == ["reply 0", "reply 6", "reply 7", "reply 8", "reply 9"]
+    processor.stop_processing()
+
+
+@pytest.mark.parametrize("values, relative, failed", [
+    ([100] * 9, True, False),
+    ([100, 100, 100, 101, 101, 101, 104, 104, 104], True, False),
+    ([100, 100, 100, 120, 120, 120, 150, 150, 150], True, True),
+    ([10, 10, 10, 10, 10, 10, 13, 13, 13], False, True),
+    ([1, 1, 50, 50, 50], True, False),  # Too few samples to judge
+])
+def test_check_growth(values, relative, failed):
+    assert (soak.check_growth("metric", values, 0.1 if relative else 2, relative) is not None) == failed
+
+
+def test_parse_duration():
+    assert [soak.parse_duration(text) for text in ("90", "30s", "10m", "2h")] == [90, 30, 600, 7200]
+
+
+def test_tracer_durations_since():
+    tracer = LatencyTracer()
+    for _ in range(3):
+        tracer.start_trace().finish()
+    completed, durations = tracer.get_durations_since(0)
+    assert completed == 3 and len(durations) == 3
+    tracer.start_trace().finish()
+    completed, durations = tracer.get_durations_since(completed)
+    assert completed == 4 and len(durations) == 1
+    assert tracer.get_durations_since(completed) == (4, [])
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from startup_profile import DEFAULT_IMPORT_BUDGET, ENTRY_MODULES, heavy_imports, profile_import
+from utils import lazy_import
+
+
+@pytest.mark.parametrize("module", ENTRY_MODULES)
+def test_entry_modules_leave_heavy_dependencies_for_first_use(module):
+    assert heavy_imports(profile_import(module)) == []
+
+
+def test_package_imports_nothing_heavy():
+    assert heavy_imports(profile_import()) == []
+
+
+def test_package_import_is_within_the_time_budget():
+    budget = float(os.environ.get("ASSISTANT_IMPORT_BUDGET", DEFAULT_IMPORT_BUDGET))
+    profile = profile_import()  # Fresh interpreter - nothing cached from the other tests
+    assert profile["total"] <= budget, f"Importing the package took {profile['total'] * 1000:.0f} ms"
+
+
+def test_an_eager_import_is_caught():
+    pytest.importorskip("numpy")
+    assert heavy_imports(profile_import("numpy")) == ["numpy"]
+
+
+def test_lazy_module_loads_on_first_attribute():
+    module = lazy_import("json")
+    assert not module.is_loaded
+    assert module.dumps([1]) == "[1]"
+    assert module.is_loaded
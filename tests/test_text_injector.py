@@ -0,0 +1,79 @@
+from commands.clipboard import MemoryClipboard
+from commands.keyboard import RecordingKeyboard
+from commands.text_commands import TextCommands
+from commands.text_injector import PASTE_STRATEGY, TYPE_STRATEGY, TextInjector
+
+
+class _BrokenClipboard(MemoryClipboard):
+    def set_text(self, text):
+        raise OSError("no display")
+
+
+class _NoPasteKeyboard(RecordingKeyboard):
+    def hotkey(self, *keys):
+        raise PermissionError("no access to /dev/uinput")
+
+
+def _injector(clipboard=None, **kwargs):
+    clipboard = MemoryClipboard("saved") if clipboard is None else clipboard
+    return TextInjector(clipboard=clipboard, keyboard=RecordingKeyboard(), restore_delay=0, **kwargs)
+
+
+def test_short_ascii_text_is_typed():
+    injector = _injector()
+    assert injector.inject("hello") == TYPE_STRATEGY
+    assert "".join(injector.keyboard.taps) == "hello"
+    assert injector.clipboard.history == []
+
+
+def test_long_text_is_pasted_and_the_clipboard_restored():
+    injector = _injector(paste_threshold=10)
+    text = "a much longer sentence to dictate"
+    assert injector.inject(text) == PASTE_STRATEGY
+    assert injector.clipboard.history == [text, "saved"]
+    assert sorted(injector.keyboard.taps) == sorted(injector.paste_keys)
+
+
+def test_non_ascii_text_is_pasted():
+    assert _injector().inject("café") == PASTE_STRATEGY
+
+
+def test_without_a_clipboard_everything_is_typed():
+    injector = TextInjector(clipboard=None, keyboard=RecordingKeyboard())
+    injector.clipboard = None
+    assert injector.choose_strategy("x" * 500) == TYPE_STRATEGY
+
+
+def test_failed_paste_falls_back_to_typing():
+    injector = _injector(clipboard=_BrokenClipboard(), paste_threshold=1)
+    assert injector.inject("fallback") == TYPE_STRATEGY
+    assert "".join(injector.keyboard.taps) == "fallback"
+    assert injector.get_stats()[TYPE_STRATEGY]["count"] == 1
+
+
+def test_clipboard_is_restored_when_the_paste_shortcut_fails():
+    injector = TextInjector(clipboard=MemoryClipboard("saved"), keyboard=_NoPasteKeyboard(), restore_delay=0,
+                            paste_threshold=1)
+    assert injector.inject("dictated") == TYPE_STRATEGY
+    assert injector.clipboard.get_text() == "saved"
+    assert injector.clipboard.history == ["dictated", "saved"]
+
+
+def test_write_text_uses_the_injector():
+    commands = TextCommands(injector=_injector(paste_threshold=5))
+    assert commands.write_text({"content": "  dictated text  "})
+    assert commands.injector.clipboard.history == ["dictated text", "saved"]
+    assert not commands.write_text({})
+
+
+def test_registry_shares_one_keyboard_between_handlers():
+    from commands.command_registry import CommandRegistry
+
+    keyboard = RecordingKeyboard()
+    registry = CommandRegistry(keyboard=keyboard)
+    media = registry.get_handler("mute").__self__
+    text = registry.get_handler("write_text").__self__
+    assert registry.get_keyboard() is keyboard
+    assert media.keyboard is media.controller.keyboard is text.keyboard is text.injector.keyboard is keyboard
+    if hasattr(media.mixer, "keyboard"):
+        assert media.mixer.keyboard is keyboard
@@ -0,0 +1,95 @@
+import pytest
+
+from commands import smart_media_controller
+from commands.keyboard import RecordingKeyboard
+from commands.media_sessions import FakeMediaSessions
+from commands.smart_media_controller import SmartMediaController
+from commands.window_system import FakeWindowBackend, WindowIndex, WindowSnapshot
+
+WINDOWS = [
+    ("Inbox - Mozilla Firefox", "firefox"),
+    ("Lo-fi beats - YouTube Music - Google Chrome", "chrome.exe"),
+    ("Stremio", "stremio.exe"),
+]
+
+
+def test_snapshot_finds_by_title_or_process_topmost_first():
+    backend = FakeWindowBackend(WINDOWS + [("Other Chrome window", "chrome.exe")])
+    snapshot = WindowSnapshot(backend.enumerate_windows(), None, ["chrome"])
+    assert snapshot.find("CHROME").title.startswith("Lo-fi")
+    assert [w.handle for w in snapshot.find_all("chrome")] == [2, 4]
+    assert snapshot.find("spotify") is None
+
+
+def test_index_reuses_a_fresh_snapshot():
+    backend = FakeWindowBackend(WINDOWS)
+    index = WindowIndex(backend, ttl=60)
+    assert index.get_snapshot() is index.get_snapshot()
+    assert backend.enumerations == 1 and index.hits == 1
+
+
+def test_focus_change_invalidates_the_snapshot():
+    backend = FakeWindowBackend(WINDOWS)
+    index = WindowIndex(backend, ttl=60)
+    index.start_focus_watch()
+    first = index.get_snapshot()
+    backend.set_foreground(3)
+    second = index.get_snapshot()
+    assert second is not first and second.foreground == 3
+
+
+def test_prefetched_snapshot_is_served_once_past_its_ttl():
+    backend = FakeWindowBackend(WINDOWS)
+    index = WindowIndex(backend, ttl=0)
+    prefetched = index.prefetch(hold=60)
+    assert index.get_snapshot() is prefetched
+    assert index.get_snapshot() is not prefetched
+    assert index.prefetch_hits == 1
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(smart_media_controller, "FOCUS_SETTLE_DELAY", 0)
+    return SmartMediaController(FakeWindowBackend(WINDOWS), snapshot_ttl=60, keyboard=RecordingKeyboard(),
+                                media_sessions=FakeMediaSessions())
+
+
+def test_music_tab_gets_the_media_key(controller):
+    controller.backend.set_windows(WINDOWS[:2])
+    assert controller.smart_play_pause()
+    assert controller.keyboard.taps == ["playpause"]
+    assert controller.backend.activated == []
+
+
+def test_stremio_is_focused_and_sent_space(controller):
+    assert controller.smart_play_pause()
+    assert controller.backend.activated == [3]
+    assert controller.keyboard.taps == ["space"]
+
+
+def test_foreground_media_window_wins(controller):
+    controller.backend.set_foreground(2)
+    assert controller.smart_play_pause()
+    assert controller.backend.activated == []
+    assert controller.keyboard.taps == ["playpause"]
+
+
+def test_media_lookups_share_one_enumeration(controller):
+    controller._get_last_used_media()
+    controller._find_window("stremio")
+    assert controller.backend.enumerations == 1
+
+
+def test_reporting_player_is_used_before_any_window_scan(controller):
+    controller.media_sessions.add_player("spotify")
+    assert controller.smart_play_pause()
+    assert controller.media_sessions.calls == [("spotify", "PlayPause")]
+    assert controller.backend.enumerations == 0
+
+
+def test_refused_focus_sends_no_keys(controller, monkeypatch):
+    monkeypatch.setattr(controller.backend, "activate_window", lambda handle: False)
+    snapshot = controller._get_snapshot()
+    assert not controller.smart_play_pause()
+    assert controller.keyboard.taps == []
+    assert controller._get_snapshot() is snapshot  # Nothing changed, nothing to invalidate
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from core.zygote import Zygote
+from flight_recorder import recorder
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="zygote mode needs os.fork")
+
+
+class _Processor:
+    def __init__(self, intent_classifier=None):
+        self.intent_classifier = intent_classifier
+
+
+class _FailingAssistant:
+    def __init__(self, **kwargs):
+        raise RuntimeError("microphone unplugged")
+
+
+def test_failed_worker_dumps_its_recorder_and_exits_nonzero(monkeypatch, capfd):
+    import core.assistant
+    import core.command_processor
+    monkeypatch.setattr(core.command_processor, "CommandProcessor", _Processor)
+    monkeypatch.setattr(core.assistant, "Assistant", _FailingAssistant)
+
+    status, lived = Zygote(use_microphone=False)._run_worker(0.0, None)
+    assert (status, lived) == (1, 0.0)
+    stderr = capfd.readouterr().err
+    assert "=== Flight recorder" in stderr
+    assert "Worker failed: microphone unplugged" in stderr and "Traceback" in stderr
+
+
+def test_ready_reports_and_summary_go_to_the_recorder(capsys):
+    recorder.clear()
+    parent = Zygote(use_microphone=False)
+    parent.stats["preload_time"] = 2.0
+    parent._record_ready({"pid": 42, "ready_time": 0.2, "ready_at": 11.0}, restart_from=10.5)
+    parent._record_ready({"pid": 43, "ready_time": 0.4, "ready_at": 20.0}, restart_from=None)
+    stats = parent.get_stats()
+    assert stats["ready_times"] == [0.2, 0.4] and stats["last_restart"] == pytest.approx(0.5)
+    assert "ready in avg 300 ms" in parent.format_stats()
+    assert any("Worker 43 ready in 400 ms (cold preload 2000 ms)" in event for event in recorder.get_events())
+    assert "worker 43 ready in 400 ms (cold preload 2000 ms)" in capsys.readouterr().out  # Nobody dumps the parent
+
+
+def test_workers_keep_the_shared_encoder(intent_classifier):
+    from core.assistant import Assistant
+    from core.command_processor import CommandProcessor
+    from soak import StubTTS
+
+    processor = CommandProcessor(intent_classifier=intent_classifier, tts_engine=StubTTS())
+    options = dict(Zygote(use_microphone=False).assistant_options)
+    assert "encoder" not in Assistant(command_processor=processor, **options).governor.components
+    assert "encoder" in Assistant(use_microphone=False, command_processor=processor).governor.components
+
@@ -2,8 +2,38 @@
 Shared utilities for the voice assistant
 """
 
+import importlib
+import re
 import time
-from typing import Set
+import types
+from typing import List, Optional, Set
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Defer importing a heavy dependency until it is actually used"""
+    return LazyModule(name)
 
 
 def normalize_key_name(key_text: str) -> str:
@@ -51,6 +81,59 @@ def normalize_key_name(key_text: str) -> str:
     return key_mappings.get(key_text, key_text)
 
 
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40,
+    "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90
+}
+
+
+def parse_amount(text: str) -> Optional[int]:
+    """Extract a number from spoken text ("30 percent", "30%", "twenty five", "a hundred").
+    None when there is no number, more than one, or words that do not form one ("five ten")."""
+    if not text:
+        return None
+
+    words = re.findall(r"[a-z]+|\d+", text.lower())
+    numbers = [i for i, word in enumerate(words) if word.isdigit() or word in NUMBER_WORDS or word == "hundred"]
+    if not numbers:
+        return None
+    if words[numbers[0]].isdigit():
+        return int(words[numbers[0]]) if len(numbers) == 1 else None
+
+    # One run of number words - "and" may only follow "hundred" ("a hundred and five")
+    start, end = numbers[0], numbers[0]
+    while end + 1 < len(words) and (end + 1 in numbers or (
+            words[end] == "hundred" and words[end + 1] == "and" and end + 2 in numbers)):
+        end += 2 if words[end + 1] == "and" else 1
+    if numbers[-1] > end:
+        return None  # A second number further on
+    return _number_from_words([word for word in words[start:end + 1] if word != "and"])
+
+
+def _number_from_words(words: List[str]) -> Optional[int]:
+    """Value of spoken number words below a thousand - None for sequences like 'twenty thirty'"""
+    total, current = 0, None  # current is the part below the hundreds
+    for word in words:
+        if word.isdigit():
+            return None  # Digits mixed with number words
+        if word == "hundred":
+            if total or (current is not None and current >= 10):
+                return None
+            total, current = (current or 1) * 100, None
+            continue
+        value = NUMBER_WORDS[word]
+        if current is None:
+            current = value
+        elif current >= 20 and current % 10 == 0 and 0 < value < 10:
+            current += value  # "twenty five"
+        else:
+            return None
+    return total + (current or 0)
+
+
 class SafetyChecker:
     """Handles dangerous command safety checks"""
 